@@ -4,7 +4,7 @@ Gemini-powered AI navigation system.
 """
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -15,6 +15,56 @@ class Settings(BaseSettings):
     # Gemini API (Primary AI Engine)
     gemini_api_key: str = Field(default="", description="Gemini API key")
     use_gemini: bool = Field(default=True, description="Enable Gemini VLM")
+    gemini_api_endpoint: str = Field(default="", description="Override API endpoint, e.g. a local stand-in server (REST transport)")
+    
+    # Gemini Deadline (guaranteed worst-case response latency)
+    vlm_deadline_s: float = Field(default=2.5, description="Max seconds to wait for Gemini before answering locally (0 = wait)")
+    vlm_streaming: bool = Field(default=True, description="Stream Gemini answers into TTS sentence by sentence")
+    vlm_followup_window_s: float = Field(default=4.0, description="Extra seconds a late Gemini answer is still spoken as a follow-up")
+    
+    # Gemini Request Scheduler (process-wide, shared by all sessions)
+    vlm_rate_limit_rpm: float = Field(default=30.0, description="Sustained Gemini requests per minute (0 = unlimited)")
+    vlm_rate_burst: int = Field(default=5, description="Requests allowed back to back before rate limiting")
+    vlm_max_concurrent: int = Field(default=4, description="Max Gemini calls in flight at once")
+    
+    # Gemini Circuit Breaker (stop calling a failing API for a while)
+    vlm_call_timeout_s: float = Field(default=10.0, description="Seconds before a Gemini call counts as failed")
+    vlm_breaker_failure_threshold: int = Field(default=3, description="Consecutive failures that open the circuit")
+    vlm_breaker_cooldown_s: float = Field(default=30.0, description="Seconds to answer locally before probing again")
+    vlm_breaker_half_open_probes: int = Field(default=1, description="Probe requests allowed when half-open")
+    
+    # Gemini Chat History (system prompt set once, prior turns sent as text)
+    vlm_history_max_tokens: int = Field(default=1500, description="Estimated token budget for chat history (0 = single-turn)")
+    
+    # Prompt Context Budget (grouped detections, highest threat first)
+    context_max_groups: int = Field(default=8, description="Max class/position groups described in prompts")
+    context_max_chars: int = Field(default=600, description="Character budget for the CV context in prompts")
+    
+    # Speculative Prefetch (describe the scene in the background when it settles)
+    prefetch_enabled: bool = Field(default=True, description="Prefetch scene descriptions on scene change")
+    prefetch_stable_s: float = Field(default=1.0, description="Seconds a changed scene must hold before prefetching")
+    prefetch_min_interval_s: float = Field(default=10.0, description="Min seconds between prefetch requests")
+    prefetch_max_per_minute: int = Field(default=4, description="Max prefetch requests per minute")
+    prefetch_max_age_s: float = Field(default=15.0, description="Max age of a prefetched description when answering")
+    
+    # Gemini Response Cache (same intent + same scene = no API call)
+    vlm_cache_size: int = Field(default=64, description="Max cached Gemini responses")
+    vlm_cache_ttl_s: float = Field(default=30.0, description="Seconds a cached response stays valid")
+    vlm_cache_distance_bucket_m: float = Field(default=1.0, description="Distance quantization for scene signatures")
+    vlm_cache_image_hash_size: int = Field(default=4, description="Perceptual hash grid size (0 = ignore image)")
+    
+    # Gemini Upload Budget (downscale + JPEG before sending)
+    vlm_max_image_pixels: int = Field(default=640 * 480, description="Max uploaded image pixels (width x height)")
+    vlm_max_image_bytes: int = Field(default=80_000, description="Max uploaded JPEG size in bytes")
+    vlm_jpeg_quality: int = Field(default=80, description="Starting JPEG quality for uploads")
+    vlm_jpeg_min_quality: int = Field(default=40, description="Lowest JPEG quality before shrinking further")
+    
+    # Gemini Crop Mode (object-specific queries send only the relevant crops)
+    vlm_crop_mode: bool = Field(default=True, description="Send detection crops for object-specific queries")
+    vlm_crop_max_objects: int = Field(default=3, description="Max detections cropped per query")
+    vlm_crop_padding: float = Field(default=0.15, description="Crop margin as a fraction of box size")
+    vlm_crop_max_pixels: int = Field(default=224 * 224, description="Pixel budget per crop")
+    vlm_crop_thumbnail_px: int = Field(default=160, description="Context thumbnail longest side (0 = none)")
     
     # Google Maps (Optional - for future route planning)
     google_maps_api_key: Optional[str] = Field(default=None, description="Google Maps API key")
@@ -39,12 +89,101 @@ class Settings(BaseSettings):
     tts_volume: float = Field(default=0.9, description="TTS volume (0.0 - 1.0)")
     use_online_tts: bool = Field(default=False, description="Use online TTS (gTTS) vs offline")
     
+    # Speech Queue (one TTS worker; alerts preempt, stale chatter is dropped)
+    tts_alert_max_age_s: float = Field(default=2.0, description="Drop a queued safety alert not spoken within this many seconds")
+    tts_response_max_age_s: float = Field(default=20.0, description="Drop a queued answer not spoken within this many seconds")
+    tts_status_max_age_s: float = Field(default=3.0, description="Drop a queued status prompt ('Thinking') not spoken within this many seconds")
+    tts_repeat_suppress_s: float = Field(default=3.0, description="Skip an alert or status prompt identical to one spoken this recently")
+    
+    # Phrase Cache (pre-synthesized audio for prompts and alerts)
+    tts_cache_dir: str = Field(default=".cache/tts", description="Directory for cached speech audio (empty = memory only)")
+    tts_cache_memory_items: int = Field(default=64, description="Synthesized clips kept in memory")
+    tts_cache_max_files: int = Field(default=128, description="Cached clips kept on disk (least recently used removed first)")
+    tts_synthesis_timeout_s: float = Field(default=8.0, description="Max seconds to wait for online (gTTS) synthesis of one utterance")
+    tts_preload_phrases: List[str] = Field(
+        default=[
+            "Listening", "Thinking", "No speech detected. Please try again.",
+            "Waiting for video feed. Make sure the stream is running.", "Error occurred. Please try again.",
+            "Live stream active. Real-time detection running.", "Stream inactive. Click START to begin."
+        ],
+        description="Fixed prompts synthesized in idle gaps; only these are played from the phrase cache"
+    )
+    tts_preload_idle_s: float = Field(default=0.5, description="Seconds of silence before pre-synthesizing the next fixed prompt")
+    
+    # Speech Recognition ('google' online, or 'vosk' offline streaming on the CPU)
+    speech_backend: str = Field(default="google", description="Speech recognition backend: 'google' or 'vosk'")
+    vosk_model_path: str = Field(default="", description="Unpacked Vosk model directory (required for the vosk backend; nothing is downloaded)")
+    
+    # Microphone Stream (always open, VAD endpointing instead of a fixed pause threshold)
+    mic_persistent_stream: bool = Field(default=True, description="Keep one microphone stream open instead of reopening it per command")
+    mic_sample_rate: int = Field(default=16000, description="Capture rate in Hz (8000/16000/32000/48000 for webrtcvad)")
+    mic_frame_ms: int = Field(default=30, description="VAD frame length in ms (10, 20 or 30)")
+    mic_vad_aggressiveness: int = Field(default=2, description="webrtcvad aggressiveness (0 = least, 3 = most filtering)")
+    mic_pre_roll_ms: int = Field(default=300, description="Audio kept from before speech starts")
+    mic_end_silence_ms: int = Field(default=500, description="Silence that ends an utterance")
+    mic_max_utterance_s: float = Field(default=15.0, description="Wall-clock cap on one utterance when no phrase_time_limit is given")
+    mic_ring_seconds: float = Field(default=5.0, description="Seconds of audio kept in the capture ring buffer")
+    
     # Distance Estimation
     calibration_factor: float = Field(default=1.0, description="Distance calibration adjustment factor")
     # Advanced camera calibration (optional - app auto-detects if not set)
     focal_length_mm: Optional[float] = Field(default=None, description="Camera focal length in mm")
     sensor_height_mm: Optional[float] = Field(default=None, description="Camera sensor height in mm")
     
+    # Monocular Depth (optional - runs on a background thread, never per frame)
+    use_depth_model: bool = Field(default=False, description="Enable MiDaS depth for unclassified obstacles")
+    depth_model_type: str = Field(default="MiDaS_small", description="torch.hub MiDaS model variant")
+    depth_rate_hz: float = Field(default=1.5, description="Max depth inferences per second")
+    depth_input_width: int = Field(default=256, description="Frame width used for depth inference")
+    depth_max_age_s: float = Field(default=2.0, description="Ignore cached depth maps older than this")
+    depth_box_percentile: float = Field(default=75.0, description="Percentile of nearness over a detection box (robust to background pixels)")
+    depth_obstacle_threshold: float = Field(default=0.85, description="Corridor nearness (0-1) treated as blocked")
+    depth_floor_exclude_fraction: float = Field(default=0.25, description="Bottom fraction of the frame (floor at the user's feet) left out of the corridor")
+    
+    # Free-space Grid (bird's-eye occupancy for "where can I go?")
+    grid_cell_m: float = Field(default=0.2, description="Occupancy grid cell size in meters")
+    grid_range_m: float = Field(default=6.0, description="Occupancy grid forward/lateral range in meters")
+    grid_num_headings: int = Field(default=9, description="Number of walking headings to score")
+    grid_fov_deg: float = Field(default=70.0, description="Angular span of scored headings")
+    walker_width_m: float = Field(default=0.7, description="Corridor width the user needs to pass")
+    
+    # Time-to-collision (looming from tracked box growth)
+    ttc_warning_s: float = Field(default=3.0, description="Alert when an object is this many seconds from contact")
+    ttc_critical_s: float = Field(default=1.5, description="Critical alert below this time-to-collision")
+    ttc_min_growth_rate: float = Field(default=0.05, description="Min box log-scale growth per second to count as approaching")
+    walking_speed_mps: float = Field(default=1.2, description="Assumed user walking speed for static obstacles")
+    
+    # Proactive Safety Alerts (per frame, independent of voice queries)
+    proactive_alerts: bool = Field(default=True, description="Speak safety alerts without a voice query")
+    alert_min_level: str = Field(default="warning", description="Lowest level spoken proactively (caution/warning/critical)")
+    alert_hysteresis_m: float = Field(default=0.3, description="Distance margin before an alert level steps down")
+    alert_cooldown_critical_s: float = Field(default=3.0, description="Min seconds between critical alerts per object")
+    alert_cooldown_warning_s: float = Field(default=6.0, description="Min seconds between warning alerts per object")
+    alert_cooldown_caution_s: float = Field(default=10.0, description="Min seconds between caution alerts per object")
+    alert_max_objects: int = Field(default=8, description="Nearest objects evaluated per frame")
+    alert_max_events_per_frame: int = Field(default=2, description="Max alerts emitted per frame")
+    alert_state_ttl_s: float = Field(default=5.0, description="Forget objects not seen for this long")
+    
+    # Object Memory (where things were seen, answered without the VLM)
+    object_memory_capacity: int = Field(default=2048, description="Sightings kept in the ring store")
+    object_memory_ttl_s: float = Field(default=600.0, description="Seconds a sighting is remembered")
+    object_memory_min_interval_s: float = Field(default=1.0, description="Min seconds between sightings of an unchanged object")
+    object_memory_snapshot_path: str = Field(default="", description="JSON file to persist object memory, shared by all sessions (empty = off, per-session memory)")
+    object_memory_snapshot_interval_s: float = Field(default=60.0, description="Seconds between memory snapshots")
+    
+    # Indoor Route Planning (offline venue graph, no maps service)
+    venue_map_path: str = Field(default="", description="Venue graph JSON, e.g. config/venues/demo_office.json (empty = off)")
+    route_num_landmarks: int = Field(default=4, description="Landmarks for the A* ALT heuristic")
+    route_cache_size: int = Field(default=128, description="Planned routes kept in the cache")
+    
+    # Agent Backend ('gemini' cloud VLM, or 'offline_llm' local model with no network)
+    agent_backend: str = Field(default="gemini", description="Agent backend: 'gemini' or 'offline_llm'")
+    local_llm_model_path: str = Field(default="", description="Quantized GGUF model for the offline LLM (llama.cpp)")
+    local_llm_context_tokens: int = Field(default=2048, description="Offline LLM context window (prompt plus answer)")
+    local_llm_max_tokens: int = Field(default=96, description="Max tokens generated per offline LLM answer")
+    local_llm_threads: int = Field(default=0, description="CPU threads for the offline LLM (0 = auto)")
+    local_llm_temperature: float = Field(default=0.3, description="Offline LLM sampling temperature")
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -52,7 +191,9 @@ class Settings(BaseSettings):
         extra = "ignore"
     
     def has_gemini_key(self) -> bool:
-        """Check if Gemini API key is configured."""
+        """Check if Gemini API key is configured (a local stand-in endpoint needs none)."""
+        if self.gemini_api_endpoint:
+            return True
         return bool(self.gemini_api_key and self.gemini_api_key != "your_gemini_api_key_here")
     
     def get_feature_status(self) -> dict:
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark the query intent router.
+
+Compares the old per-call keyword scans (VLM decision, navigation check,
+memory/route/locate checks, rule-based dispatch and cache normalization,
+each lowercasing and scanning the query separately) against one
+route_intent() call, both cold (cache cleared) and memoized.
+
+    python scripts/benchmark_intent_router.py --iterations 20000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cloud_agent.intent_router import route_intent
+from src.cloud_agent.response_cache import normalize_intent
+
+
+QUERIES = [
+    "What do you see?",
+    "Is it safe to walk forward?",
+    "Which way should I go?",
+    "Where was the door?",
+    "Where is the chair?",
+    "How do I get to the elevator?",
+    "Describe the scene in detail",
+    "Find my backpack",
+    "Hello",
+]
+
+# Keyword lists as they were scattered across the agent and the responders
+LEGACY_SCANS = [
+    ['how do i get to', 'how can i get to', 'take me to', 'directions to', 'route to', 'navigate to', 'guide me to'],
+    ['where was', 'where were', 'where did', 'last see', 'last saw', 'did you see', 'have you seen'],
+    ['where is', "where's", 'where are', 'find the', 'find my'],
+    ['where can i go', 'where should i go', 'which way', 'which direction', 'guide me', 'clear path', 'way out'],
+    ['describe', 'what', 'where', 'how many', 'tell me about', 'explain', 'identify', 'recognize', 'scene',
+     'environment', 'see', 'look', 'show', 'detail', 'color', 'appearance'],
+    ['what do you see', 'what can you see', 'describe', "what's ahead", 'what is ahead', "what's around",
+     'what is around', 'what is in front', "what's in front"],
+    ['safe', 'clear', 'walk', 'move'],
+    ['describe', 'what', 'see', 'scene'],
+    ['where', 'find', 'locate'],
+]
+
+
+def legacy_route(query: str):
+    """Old path: every consumer lowercases and scans the query itself."""
+    results = [any(phrase in query.lower() for phrase in phrases) for phrases in LEGACY_SCANS]
+    return results, normalize_intent(query)
+
+
+def main():
+    """Time both paths and print per-query costs."""
+    parser = argparse.ArgumentParser(description="Benchmark the query intent router")
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    
+    def run_legacy():
+        for query in QUERIES:
+            legacy_route(query)
+    
+    def run_cold():
+        route_intent.cache_clear()
+        for query in QUERIES:
+            route_intent(query)
+    
+    def run_memoized():
+        for query in QUERIES:
+            route_intent(query)
+    
+    calls = args.iterations * len(QUERIES)
+    print(f"Routing {len(QUERIES)} queries x {args.iterations} iterations...")
+    for name, func in [('legacy scans', run_legacy), ('router (cold)', run_cold), ('router (memoized)', run_memoized)]:
+        elapsed = timeit.timeit(func, number=args.iterations)
+        print(f"{name:<18} {elapsed / calls * 1e6:8.2f} us/query")
+    
+    print("\nRouting results:")
+    for query in QUERIES:
+        intent = route_intent(query)
+        print(f"  {query:<32} -> {intent.name:<10} target={intent.target!r} vlm={intent.use_vlm}")
+
+
+if __name__ == "__main__":
+    main()
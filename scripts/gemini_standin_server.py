@@ -0,0 +1,275 @@
+"""
+Local stand-in for the Gemini API (offline latency and load testing).
+
+Speaks enough of the REST protocol for GeminiVLMTool to be pointed at it:
+    POST /v1beta/models/<model>:generateContent
+    POST /v1beta/models/<model>:streamGenerateContent[?alt=sse]
+    GET  /stats
+
+Latency, error rate and throttling (429) are configurable, so the real
+client code path, deadlines and fallbacks can be exercised without
+network access.
+
+Usage:
+    python scripts/gemini_standin_server.py --port 8765 --latency-ms 900 --error-rate 0.05
+    # then run the app/load test with GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StandInBehaviour:
+    """Latency, failure and throttling model shared by all request threads."""
+    
+    def __init__(self, args: argparse.Namespace):
+        """
+        Initialize from command-line options.
+        
+        Args:
+            args: Parsed arguments (see build_parser)
+        """
+        self.args = args
+        self.random = random.Random(args.seed)
+        self._lock = threading.Lock()
+        
+        # Token bucket for the requests-per-minute quota
+        self._tokens = float(args.rpm_limit)
+        self._last_refill = time.time()
+        
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'throttled': 0, 'streamed': 0}
+    
+    def sample_latency_s(self) -> float:
+        """Draw a total response latency from the configured distribution."""
+        median = self.args.latency_ms / 1000.0
+        with self._lock:
+            if self.args.latency_dist == 'fixed':
+                value = median
+            elif self.args.latency_dist == 'uniform':
+                spread = median * self.args.latency_spread
+                value = self.random.uniform(median - spread, median + spread)
+            else:
+                # Lognormal: realistic long tail around the median
+                value = self.random.lognormvariate(0.0, self.args.latency_spread) * median
+        return max(0.0, value)
+    
+    def decide(self) -> str:
+        """Decide the outcome of a request: 'ok', 'error' or 'throttled'."""
+        with self._lock:
+            self.stats['requests'] += 1
+            
+            if self.args.rpm_limit > 0:
+                now = time.time()
+                self._tokens = min(
+                    float(self.args.rpm_limit),
+                    self._tokens + (now - self._last_refill) * self.args.rpm_limit / 60.0
+                )
+                self._last_refill = now
+                if self._tokens < 1.0:
+                    self.stats['throttled'] += 1
+                    return 'throttled'
+                self._tokens -= 1.0
+            
+            roll = self.random.random()
+            if roll < self.args.throttle_rate:
+                self.stats['throttled'] += 1
+                return 'throttled'
+            if roll < self.args.throttle_rate + self.args.error_rate:
+                self.stats['errors'] += 1
+                return 'error'
+            
+            self.stats['ok'] += 1
+            return 'ok'
+
+
+def answer_for(request_body: dict) -> str:
+    """Canned answer that echoes the most urgent detected object."""
+    text = " ".join(
+        part.get('text', '')
+        for content in request_body.get('contents', [])[-1:]
+        for part in content.get('parts', [])
+    )
+    match = re.search(r"^- (.+)$", text, re.MULTILINE)
+    if match:
+        return (
+            f"I can see {match.group(1)}. The rest of the way looks manageable. "
+            "Take your time and keep to the clear side."
+        )
+    return "The area in front of you looks open. I don't see any obstacles nearby."
+
+
+def response_chunk(text: str, prompt_chars: int, finish: bool) -> dict:
+    """One GenerateContentResponse JSON object."""
+    chunk = {
+        'candidates': [{
+            'content': {'parts': [{'text': text}], 'role': 'model'},
+            'index': 0
+        }],
+        'usageMetadata': {
+            'promptTokenCount': prompt_chars // 4,
+            'candidatesTokenCount': len(text) // 4,
+            'totalTokenCount': (prompt_chars + len(text)) // 4
+        }
+    }
+    if finish:
+        chunk['candidates'][0]['finishReason'] = 'STOP'
+    return chunk
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the Gemini REST subset."""
+    
+    behaviour: StandInBehaviour = None
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        """Serve counters at /stats."""
+        if urlparse(self.path).path != '/stats':
+            self._send_error(404, 'NOT_FOUND', "Unknown path")
+            return
+        self._send_json(200, self.behaviour.stats)
+    
+    def do_POST(self):
+        """Serve generateContent and streamGenerateContent."""
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_error(400, 'INVALID_ARGUMENT', "Request body is not valid JSON")
+            return
+        
+        if url.path.endswith(':generateContent'):
+            streaming = False
+        elif url.path.endswith(':streamGenerateContent'):
+            streaming = True
+        else:
+            self._send_error(404, 'NOT_FOUND', f"Unknown method {url.path}")
+            return
+        
+        outcome = self.behaviour.decide()
+        latency_s = self.behaviour.sample_latency_s()
+        
+        if outcome == 'throttled':
+            time.sleep(min(latency_s, 0.05))
+            self._send_error(429, 'RESOURCE_EXHAUSTED', "Quota exceeded (stand-in throttling)")
+            return
+        if outcome == 'error':
+            time.sleep(latency_s / 2)
+            self._send_error(500, 'INTERNAL', "Internal error (stand-in failure injection)")
+            return
+        
+        text = answer_for(body)
+        prompt_chars = len(json.dumps(body.get('contents', [])))
+        
+        if not streaming:
+            time.sleep(latency_s)
+            self._send_json(200, response_chunk(text, prompt_chars, finish=True))
+            return
+        
+        sse = parse_qs(url.query).get('alt') == ['sse']
+        self._stream(text, prompt_chars, latency_s, sse)
+        with self.behaviour._lock:
+            self.behaviour.stats['streamed'] += 1
+    
+    def _stream(self, text: str, prompt_chars: int, latency_s: float, sse: bool):
+        """Send the answer in word chunks spread over the sampled latency."""
+        words = text.split(" ")
+        size = self.behaviour.args.chunk_words
+        chunks = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+        chunks[-1] = chunks[-1].rstrip()
+        
+        first_token_s = latency_s * self.behaviour.args.first_token_fraction
+        per_chunk_s = (latency_s - first_token_s) / max(1, len(chunks) - 1)
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        
+        time.sleep(first_token_s)
+        for i, chunk_text in enumerate(chunks):
+            if i > 0:
+                time.sleep(per_chunk_s)
+            payload = json.dumps(response_chunk(chunk_text, prompt_chars, finish=i == len(chunks) - 1))
+            if sse:
+                data = f"data: {payload}\r\n\r\n"
+            else:
+                # JSON array streamed element by element
+                data = ("[" if i == 0 else ",\r\n") + payload + ("]" if i == len(chunks) - 1 else "")
+            self._write_chunk(data.encode('utf-8'))
+        self._write_chunk(b"")
+    
+    def _write_chunk(self, data: bytes):
+        """Write one HTTP/1.1 chunk (empty data ends the body)."""
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+    
+    def _send_json(self, status: int, payload: dict):
+        """Send a JSON response."""
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _send_error(self, code: int, status: str, message: str):
+        """Send a Google API style error body."""
+        self._send_json(code, {'error': {'code': code, 'message': message, 'status': status}})
+    
+    def log_message(self, format, *args):
+        """Keep the console quiet unless --verbose."""
+        if self.behaviour.args.verbose:
+            super().log_message(format, *args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line options."""
+    parser = argparse.ArgumentParser(description="Local Gemini API stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-ms', type=float, default=900.0, help="Median total latency")
+    parser.add_argument('--latency-spread', type=float, default=0.4,
+                        help="Lognormal sigma, or +/- fraction of the median for uniform")
+    parser.add_argument('--first-token-fraction', type=float, default=0.4,
+                        help="Share of the latency before the first streamed chunk")
+    parser.add_argument('--chunk-words', type=int, default=4, help="Words per streamed chunk")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--rpm-limit', type=int, default=0, help="Requests-per-minute quota (0 = unlimited)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    return parser
+
+
+def main():
+    """Run the stand-in server until interrupted."""
+    args = build_parser().parse_args()
+    StandInHandler.behaviour = StandInBehaviour(args)
+    
+    server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+    server.daemon_threads = True
+    print(f"[STANDIN] Gemini stand-in listening on http://{args.host}:{args.port}")
+    print(
+        f"[STANDIN] latency {args.latency_dist} median {args.latency_ms:.0f}ms, "
+        f"errors {args.error_rate:.0%}, throttled {args.throttle_rate:.0%}, rpm limit {args.rpm_limit or 'none'}"
+    )
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[STANDIN] Stats: {StandInHandler.behaviour.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Load-test the VLM query path (deadline, fallback, streaming).
+
+Drives LocalNavigationAgent with concurrent synthetic queries and reports
+latency percentiles and how often answers came from Gemini, from the
+local fallback, or as late follow-ups. Pair with the stand-in server for
+air-gapped runs:
+
+    python scripts/gemini_standin_server.py --latency-ms 1500 --error-rate 0.1 &
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python scripts/vlm_load_test.py --requests 50 --concurrency 4
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from config.settings import settings
+from src.cloud_agent.local_agent import LocalNavigationAgent
+
+
+QUERIES = [
+    "What do you see?",
+    "Is it safe to walk forward?",
+    "What colour is the car?",
+    "Describe the scene",
+]
+
+
+def synthetic_cv_data(index: int) -> dict:
+    """A small, varying scene so cache hits don't hide the API path."""
+    objects = [
+        {'class': 'person', 'position': 'center', 'distance_m': 2.0 + (index % 5), 'bbox': (280, 120, 360, 400)},
+        {'class': 'car', 'position': 'left', 'distance_m': 6.0, 'bbox': (20, 200, 200, 330)},
+        {'class': 'chair', 'position': 'right', 'distance_m': 1.2, 'bbox': (500, 300, 600, 460)},
+    ]
+    return {
+        'timestamp': time.time(),
+        'num_objects': len(objects),
+        'objects': objects,
+        'critical_alerts': [],
+        'approaching': [],
+        'safety_status': "CAUTION - Objects nearby"
+    }
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_query(agent: LocalNavigationAgent, index: int, stream: bool) -> dict:
+    """Run one query and time it (time to first sentence when streaming)."""
+    frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    query = f"{QUERIES[index % len(QUERIES)]} ({index})"
+    started = time.time()
+    
+    if stream:
+        response = agent.stream_query(query, frame, synthetic_cv_data(index))
+        sentences = iter(response['text_stream'])
+        first = next(sentences, "")
+        latency = time.time() - started
+        text = " ".join([first, *sentences])
+    else:
+        response = agent.process_query(query, frame, synthetic_cv_data(index))
+        latency = time.time() - started
+        text = response['text_response']
+    
+    return {
+        'latency_s': latency,
+        'used_vlm': response.get('used_vlm', False),
+        'follow_up_pending': response.get('follow_up_pending', False),
+        'chars': len(text)
+    }
+
+
+def main():
+    """Run the load test and print a summary."""
+    parser = argparse.ArgumentParser(description="Load-test the VLM query path")
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--stream', action='store_true', help="Measure time to first streamed sentence")
+    args = parser.parse_args()
+    
+    agent = LocalNavigationAgent()
+    follow_ups = []
+    agent.set_follow_up_handler(follow_ups.append)
+    
+    print(f"Running {args.requests} queries with concurrency {args.concurrency}...")
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda i: run_query(agent, i, args.stream), range(args.requests)))
+    elapsed = time.time() - started
+    
+    # Give late answers their follow-up window before counting them
+    if any(r['follow_up_pending'] for r in results):
+        time.sleep(settings.vlm_deadline_s + settings.vlm_followup_window_s)
+    
+    latencies = [r['latency_s'] * 1000 for r in results]
+    print("\n" + "=" * 60)
+    print("VLM Load Test Results")
+    print("=" * 60)
+    print(f"Throughput:      {len(results) / elapsed:.2f} queries/s")
+    print(f"Latency p50:     {percentile(latencies, 50):.0f}ms")
+    print(f"Latency p95:     {percentile(latencies, 95):.0f}ms")
+    print(f"Latency p99:     {percentile(latencies, 99):.0f}ms")
+    print(f"Latency max:     {max(latencies):.0f}ms")
+    print(f"Gemini answers:  {sum(r['used_vlm'] for r in results)}/{len(results)}")
+    print(f"Local fallbacks: {sum(not r['used_vlm'] for r in results)}/{len(results)}")
+    print(f"Follow-ups:      {len(follow_ups)} delivered, {sum(r['follow_up_pending'] for r in results)} pending")
+    print(f"Cache:           {agent.gemini_tool.get_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
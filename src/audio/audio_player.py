@@ -0,0 +1,124 @@
+"""
+In-memory audio playback for synthesized speech.
+
+Plays WAV/MP3 bytes without writing files where possible:
+- miniaudio (optional): decodes in memory and streams to the output device,
+  and playback can be stopped mid-utterance
+- winsound: WAV bytes in memory on Windows
+- playsound: fallback via a temporary file
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+class AudioPlayer:
+    """Play encoded audio bytes on the default output device (blocking, stoppable)."""
+    
+    def __init__(self):
+        """Pick the best available playback backend."""
+        self.backend: Optional[str] = None
+        self._stop = threading.Event()
+        self._miniaudio = None
+        
+        try:
+            import miniaudio
+            self._miniaudio = miniaudio
+            self.backend = 'miniaudio'
+        except ImportError:
+            if sys.platform == 'win32':
+                self.backend = 'winsound'
+            else:
+                try:
+                    import playsound  # noqa: F401
+                    self.backend = 'playsound'
+                except ImportError:
+                    pass
+        
+        if self.backend:
+            print(f"[AUDIO] Playback via {self.backend}")
+        else:
+            print("[AUDIO] Warning: No audio playback backend. Install miniaudio or playsound.")
+    
+    def is_available(self) -> bool:
+        """Check if audio can be played."""
+        return self.backend is not None
+    
+    def play(self, data: bytes, fmt: str = 'wav'):
+        """
+        Play encoded audio and return when it finishes (or is stopped).
+        
+        Args:
+            data: Encoded audio (WAV or MP3 bytes)
+            fmt: 'wav' or 'mp3'
+        """
+        if not data or self.backend is None:
+            return
+        
+        self._stop.clear()
+        try:
+            if self.backend == 'miniaudio':
+                self._play_miniaudio(data)
+            elif self.backend == 'winsound' and fmt == 'wav':
+                import winsound
+                winsound.PlaySound(data, winsound.SND_MEMORY)
+            else:
+                self._play_file(data, fmt)
+        except Exception as e:
+            print(f"[AUDIO] Playback error: {e}")
+    
+    def stop(self):
+        """Cut off the current playback (miniaudio and winsound only)."""
+        self._stop.set()
+        if self.backend == 'winsound':
+            import winsound
+            winsound.PlaySound(None, 0)
+    
+    def _play_miniaudio(self, data: bytes):
+        """Decode in memory and stream to the device in small chunks."""
+        miniaudio = self._miniaudio
+        decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16)
+        samples = decoded.samples
+        channels = decoded.nchannels
+        finished = threading.Event()
+        
+        def stream():
+            position = 0
+            frames = yield b""
+            while position < len(samples) and not self._stop.is_set():
+                end = position + frames * channels
+                frames = yield samples[position:end]
+                position = end
+            finished.set()
+        
+        device = miniaudio.PlaybackDevice(
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=channels,
+            sample_rate=decoded.sample_rate
+        )
+        generator = stream()
+        next(generator)
+        try:
+            device.start(generator)
+            # Bounded wait in case the device stops pulling samples
+            finished.wait(timeout=decoded.duration + 2.0)
+            if not self._stop.is_set():
+                # Let the device drain its last buffer
+                time.sleep(0.05)
+        finally:
+            device.close()
+    
+    @staticmethod
+    def _play_file(data: bytes, fmt: str):
+        """Fallback: play through playsound from a temporary file."""
+        from playsound import playsound
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}") as fp:
+            fp.write(data)
+            temp_file = fp.name
+        try:
+            playsound(temp_file)
+        finally:
+            os.remove(temp_file)
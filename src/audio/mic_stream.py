@@ -0,0 +1,267 @@
+"""
+Always-open microphone capture with voice-activity endpointing.
+
+The input stream is opened once at startup and read on a background
+thread into a ring buffer of short frames. Every frame is classified as
+speech or not, either by webrtcvad (optional) or by an energy detector
+whose noise floor adapts continuously, so no blocking calibration is
+needed. A command starts after a few voiced frames and ends after a run
+of silent ones. The frames just before the start (pre-roll) are included,
+so the first syllable isn't clipped.
+
+While the app itself is speaking (and briefly after), frames are marked
+as muted: they never start an utterance, count as silence inside one and
+are left out of the pre-roll, so spoken prompts aren't picked up as
+commands.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterator, Optional
+import numpy as np
+from config.settings import settings
+
+
+# Consecutive voiced frames that start an utterance
+START_FRAMES = 3
+
+# Energy VAD: speech is this many times louder than the noise floor
+ENERGY_RATIO = 3.0
+MIN_SPEECH_RMS = 100.0
+
+# Noise floor smoothing per frame: fast between utterances, slow during
+# "speech" so a lasting rise in background noise is eventually absorbed
+NOISE_ADAPT = 0.05
+NOISE_ADAPT_SPEECH = 0.005
+
+# Frames stay muted this long after playback ends (output latency, room echo)
+ECHO_TAIL_S = 0.3
+
+
+class MicStream:
+    """Persistent 16-bit mono capture stream with VAD-based utterance segmentation."""
+    
+    def __init__(
+        self,
+        sample_rate: int = None,
+        frame_ms: int = None,
+        is_muted: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Open the input device and start capturing.
+        
+        Args:
+            sample_rate: Capture rate in Hz (webrtcvad supports 8/16/32/48 kHz)
+            frame_ms: Frame length (10, 20 or 30 ms)
+            is_muted: Returns True while the app is speaking (e.g. TTSEngine.is_speaking)
+        """
+        self.sample_rate = sample_rate or settings.mic_sample_rate
+        self.frame_ms = frame_ms or settings.mic_frame_ms
+        self.frame_samples = self.sample_rate * self.frame_ms // 1000
+        self.available = False
+        
+        # Ring buffer of (sequence, pcm_bytes, is_speech); is_speech is None for muted frames
+        ring_frames = int(settings.mic_ring_seconds * 1000 / self.frame_ms)
+        self._ring: deque = deque(maxlen=ring_frames)
+        self._next_seq = 0
+        self._new_frame = threading.Condition()
+        self._running = False
+        self._thread = None
+        
+        self._vad = None
+        self._noise_rms = None
+        self._is_muted = is_muted
+        self._muted_until = 0.0
+        
+        self._audio = None
+        self._stream = None
+        self.read_errors = 0
+        
+        try:
+            import webrtcvad
+            self._vad = webrtcvad.Vad(settings.mic_vad_aggressiveness)
+        except ImportError:
+            print("[AUDIO] webrtcvad not installed - using energy voice detection")
+        
+        try:
+            import pyaudio
+            self._audio = pyaudio.PyAudio()
+            started = time.time()
+            self._stream = self._audio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                input=True,
+                frames_per_buffer=self.frame_samples
+            )
+            self.available = True
+            print(
+                f"[AUDIO] Microphone stream open ({self.sample_rate} Hz, {self.frame_ms} ms frames, "
+                f"{'webrtcvad' if self._vad else 'energy'} VAD) in {(time.time() - started) * 1000:.0f}ms"
+            )
+        except ImportError:
+            print("[AUDIO] Missing package: pyaudio")
+        except Exception as e:
+            print(f"[AUDIO] Could not open microphone stream: {e}")
+            self.close()
+            return
+        
+        if self.available:
+            self._running = True
+            self._thread = threading.Thread(target=self._capture, name="mic-capture", daemon=True)
+            self._thread.start()
+    
+    def listen(self, timeout: float = 5.0, phrase_time_limit: float = None) -> Iterator[bytes]:
+        """
+        Yield the PCM frames of the next utterance as they are captured.
+        
+        Starts with the pre-roll frames and ends after mic_end_silence_ms
+        of silence, or at phrase_time_limit (mic_max_utterance_s if not
+        given) measured by the clock, so a device that stops delivering
+        frames can't hold the caller.
+        
+        Args:
+            timeout: Max seconds to wait for speech to start
+            phrase_time_limit: Max seconds of speech
+        
+        Yields:
+            16-bit mono PCM frames
+        
+        Raises:
+            TimeoutError: If no speech starts within the timeout
+            OSError: If the device stops delivering audio (read errors)
+        """
+        start_seq = self._wait_for_speech(timeout)
+        
+        limit_s = phrase_time_limit or settings.mic_max_utterance_s
+        deadline = time.time() + limit_s
+        end_frames = max(1, settings.mic_end_silence_ms // self.frame_ms)
+        max_frames = int(limit_s * 1000 / self.frame_ms)
+        pre_roll = settings.mic_pre_roll_ms // self.frame_ms
+        seq = start_seq - START_FRAMES - pre_roll
+        silent = 0
+        spoken = 0
+        read_errors = self.read_errors
+        
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                print(f"[AUDIO] Utterance cut off after {limit_s:.1f}s")
+                return
+            frames = self._frames_from(seq, timeout=min(1.0, remaining))
+            if frames is None:
+                return
+            if not frames and self.read_errors > read_errors:
+                raise OSError(f"Microphone stopped delivering audio ({self.read_errors} read errors)")
+            for frame_seq, pcm, is_speech in frames:
+                seq = frame_seq + 1
+                if frame_seq < start_seq:
+                    # Pre-roll (and the voiced frames that started the utterance)
+                    if is_speech is not None:
+                        yield pcm
+                    continue
+                if is_speech is not None:
+                    yield pcm
+                spoken += 1
+                silent = 0 if is_speech else silent + 1
+                if silent >= end_frames or spoken >= max_frames:
+                    return
+    
+    def _wait_for_speech(self, timeout: float) -> int:
+        """Sequence number of the first frame after START_FRAMES voiced frames."""
+        deadline = time.time() + timeout
+        with self._new_frame:
+            seq = self._next_seq
+        voiced = 0
+        read_errors = self.read_errors
+        
+        while time.time() < deadline:
+            frames = self._frames_from(seq, timeout=deadline - time.time())
+            if frames is None:
+                break
+            if not frames and self.read_errors > read_errors:
+                raise OSError(f"Microphone stopped delivering audio ({self.read_errors} read errors)")
+            for frame_seq, _, is_speech in frames:
+                seq = frame_seq + 1
+                voiced = voiced + 1 if is_speech else 0
+                if voiced >= START_FRAMES:
+                    return seq
+        raise TimeoutError("No speech detected")
+    
+    def _frames_from(self, seq: int, timeout: float = 1.0) -> Optional[list]:
+        """Frames with sequence >= seq, waiting for new ones (None if capture stopped)."""
+        with self._new_frame:
+            if self._next_seq <= seq and self._running:
+                self._new_frame.wait(timeout=max(0.0, timeout))
+            if not self._running:
+                return None
+            oldest = self._next_seq - len(self._ring)
+            return list(self._ring)[max(0, seq - oldest):]
+    
+    def _capture(self):
+        """Read frames from the device, classify them and append to the ring."""
+        while self._running:
+            try:
+                pcm = self._stream.read(self.frame_samples, exception_on_overflow=False)
+            except Exception as e:
+                print(f"[AUDIO] Microphone read error: {e}")
+                self.read_errors += 1
+                time.sleep(self.frame_ms / 1000)
+                continue
+            
+            is_speech = None if self._muted() else self._is_speech(pcm)
+            with self._new_frame:
+                self._ring.append((self._next_seq, pcm, is_speech))
+                self._next_seq += 1
+                self._new_frame.notify_all()
+    
+    def _muted(self) -> bool:
+        """True while the app is speaking, plus ECHO_TAIL_S afterwards."""
+        if self._is_muted is None:
+            return False
+        now = time.time()
+        try:
+            if self._is_muted():
+                self._muted_until = now + ECHO_TAIL_S
+                return True
+        except Exception:
+            pass
+        return now < self._muted_until
+    
+    def _is_speech(self, pcm: bytes) -> bool:
+        """Classify one frame (webrtcvad, or energy over an adaptive noise floor)."""
+        if self._vad is not None:
+            try:
+                return self._vad.is_speech(pcm, self.sample_rate)
+            except Exception:
+                pass
+        
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+        if self._noise_rms is None:
+            self._noise_rms = rms
+        
+        is_speech = rms > max(self._noise_rms * ENERGY_RATIO, MIN_SPEECH_RMS)
+        # Track the room's noise level (slowly while it sounds like speech)
+        rate = NOISE_ADAPT_SPEECH if is_speech else NOISE_ADAPT
+        self._noise_rms = (1.0 - rate) * self._noise_rms + rate * rms
+        return is_speech
+    
+    def close(self):
+        """Stop capturing and release the device."""
+        self._running = False
+        with self._new_frame:
+            self._new_frame.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+        self.available = False
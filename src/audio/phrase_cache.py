@@ -0,0 +1,166 @@
+"""
+Cache of synthesized speech audio.
+
+Audio is keyed by a hash of the text plus everything that changes the
+sound (engine, voice, rate, volume), kept in an in-memory LRU and
+mirrored to disk so common phrases survive restarts and are played
+without synthesizing again. The directory is bounded too: the least
+recently used files are removed past tts_cache_max_files.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from config.settings import settings
+
+
+class PhraseCache:
+    """Content-hashed audio cache: in-memory LRU backed by a directory."""
+    
+    def __init__(self, cache_dir: str = None, max_items: int = None, max_files: int = None):
+        """
+        Initialize cache.
+        
+        Args:
+            cache_dir: Directory for cached audio files ("" = memory only)
+            max_items: Clips kept in memory
+            max_files: Clips kept on disk
+        """
+        self.cache_dir = settings.tts_cache_dir if cache_dir is None else cache_dir
+        self.max_items = max_items or settings.tts_cache_memory_items
+        self.max_files = max_files or settings.tts_cache_max_files
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"[TTS] Could not create phrase cache dir {self.cache_dir}: {e}")
+                self.cache_dir = ""
+    
+    @staticmethod
+    def make_key(text: str, voice_id: str) -> str:
+        """
+        Hash a phrase with the voice settings that shape its audio.
+        
+        Args:
+            text: Phrase text
+            voice_id: Engine and voice identifier (e.g. "pyttsx3:zira:150:0.9")
+        
+        Returns:
+            Hex digest
+        """
+        return hashlib.sha1(f"{voice_id}\n{text.strip()}".encode('utf-8')).hexdigest()
+    
+    def path_for(self, key: str, fmt: str) -> Optional[str]:
+        """On-disk location for a clip (None when memory only)."""
+        return os.path.join(self.cache_dir, f"{key}.{fmt}") if self.cache_dir else None
+    
+    def get(self, key: str, fmt: str) -> Optional[bytes]:
+        """
+        Get cached audio (memory first, then disk).
+        
+        Args:
+            key: Key from make_key
+            fmt: Audio format / file extension ('wav', 'mp3')
+        
+        Returns:
+            Encoded audio or None
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+        
+        path = self.path_for(key, fmt)
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data:
+                self._remember(key, data)
+                self.disk_hits += 1
+                self._touch(path)
+                return data
+        
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, fmt: str, data: bytes, write_disk: bool = True):
+        """
+        Store audio in memory and (optionally) on disk.
+        
+        Args:
+            key: Key from make_key
+            fmt: Audio format / file extension
+            data: Encoded audio
+            write_disk: Also write the file (False if the synthesizer already wrote it)
+        """
+        if not data:
+            return
+        self._remember(key, data)
+        
+        path = self.path_for(key, fmt)
+        if write_disk and path:
+            try:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[TTS] Could not write phrase cache file: {e}")
+        if path and os.path.exists(path):
+            self._prune_disk()
+    
+    @staticmethod
+    def _touch(path: str):
+        """Mark a file as recently used (disk eviction goes by mtime)."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def _prune_disk(self):
+        """Remove the least recently used files beyond max_files."""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.endswith('.tmp')]
+        except OSError:
+            return
+        if len(entries) <= self.max_files:
+            return
+        
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    
+    def _remember(self, key: str, data: bytes):
+        """Insert into the memory LRU."""
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+    
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters."""
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            'memory_items': len(self._memory),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / total if total else 0.0
+        }
@@ -0,0 +1,201 @@
+"""
+Speech recognition backends.
+
+A backend turns a stream of 16-bit mono PCM chunks into text:
+- GoogleBackend buffers the phrase and sends it to the Google Web Speech
+  API once it ends (needs network)
+- VoskBackend decodes locally on the CPU while the user is still
+  speaking, reports partial hypotheses, and has the final text ready
+  within a few hundred milliseconds of the end of speech
+
+The backend is picked by the speech_backend setting.
+"""
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Optional
+from config.settings import settings
+
+
+# Bytes per sample for 16-bit PCM
+SAMPLE_WIDTH = 2
+
+
+class RecognizerBackend(ABC):
+    """Speech-to-text over a stream of PCM chunks."""
+    
+    # Preferred capture rate (None = device default)
+    sample_rate: Optional[int] = None
+    
+    def __init__(self):
+        """Initialize backend."""
+        self.available = False
+        self.utterances = 0
+        self.total_finalize_ms = 0.0
+    
+    @abstractmethod
+    def transcribe(
+        self,
+        chunks: Iterable[bytes],
+        sample_rate: int,
+        on_partial: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """
+        Recognize one utterance.
+        
+        Args:
+            chunks: 16-bit mono PCM chunks, consumed as they are recorded
+            sample_rate: Capture rate in Hz
+            on_partial: Called with partial hypotheses (streaming backends only)
+        
+        Returns:
+            Recognized text or None
+        """
+        pass
+    
+    def get_name(self) -> str:
+        """Get backend identifier."""
+        return self.__class__.__name__
+    
+    def get_stats(self) -> dict:
+        """Get finalization latency (end of audio to text)."""
+        return {
+            'backend': self.get_name(),
+            'utterances': self.utterances,
+            'avg_finalize_ms': round(self.total_finalize_ms / self.utterances, 1) if self.utterances else 0.0
+        }
+    
+    def _record_finalize(self, started: float):
+        """Track time from the last chunk to the final text."""
+        self.utterances += 1
+        self.total_finalize_ms += (time.time() - started) * 1000
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API via SpeechRecognition (online, whole phrase)."""
+    
+    def __init__(self):
+        """Initialize backend."""
+        super().__init__()
+        try:
+            import speech_recognition as sr
+            self._sr = sr
+            self._recognizer = sr.Recognizer()
+            self.available = True
+        except ImportError as e:
+            print(f"[AUDIO] Missing package: {e}")
+    
+    def transcribe(
+        self,
+        chunks: Iterable[bytes],
+        sample_rate: int,
+        on_partial: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """Buffer the phrase, then send it in one request."""
+        audio = self._sr.AudioData(b"".join(chunks), sample_rate, SAMPLE_WIDTH)
+        started = time.time()
+        print("[AUDIO] Sending to Google Speech Recognition API...")
+        try:
+            return self._recognizer.recognize_google(audio)
+        except self._sr.UnknownValueError:
+            print("[AUDIO] Could not understand audio")
+            return None
+        except self._sr.RequestError as e:
+            print(f"[AUDIO] Recognition service error: {e}")
+            return None
+        finally:
+            self._record_finalize(started)
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline streaming recognition with Vosk (Kaldi) on the CPU."""
+    
+    sample_rate = 16000
+    
+    def __init__(self, model_path: str = None):
+        """
+        Load the Vosk model (at startup, so the first command isn't delayed).
+        
+        The model must already be on disk: Vosk can download one by
+        language, but an offline backend must not reach the network.
+        
+        Args:
+            model_path: Unpacked Vosk model directory (defaults to vosk_model_path)
+        """
+        super().__init__()
+        self.model = None
+        model_path = model_path or settings.vosk_model_path
+        
+        if not model_path or not os.path.isdir(model_path):
+            print(
+                f"[AUDIO] Vosk model directory not found ({model_path or 'vosk_model_path not set'}). "
+                "Download a model from https://alphacephei.com/vosk/models, unpack it and set vosk_model_path."
+            )
+            return
+        
+        try:
+            import vosk
+            vosk.SetLogLevel(-1)
+            started = time.time()
+            self.model = vosk.Model(model_path)
+            self._vosk = vosk
+            self.available = True
+            print(f"[AUDIO] Vosk model loaded in {time.time() - started:.1f}s")
+        except ImportError:
+            print("[AUDIO] Missing package: vosk (pip install vosk)")
+        except Exception as e:
+            print(f"[AUDIO] Could not load Vosk model: {e}")
+    
+    def transcribe(
+        self,
+        chunks: Iterable[bytes],
+        sample_rate: int,
+        on_partial: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """Decode chunks as they arrive; only the last bit is left at the end."""
+        recognizer = self._vosk.KaldiRecognizer(self.model, sample_rate)
+        segments = []
+        last_partial = ""
+        
+        for chunk in chunks:
+            if recognizer.AcceptWaveform(chunk):
+                # Vosk closed a segment at an internal pause
+                text = json.loads(recognizer.Result()).get('text', "")
+                if text:
+                    segments.append(text)
+            elif on_partial is not None:
+                partial = json.loads(recognizer.PartialResult()).get('partial', "")
+                if partial and partial != last_partial:
+                    last_partial = partial
+                    on_partial(" ".join([*segments, partial]))
+        
+        started = time.time()
+        final = json.loads(recognizer.FinalResult()).get('text', "")
+        self._record_finalize(started)
+        if final:
+            segments.append(final)
+        
+        text = " ".join(segments).strip()
+        if not text:
+            print("[AUDIO] Could not understand audio")
+        return text or None
+
+
+def create_backend(name: str = None) -> RecognizerBackend:
+    """
+    Create the configured recognizer backend (falls back to Google).
+    
+    Args:
+        name: 'google' or 'vosk' (defaults to speech_backend)
+    
+    Returns:
+        Recognizer backend
+    """
+    name = (name or settings.speech_backend).lower()
+    if name == 'vosk':
+        backend = VoskBackend()
+        if backend.available:
+            return backend
+        print("[AUDIO] Vosk unavailable - using Google Speech Recognition")
+    return GoogleBackend()
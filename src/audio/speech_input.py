@@ -1,20 +1,48 @@
 """
 Speech recognition for voice input.
 """
-from typing import Optional
+from typing import Callable, Optional
 import threading
+import time
+import weakref
+from config.settings import settings
+from src.audio.mic_stream import MicStream
+from src.audio.recognizer_backends import create_backend
 
 
 class SpeechRecognizer:
     """Speech recognition for user voice input."""
     
-    def __init__(self):
-        """Initialize speech recognizer."""
+    def __init__(self, is_speaking: Optional[Callable[[], bool]] = None):
+        """
+        Initialize speech recognizer.
+        
+        Args:
+            is_speaking: Returns True while the app's own speech is playing
+                (e.g. TTSEngine.is_speaking), so prompts aren't heard as commands
+        """
         self.recognizer = None
         self.microphone = None
+        self.mic_stream = None
+        self.is_speaking = is_speaking
         self.is_listening = False
         self.available = False
         
+        # Google (online) or Vosk (offline, decodes while the user speaks)
+        self.backend = create_backend()
+        
+        if settings.mic_persistent_stream:
+            # Opened once and kept running: no device open or calibration per command
+            mic_stream = MicStream(sample_rate=self.backend.sample_rate, is_muted=is_speaking)
+            if mic_stream.available:
+                self.mic_stream = mic_stream
+                # Release the device when the recognizer goes away (e.g. its session ends)
+                self._finalizer = weakref.finalize(self, mic_stream.close)
+                self.available = self.backend.available
+                print(f"[AUDIO] ✓ Speech Recognition initialized (persistent stream, {self.backend.get_name()})")
+                return
+            print("[AUDIO] Falling back to per-command microphone capture")
+        
         try:
             import speech_recognition as sr
             self.recognizer = sr.Recognizer()
@@ -26,7 +54,7 @@ class SpeechRecognizer:
             self.recognizer.phrase_threshold = 0.2  # Minimum seconds of speech
             self.recognizer.non_speaking_duration = 0.4  # Seconds of silence before considering complete
             
-            self.microphone = sr.Microphone()
+            self.microphone = sr.Microphone(sample_rate=self.backend.sample_rate)
             
             # ULTRA-FAST calibration (or skip it entirely for speed)
             print("[AUDIO] Calibrating microphone... (fast mode)")
@@ -36,8 +64,8 @@ class SpeechRecognizer:
             except Exception as e:
                 print(f"[AUDIO] Skipping calibration: {e}")
             
-            self.available = True
-            print("[AUDIO] ✓ Speech Recognition initialized (FAST MODE)")
+            self.available = self.backend.available
+            print(f"[AUDIO] ✓ Speech Recognition initialized (FAST MODE, {self.backend.get_name()})")
             print(f"[AUDIO] Energy threshold: {self.recognizer.energy_threshold}")
             print(f"[AUDIO] Pause threshold: {self.recognizer.pause_threshold}s")
             
@@ -48,12 +76,14 @@ class SpeechRecognizer:
             print(f"[AUDIO] Could not initialize speech recognition: {e}")
             print("[AUDIO] Voice input will be disabled")
     
-    def listen_once(self, timeout: int = 5) -> Optional[str]:
+    def listen_once(self, timeout: int = 5, on_partial: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
         Listen for single voice command.
         
         Args:
             timeout: Max seconds to wait for speech
+            on_partial: Called with partial hypotheses while the user speaks
+                (streaming backends only)
         
         Returns:
             Recognized text or None
@@ -62,6 +92,12 @@ class SpeechRecognizer:
             print("[AUDIO] Speech recognition not available")
             return None
         
+        if self.mic_stream is not None:
+            return self._listen_stream(timeout, on_partial)
+        
+        # The device is opened per command: let the spoken prompt finish first
+        self._wait_for_prompt()
+        
         try:
             import speech_recognition as sr
             
@@ -74,12 +110,19 @@ class SpeechRecognizer:
                 print("[AUDIO] ⚡⚡⚡ SPEAK NOW - LOUD and CLEAR! ⚡⚡⚡")
                 print("[AUDIO]")
                 
-                # Much shorter timeout and phrase limit for faster response
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=3)
+                # Much shorter timeout and phrase limit for faster response.
+                # Chunks reach the backend while recording, so a streaming
+                # backend has decoded most of the phrase when it ends.
+                audio_stream = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=3, stream=True)
+                text = self.backend.transcribe(
+                    (chunk.get_raw_data() for chunk in audio_stream),
+                    source.SAMPLE_RATE,
+                    on_partial
+                )
                 print("[AUDIO] ✓✓✓ Audio captured successfully! ✓✓✓")
             
-            print("[AUDIO] Sending to Google Speech Recognition API...")
-            text = self.recognizer.recognize_google(audio)
+            if not text:
+                return None
             print("[AUDIO] ========================================")
             print(f"[AUDIO] ✓ SUCCESS! Recognized text: '{text}'")
             print("[AUDIO] ========================================")
@@ -88,15 +131,31 @@ class SpeechRecognizer:
         except sr.WaitTimeoutError:
             print("[AUDIO] Listening timeout")
             return None
-        except sr.UnknownValueError:
-            print("[AUDIO] Could not understand audio")
+        except Exception as e:
+            print(f"[AUDIO] Error in speech recognition: {e}")
             return None
-        except sr.RequestError as e:
-            print(f"[AUDIO] Recognition service error: {e}")
+    
+    def _listen_stream(self, timeout: int, on_partial: Optional[Callable[[str], None]]) -> Optional[str]:
+        """Transcribe the next utterance from the persistent stream (VAD endpointing)."""
+        print(f"[AUDIO] Listening (timeout: {timeout}s | phrase limit: 3s)...")
+        try:
+            # Frames reach the backend as they are captured; the utterance
+            # ends mic_end_silence_ms after the last voiced frame
+            text = self.backend.transcribe(
+                self.mic_stream.listen(timeout=timeout, phrase_time_limit=3),
+                self.mic_stream.sample_rate,
+                on_partial
+            )
+        except TimeoutError:
+            print("[AUDIO] Listening timeout")
             return None
         except Exception as e:
             print(f"[AUDIO] Error in speech recognition: {e}")
             return None
+        
+        if text:
+            print(f"[AUDIO] ✓ SUCCESS! Recognized text: '{text}'")
+        return text or None
     
     def listen_continuous(self, callback):
         """
@@ -110,15 +169,28 @@ class SpeechRecognizer:
             return
         
         def background_listen():
-            import speech_recognition as sr
-            
             self.is_listening = True
+            if self.mic_stream is not None:
+                while self.is_listening:
+                    try:
+                        text = self.backend.transcribe(
+                            self.mic_stream.listen(timeout=1), self.mic_stream.sample_rate
+                        )
+                        if text:
+                            callback(text)
+                    except TimeoutError:
+                        pass
+                    except Exception as e:
+                        print(f"[AUDIO] Error in background listening: {e}")
+                return
+            
             with self.microphone as source:
                 while self.is_listening:
                     try:
                         audio = self.recognizer.listen(source, timeout=1)
-                        text = self.recognizer.recognize_google(audio)
-                        callback(text)
+                        text = self.backend.transcribe([audio.get_raw_data()], audio.sample_rate)
+                        if text:
+                            callback(text)
                     except:
                         pass
         
@@ -130,6 +202,20 @@ class SpeechRecognizer:
         """Stop continuous listening."""
         self.is_listening = False
     
+    def _wait_for_prompt(self, max_wait_s: float = 3.0):
+        """Block (bounded) while the app's own speech is playing."""
+        if self.is_speaking is None:
+            return
+        deadline = time.time() + max_wait_s
+        while self.is_speaking() and time.time() < deadline:
+            time.sleep(0.05)
+    
+    def close(self):
+        """Stop listening and release the microphone."""
+        self.is_listening = False
+        if self.mic_stream is not None:
+            self._finalizer()
+    
     def is_available(self) -> bool:
         """Check if speech recognition is available."""
         return self.available
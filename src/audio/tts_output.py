@@ -1,13 +1,49 @@
 """
 Text-to-speech output for audio feedback.
+
+All speech goes through one long-lived worker thread fed by a priority
+queue, so utterances never overlap on the (non-thread-safe) engine:
+- safety alerts preempt anything less urgent that is being spoken
+- queued items that waited longer than their priority's max age are dropped
+- a message identical to one already queued (or, for alerts and status
+  prompts, one just spoken) is coalesced
+
+pyttsx3 is not thread-safe, so preemption never touches the engine from
+another thread: the preempted item is flagged and the worker stops the
+engine from its own started-word callback.
+
+Offline, the fixed prompts (tts_preload_phrases) are synthesized to WAV
+once, one per idle gap in the queue, and played from the phrase cache
+afterwards; any other text, such as alerts with distances in them, is
+spoken directly. Online, gTTS synthesizes into
+memory on a small executor as soon as an item is queued, so the next
+sentence is ready while the current one plays; results are cached by
+text hash. Alerts get their own executor so they never wait behind the
+sentences of a long answer, and synthesis of dropped items is cancelled.
 """
+import itertools
+import os
+import queue
+import tempfile
 import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Iterable, Iterator, Optional
 from config.settings import settings
+from src.audio.audio_player import AudioPlayer
+from src.audio.phrase_cache import PhraseCache
 
 
 class TTSEngine:
     """Text-to-speech engine for audio output."""
     
+    # Priorities (lower is spoken first)
+    PRIORITY_ALERT = 0
+    PRIORITY_RESPONSE = 1
+    PRIORITY_STATUS = 2
+    
     def __init__(self, use_online: bool = None):
         """
         Initialize TTS engine.
@@ -19,6 +55,32 @@ class TTSEngine:
         self.engine = None
         self.available = False
         
+        # Speech queue: (priority, sequence, item), served by one worker thread
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._pending: Dict[str, Dict] = {}
+        self._last_spoken: Dict[str, float] = {}
+        self._current: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._worker = None
+        
+        # Metrics
+        self.spoken = 0
+        self.dropped_stale = 0
+        self.coalesced = 0
+        self.preempted = 0
+        self._latencies_ms = deque(maxlen=100)
+        
+        # Pre-synthesized audio for prompts and alerts
+        self.player = None
+        self.phrase_cache = PhraseCache()
+        self._voice_id = ""
+        self._phrases = set(settings.tts_preload_phrases)
+        self._preload_todo = []
+        self._engine_stopped = False
+        self._synth_pool = None
+        self._alert_pool = None
+        
         if not self.use_online:
             # Try to initialize offline pyttsx3
             try:
@@ -26,6 +88,7 @@ class TTSEngine:
                 self.engine = pyttsx3.init()
                 self.engine.setProperty('rate', settings.tts_rate)
                 self.engine.setProperty('volume', settings.tts_volume)
+                self.engine.connect('started-word', self._on_word)
                 
                 # Use female voice if available
                 voices = self.engine.getProperty('voices')
@@ -37,6 +100,16 @@ class TTSEngine:
                 self.available = True
                 print("[TTS] Engine initialized (offline mode)")
                 
+                player = AudioPlayer()
+                if player.is_available():
+                    self.player = player
+                    self._voice_id = (
+                        f"pyttsx3:{self.engine.getProperty('voice')}:{settings.tts_rate}:{settings.tts_volume}"
+                    )
+                    # The worker synthesizes the fixed prompts while nothing is queued
+                    self._preload_todo = sorted(self._phrases)
+                    self._ensure_worker()
+            
             except Exception as e:
                 print(f"[TTS] Warning: Could not initialize pyttsx3: {e}")
                 print("[TTS] TTS will be disabled. Install pyttsx3 for offline TTS.")
@@ -44,82 +117,333 @@ class TTSEngine:
             # Online mode (gTTS)
             try:
                 import gtts
-                self.available = True
-                print("[TTS] Engine initialized (online mode)")
+                self.player = AudioPlayer()
+                self._voice_id = "gtts:en"
+                # Synthesis overlaps playback: the next sentence is fetched while one plays
+                self._synth_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts-synth")
+                self._alert_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-alert-synth")
+                self.available = self.player.is_available()
+                if self.available:
+                    print("[TTS] Engine initialized (online mode)")
+                    self._preload_todo = sorted(self._phrases)
+                    self._ensure_worker()
+                else:
+                    print("[TTS] TTS will be disabled (no audio playback backend).")
             except Exception as e:
                 print(f"[TTS] Warning: Could not import gTTS: {e}")
                 print("[TTS] TTS will be disabled.")
     
-    def speak(self, text: str, blocking: bool = False):
+    def speak(self, text: str, blocking: bool = False, priority: int = None):
         """
-        Speak text aloud.
+        Queue text for speech.
         
         Args:
             text: Text to speak
-            blocking: Wait for speech to finish
+            blocking: Wait until it has been spoken (or dropped)
+            priority: PRIORITY_ALERT, PRIORITY_RESPONSE (default) or PRIORITY_STATUS
         """
         if not text or not self.available:
             return
         
-        print(f"[TTS] Speaking: {text[:50]}...")
+        item = self._enqueue(text, self.PRIORITY_RESPONSE if priority is None else priority)
+        if blocking and item is not None:
+            item['done'].wait()
+    
+    def speak_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Speak streamed sentences as they arrive.
+        
+        Pass-through generator: each chunk is queued for speech the moment
+        it is produced and then yielded back, so the caller can display
+        text while the first sentence is already being spoken.
         
-        try:
-            if self.use_online:
-                self._speak_gtts(text)
+        Args:
+            chunks: Iterable of sentences (e.g. GeminiVLMTool.stream_description)
+        
+        Yields:
+            The same chunks, after they have been queued for speech
+        """
+        for chunk in chunks:
+            if chunk and self.available:
+                # Same priority as answers: FIFO order keeps the sentences in sequence
+                self._enqueue(chunk, self.PRIORITY_RESPONSE)
+            yield chunk
+    
+    def _enqueue(self, text: str, priority: int) -> Optional[Dict]:
+        """Queue one utterance (coalescing duplicates); preempt on alerts."""
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(text)
+            if pending is not None:
+                self.coalesced += 1
+                if priority >= pending['priority']:
+                    return pending
+                # Same text, more urgent: re-queue the pending item at the new priority
+                # (the worker skips the older queue entry once the item is taken)
+                pending['priority'] = priority
+                pending['expires_at'] = now + self._max_age(priority)
+                if 'audio' in pending and pending['audio'].cancel():
+                    # Not started yet: move its synthesis to the alert executor
+                    self._submit_synthesis(pending)
+                item = pending
+            elif priority != self.PRIORITY_RESPONSE and (
+                now - self._last_spoken.get(text, 0.0) < settings.tts_repeat_suppress_s
+            ):
+                self.coalesced += 1
+                return None
             else:
-                if blocking:
-                    self.engine.say(text)
-                    self.engine.runAndWait()
+                item = self._new_item(text, priority, now)
+            current = self._current
+        
+        self._ensure_worker()
+        self._queue.put((priority, next(self._sequence), item))
+        
+        # An alert cuts off less urgent speech (the rest of the queue waits behind it)
+        if current is not None and priority < current['priority']:
+            self.preempted += 1
+            self._cancel_synthesis(current)
+            self._interrupt(current)
+        return item
+    
+    def _new_item(self, text: str, priority: int, now: float) -> Dict:
+        """Create a queue item and register it as pending (caller holds the lock)."""
+        item = {
+            'text': text,
+            'priority': priority,
+            'queued_at': now,
+            'expires_at': now + self._max_age(priority),
+            # Only fixed prompts repeat verbatim; templated text would just fill the cache
+            'cacheable': text in self._phrases,
+            'done': threading.Event()
+        }
+        if self._synth_pool is not None:
+            self._submit_synthesis(item)
+        self._pending[text] = item
+        return item
+    
+    def _submit_synthesis(self, item: Dict):
+        """Start gTTS synthesis for an item (alerts on their own executor)."""
+        pool = self._alert_pool if item['priority'] == self.PRIORITY_ALERT else self._synth_pool
+        item['audio'] = pool.submit(self._gtts_audio, item['text'], item['cacheable'])
+    
+    @staticmethod
+    def _cancel_synthesis(item: Dict):
+        """Cancel an item's synthesis if it hasn't started (no-op offline)."""
+        if 'audio' in item:
+            item['audio'].cancel()
+    
+    @classmethod
+    def _max_age(cls, priority: int) -> float:
+        """Seconds an item may wait in the queue before it is stale."""
+        if priority == cls.PRIORITY_ALERT:
+            return settings.tts_alert_max_age_s
+        if priority == cls.PRIORITY_STATUS:
+            return settings.tts_status_max_age_s
+        return settings.tts_response_max_age_s
+    
+    def _ensure_worker(self):
+        """Start the speech worker thread on first use."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run_worker, name="tts-worker")
+            self._worker.daemon = True
+            self._worker.start()
+    
+    def _run_worker(self):
+        """Speak queued items one at a time, most urgent first."""
+        while True:
+            _, _, item = self._next_entry()
+            now = time.time()
+            with self._lock:
+                if item.get('taken'):
+                    # Older entry of an item that was re-queued at a higher priority
+                    continue
+                item['taken'] = True
+                self._pending.pop(item['text'], None)
+                stale = now > item['expires_at']
+                if not stale:
+                    self._current = item
+            
+            if stale:
+                self._cancel_synthesis(item)
+                self.dropped_stale += 1
+                print(f"[TTS] Dropped stale: {item['text'][:50]}...")
+                item['done'].set()
+                continue
+            
+            self._latencies_ms.append((now - item['queued_at']) * 1000)
+            print(f"[TTS] Speaking: {item['text'][:50]}...")
+            try:
+                if self.use_online:
+                    self._speak_gtts(item)
                 else:
-                    # Run in separate thread to avoid blocking
-                    thread = threading.Thread(target=self._speak_async, args=(text,))
-                    thread.daemon = True
-                    thread.start()
+                    self._speak_pyttsx3(item)
+            finally:
+                with self._lock:
+                    self._current = None
+                    self._last_spoken[item['text']] = time.time()
+                    if len(self._last_spoken) > 256:
+                        self._last_spoken.clear()
+                self.spoken += 1
+                item['done'].set()
+    
+    def _next_entry(self) -> tuple:
+        """Next queue entry; each idle gap meanwhile pre-synthesizes one fixed prompt."""
+        while self._preload_todo:
+            try:
+                return self._queue.get(timeout=settings.tts_preload_idle_s)
+            except queue.Empty:
+                self._preload_next()
+        return self._queue.get()
+    
+    def _interrupt(self, item: Dict):
+        """
+        Cut off an utterance if it is still the one being spoken.
+        
+        Args:
+            item: Queue item to cut off
+        """
+        with self._lock:
+            if self._current is not item:
+                return
+            # The worker's word callback stops pyttsx3
+            item['interrupted'] = True
+        if self.player is not None:
+            self.player.stop()
+    
+    def _on_word(self, name, location, length):
+        """pyttsx3 started-word callback (worker thread): stop the engine once preempted."""
+        current = self._current
+        # Nothing being spoken means a prompt is being pre-synthesized: yield to any queued item
+        preempted = current.get('interrupted', False) if current is not None else not self._queue.empty()
+        if preempted and not self._engine_stopped:
+            self._engine_stopped = True
+            self.engine.stop()
+    
+    def _speak_pyttsx3(self, item: Dict):
+        """Speak using pyttsx3 (offline, worker thread only)."""
+        try:
+            if item['cacheable'] and self.player is not None:
+                audio = self._cached_wav(item['text'])
+                if audio:
+                    self.player.play(audio, 'wav')
+                    return
+                if item.get('interrupted'):
+                    return
+            
+            self._engine_stopped = False
+            self.engine.say(item['text'])
+            self.engine.runAndWait()
         except Exception as e:
-            print(f"Error in TTS: {e}")
+            print(f"Error in offline TTS: {e}")
     
-    def _speak_async(self, text: str):
-        """Speak in async mode (pyttsx3)."""
+    def _cached_wav(self, text: str) -> Optional[bytes]:
+        """WAV audio for a phrase from the cache, synthesizing it on a miss (None if cut off)."""
+        key = PhraseCache.make_key(text, self._voice_id)
+        audio = self.phrase_cache.get(key, 'wav')
+        if audio is not None:
+            return audio
+        
+        path = self.phrase_cache.path_for(key, 'wav')
+        if path is None:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as fp:
+                path = fp.name
+        
+        self._engine_stopped = False
         try:
-            self.engine.say(text)
+            self.engine.save_to_file(text, path)
             self.engine.runAndWait()
+            if not self._engine_stopped:
+                with open(path, 'rb') as f:
+                    audio = f.read()
+        finally:
+            # A cut-off file is truncated: never leave it in the cache
+            if (self._engine_stopped or not self.phrase_cache.cache_dir) and os.path.exists(path):
+                os.remove(path)
+        
+        if self._engine_stopped:
+            return None
+        self.phrase_cache.put(key, 'wav', audio, write_disk=False)
+        return audio
+    
+    def _preload_next(self):
+        """Synthesize the next fixed prompt (worker thread, queue idle)."""
+        phrase = self._preload_todo[-1]
+        if self._synth_pool is not None:
+            # Fetched on the executor, so the worker stays free for alerts
+            self._synth_pool.submit(self._gtts_audio, phrase, True)
+            self._preload_todo.pop()
+            return
+        
+        try:
+            if self._cached_wav(phrase) is None:
+                # Cut off by a queued item; retried in the next idle gap
+                return
         except Exception as e:
-            print(f"Error in async TTS: {e}")
+            print(f"[TTS] Could not pre-synthesize '{phrase}': {e}")
+        self._preload_todo.pop()
+        if not self._preload_todo:
+            print(f"[TTS] {len(self._phrases)} phrases ready")
     
-    def _speak_gtts(self, text: str):
-        """Speak using gTTS (online)."""
+    def _speak_gtts(self, item: Dict):
+        """Play an item's gTTS audio (online; synthesized ahead on the executor)."""
         try:
-            from gtts import gTTS
-            from playsound import playsound
-            import tempfile
-            import os
-            
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-                temp_file = fp.name
-            
-            # Generate speech
-            tts = gTTS(text=text, lang='en', slow=False)
-            tts.save(temp_file)
-            
-            # Play audio
-            playsound(temp_file)
-            
-            # Cleanup
-            os.remove(temp_file)
-            
+            audio = item['audio'].result(timeout=settings.tts_synthesis_timeout_s)
+            self.player.play(audio, 'mp3')
         except Exception as e:
             print(f"Error in gTTS: {e}")
     
+    def _gtts_audio(self, text: str, persist: bool = False) -> bytes:
+        """
+        MP3 audio for a text, from the cache or synthesized in memory.
+        
+        Args:
+            text: Text to synthesize
+            persist: Also keep it in the on-disk cache (fixed prompts)
+        
+        Returns:
+            MP3 bytes
+        """
+        key = PhraseCache.make_key(text, self._voice_id)
+        audio = self.phrase_cache.get(key, 'mp3')
+        if audio is not None:
+            return audio
+        
+        from gtts import gTTS
+        buffer = BytesIO()
+        gTTS(text=text, lang='en', slow=False).write_to_fp(buffer)
+        audio = buffer.getvalue()
+        self.phrase_cache.put(key, 'mp3', audio, write_disk=persist)
+        return audio
+    
     def stop(self):
-        """Stop current speech."""
-        if not self.use_online and self.engine:
-            try:
-                self.engine.stop()
-            except:
-                pass
+        """Stop current speech and drop everything queued."""
+        with self._lock:
+            for item in self._pending.values():
+                item['expires_at'] = 0.0
+                self._cancel_synthesis(item)
+            current = self._current
+        if current is not None:
+            self._interrupt(current)
+    
+    def get_stats(self) -> Dict:
+        """Get queue depth and speech latency counters."""
+        latencies = sorted(self._latencies_ms)
+        return {
+            'queue_depth': self._queue.qsize(),
+            'speaking': self._current is not None,
+            'spoken': self.spoken,
+            'dropped_stale': self.dropped_stale,
+            'coalesced': self.coalesced,
+            'preempted': self.preempted,
+            'latency_ms_p50': round(latencies[len(latencies) // 2], 1) if latencies else 0.0,
+            'latency_ms_p95': round(latencies[int(len(latencies) * 0.95)], 1) if latencies else 0.0,
+            'phrase_cache': self.phrase_cache.get_stats()
+        }
+    
+    def is_speaking(self) -> bool:
+        """Check if speech is playing or waiting in the queue."""
+        return self._current is not None or bool(self._pending)
     
     def is_available(self) -> bool:
         """Check if TTS is available."""
         return self.available
-
@@ -0,0 +1,254 @@
+"""
+Proactive per-frame safety alert engine.
+
+Subscribed to every detection update, independent of voice queries.
+Applies hysteresis to the critical/warning/caution levels, per-object
+cooldowns and per-frame dedup, then emits a few prioritized alert events
+to subscribers (TTS, haptics). Only the nearest objects are considered,
+so per-frame cost is bounded, and the VLM is never involved.
+"""
+import time
+from typing import Callable, Dict, List
+from config.settings import settings
+from src.cloud_agent.context_builder import pluralize
+from src.cloud_agent.tools import NavigationTools
+
+
+# Severity order for alert levels
+LEVEL_SEVERITY = {'safe': 0, 'caution': 1, 'warning': 2, 'critical': 3}
+
+# Distance thresholds in meters (same bands as DistanceEstimator.get_safety_level)
+LEVEL_DISTANCE_M = {'critical': 1.0, 'warning': 1.5, 'caution': 3.0}
+
+# Spoken position phrases
+POSITION_PHRASES = {'left': "on your left", 'center': "ahead", 'right': "on your right"}
+
+
+class SafetyAlertEngine:
+    """Turn per-frame CV output into deduplicated, prioritized alert events."""
+    
+    def __init__(self):
+        """Initialize alert engine state."""
+        self.min_level = settings.alert_min_level
+        self.hysteresis_m = settings.alert_hysteresis_m
+        self.max_objects = settings.alert_max_objects
+        self.max_events = settings.alert_max_events_per_frame
+        self.cooldowns = {
+            'critical': settings.alert_cooldown_critical_s,
+            'warning': settings.alert_cooldown_warning_s,
+            'caution': settings.alert_cooldown_caution_s,
+        }
+        
+        # Per-object state: key -> {'level', 'last_seen', 'last_alert': {level: time}}
+        self.object_states: Dict[str, Dict] = {}
+        self.subscribers: List[Callable[[Dict], None]] = []
+        
+        self.last_event = None
+        self.frames_processed = 0
+        self.events_emitted = 0
+        self._last_prune = 0.0
+    
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """
+        Register a callback for alert events.
+        
+        Callbacks run on the video thread, so they must not block
+        (e.g. TTSEngine.speak with blocking=False).
+        
+        Args:
+            callback: Function called with each alert event dict
+        """
+        self.subscribers.append(callback)
+    
+    def update(self, cv_data: Dict) -> List[Dict]:
+        """
+        Process one frame of structured CV output.
+        
+        Args:
+            cv_data: Structured CV output from the detector
+        
+        Returns:
+            Alert events emitted for this frame (highest priority first)
+        """
+        now = time.time()
+        self.frames_processed += 1
+        
+        # Bounded work: nearest objects plus anything looming fast
+        candidates = cv_data.get('objects', [])[:self.max_objects]
+        seen_keys = {self._object_key(o) for o in candidates}
+        for obj in cv_data.get('approaching', [])[:self.max_objects]:
+            if self._object_key(obj) not in seen_keys:
+                candidates.append(obj)
+        
+        events = []
+        merged = {}
+        for obj in candidates:
+            key = self._object_key(obj)
+            event = self._update_object(key, obj, now)
+            if event is None:
+                continue
+            
+            # Dedup: one event per class/position/level in a frame
+            group = (obj['class'], obj.get('position'), event['level'])
+            if group in merged:
+                merged[group]['count'] += 1
+                continue
+            merged[group] = event
+            events.append(event)
+        
+        path_event = self._update_path_depth(cv_data.get('path_depth'), now)
+        if path_event is not None:
+            events.append(path_event)
+        
+        if now - self._last_prune > 1.0:
+            self._prune(now)
+        
+        events.sort(key=lambda e: (-e['priority'], e['seconds_to_contact']))
+        events = events[:self.max_events]
+        
+        for event in events:
+            event['message'] = self._format_message(event)
+            self._emit(event)
+        
+        return events
+    
+    def _update_object(self, key: str, obj: Dict, now: float):
+        """Update one object's level with hysteresis and decide whether to alert."""
+        distance = obj.get('distance_m', -1)
+        ttc = obj.get('ttc_s')
+        
+        state = self.object_states.get(key)
+        previous = state['level'] if state else 'safe'
+        
+        raw_level = self._classify(distance, ttc)
+        if LEVEL_SEVERITY[raw_level] < LEVEL_SEVERITY[previous]:
+            # Only step down once the object is clearly outside the band
+            sticky_level = self._classify(
+                distance - self.hysteresis_m if distance > 0 else distance,
+                ttc / 1.2 if ttc is not None else None
+            )
+            level = sticky_level if LEVEL_SEVERITY[sticky_level] < LEVEL_SEVERITY[previous] else previous
+            level = level if LEVEL_SEVERITY[level] > LEVEL_SEVERITY[raw_level] else raw_level
+        else:
+            level = raw_level
+        
+        if state is None:
+            state = {'level': level, 'last_seen': now, 'last_alert': {}}
+            self.object_states[key] = state
+        state['level'] = level
+        state['last_seen'] = now
+        
+        if LEVEL_SEVERITY[level] < LEVEL_SEVERITY[self.min_level]:
+            return None
+        
+        # Alert on escalation, or as a reminder once the cooldown has passed
+        escalated = LEVEL_SEVERITY[level] > LEVEL_SEVERITY[previous]
+        last_alert = state['last_alert'].get(level, 0.0)
+        if now - last_alert < self.cooldowns[level]:
+            return None
+        if not escalated and level != 'critical':
+            return None
+        
+        state['last_alert'][level] = now
+        return self._build_event(key, level, obj, now)
+    
+    def _update_path_depth(self, path_depth: Dict, now: float):
+        """Alert on unclassified obstacles in the walking corridor (depth model)."""
+        if not path_depth or not path_depth.get('blocked'):
+            self.object_states.pop('path_depth', None)
+            return None
+        
+        obj = {'class': 'obstacle', 'position': 'center', 'distance_m': -1}
+        state = self.object_states.setdefault(
+            'path_depth', {'level': 'safe', 'last_seen': now, 'last_alert': {}}
+        )
+        escalated = state['level'] != 'warning'
+        state['level'] = 'warning'
+        state['last_seen'] = now
+        
+        if not escalated or now - state['last_alert'].get('warning', 0.0) < self.cooldowns['warning']:
+            return None
+        
+        state['last_alert']['warning'] = now
+        return self._build_event('path_depth', 'warning', obj, now)
+    
+    def _classify(self, distance: float, ttc) -> str:
+        """Map distance and time-to-collision onto an alert level."""
+        if ttc is not None and ttc < settings.ttc_critical_s:
+            return 'critical'
+        
+        level = 'safe'
+        for name in ('critical', 'warning', 'caution'):
+            if 0 < distance < LEVEL_DISTANCE_M[name]:
+                level = name
+                break
+        
+        if ttc is not None and ttc < settings.ttc_warning_s and LEVEL_SEVERITY[level] < LEVEL_SEVERITY['warning']:
+            level = 'warning'
+        
+        return level
+    
+    def _build_event(self, key: str, level: str, obj: Dict, now: float) -> Dict:
+        """Create an alert event with its haptic pattern."""
+        return {
+            'key': key,
+            'level': level,
+            'priority': LEVEL_SEVERITY[level],
+            'class': obj['class'],
+            'position': obj.get('position', 'center'),
+            'distance_m': obj.get('distance_m', -1),
+            'ttc_s': obj.get('ttc_s'),
+            'seconds_to_contact': NavigationTools.seconds_to_contact(obj),
+            'count': 1,
+            'haptic': NavigationTools.haptic_feedback_tool(
+                obj.get('distance_m', -1),
+                obj.get('position', 'center'),
+                obj.get('ttc_s')
+            ),
+            'timestamp': now
+        }
+    
+    def _format_message(self, event: Dict) -> str:
+        """Short spoken alert text."""
+        where = POSITION_PHRASES.get(event['position'], "ahead")
+        name = pluralize(event['class'], event['count'])
+        prefix = "Stop!" if event['level'] == 'critical' else "Careful,"
+        
+        if event['ttc_s'] is not None and event['ttc_s'] < settings.ttc_warning_s:
+            return f"{prefix} {name} approaching {where}."
+        if event['distance_m'] > 0:
+            return f"{prefix} {name} {where}, {event['distance_m']:.1f} meters."
+        return f"{prefix} {name} {where}."
+    
+    def _emit(self, event: Dict):
+        """Deliver an event to all subscribers."""
+        self.last_event = event
+        self.events_emitted += 1
+        
+        for callback in self.subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[ALERT] Error in alert subscriber: {e}")
+    
+    def _prune(self, now: float):
+        """Forget objects not seen recently."""
+        self._last_prune = now
+        stale = [k for k, s in self.object_states.items() if now - s['last_seen'] > settings.alert_state_ttl_s]
+        for key in stale:
+            del self.object_states[key]
+    
+    @staticmethod
+    def _object_key(obj: Dict) -> str:
+        """Stable identity for an object across frames."""
+        if obj.get('track_id') is not None:
+            return f"track:{obj['track_id']}"
+        return f"{obj['class']}:{obj.get('position', 'center')}"
+    
+    def get_stats(self) -> Dict:
+        """Get alert engine counters."""
+        return {
+            'frames_processed': self.frames_processed,
+            'events_emitted': self.events_emitted,
+            'tracked_objects': len(self.object_states)
+        }
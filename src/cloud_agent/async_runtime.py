@@ -0,0 +1,57 @@
+"""
+Shared background asyncio event loop.
+
+Streamlit scripts are synchronous, so async VLM calls are scheduled onto
+one long-lived loop running in a daemon thread. Callers get a
+concurrent.futures.Future they can wait on with a deadline without
+blocking anything else running on the loop.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, Optional
+
+
+class AsyncRuntime:
+    """Process-wide event loop running in a daemon thread."""
+    
+    _instance: Optional["AsyncRuntime"] = None
+    _instance_lock = threading.Lock()
+    
+    def __init__(self):
+        """Start the event loop thread."""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="async-runtime")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    @classmethod
+    def get(cls) -> "AsyncRuntime":
+        """Get (or lazily create) the shared runtime."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
+    def _run(self):
+        """Thread target: run the loop forever."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Schedule a coroutine on the shared loop.
+        
+        Args:
+            coro: Coroutine to run
+        
+        Returns:
+            Thread-safe future for the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+def run_coroutine(coro: Coroutine) -> Future:
+    """Schedule a coroutine on the shared background loop."""
+    return AsyncRuntime.get().submit(coro)
@@ -0,0 +1,96 @@
+"""
+Multi-turn chat history for Gemini requests.
+
+The system instruction is configured once on the model, so each request
+only carries the prior turns plus the new CV context and query. History
+is text-only (images are never re-sent) and truncated to a token budget,
+oldest exchanges first.
+"""
+import threading
+from typing import Dict, List
+from config.settings import settings
+
+
+# Rough chars-per-token ratio for English text (avoids a count_tokens round-trip)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ChatSession:
+    """Thread-safe, token-bounded Gemini conversation history."""
+    
+    def __init__(self, max_tokens: int = None):
+        """
+        Initialize chat session.
+        
+        Args:
+            max_tokens: Token budget for the kept history (0 = no history)
+        """
+        self.max_tokens = settings.vlm_history_max_tokens if max_tokens is None else max_tokens
+        
+        # Exchanges as (user_text, model_text, estimated_tokens)
+        self._exchanges: List[tuple] = []
+        self._tokens = 0
+        self._lock = threading.Lock()
+        
+        self.truncated_exchanges = 0
+    
+    def build_contents(self, user_parts: List) -> List[Dict]:
+        """
+        Build the request contents: prior turns plus the new user turn.
+        
+        Args:
+            user_parts: Parts of the new user turn (text and images)
+        
+        Returns:
+            Contents list for generate_content
+        """
+        with self._lock:
+            exchanges = list(self._exchanges)
+        
+        contents = []
+        for user_text, model_text, _ in exchanges:
+            contents.append({'role': 'user', 'parts': [user_text]})
+            contents.append({'role': 'model', 'parts': [model_text]})
+        contents.append({'role': 'user', 'parts': list(user_parts)})
+        return contents
+    
+    def add_exchange(self, user_text: str, model_text: str):
+        """
+        Record a completed exchange (text only) and enforce the token budget.
+        
+        Args:
+            user_text: Text of the user turn (CV context and query)
+            model_text: Model answer
+        """
+        if self.max_tokens <= 0 or not model_text:
+            return
+        
+        tokens = estimate_tokens(user_text) + estimate_tokens(model_text)
+        with self._lock:
+            self._exchanges.append((user_text, model_text, tokens))
+            self._tokens += tokens
+            
+            # Drop oldest exchanges until the history fits (always keep the latest)
+            while self._tokens > self.max_tokens and len(self._exchanges) > 1:
+                _, _, dropped = self._exchanges.pop(0)
+                self._tokens -= dropped
+                self.truncated_exchanges += 1
+    
+    def clear(self):
+        """Forget all turns."""
+        with self._lock:
+            self._exchanges = []
+            self._tokens = 0
+    
+    def get_stats(self) -> Dict:
+        """Get history size counters."""
+        return {
+            'exchanges': len(self._exchanges),
+            'estimated_tokens': self._tokens,
+            'truncated_exchanges': self.truncated_exchanges
+        }
@@ -0,0 +1,132 @@
+"""
+Circuit breaker for the Gemini call path.
+
+After consecutive failures or timeouts the breaker opens and VLM queries
+go straight to the local responder for a cooldown period, instead of each
+one waiting for its own failure. It then half-opens and lets a few probe
+requests through; a successful probe closes it again, a failed one
+re-opens it. Shared process-wide, since an outage or a throttled key
+affects every session.
+"""
+import threading
+import time
+from typing import Dict, Optional
+from config.settings import settings
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with consecutive-failure counting."""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    _instance: Optional["CircuitBreaker"] = None
+    _instance_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        failure_threshold: int = None,
+        cooldown_s: float = None,
+        half_open_probes: int = None
+    ):
+        """
+        Initialize breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown_s: Seconds the circuit stays open before probing
+            half_open_probes: Probe requests allowed at once when half-open
+        """
+        self.failure_threshold = failure_threshold or settings.vlm_breaker_failure_threshold
+        self.cooldown_s = settings.vlm_breaker_cooldown_s if cooldown_s is None else cooldown_s
+        self.half_open_probes = half_open_probes or settings.vlm_breaker_half_open_probes
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+        
+        self.times_opened = 0
+        self.rejected = 0
+    
+    @classmethod
+    def get(cls) -> "CircuitBreaker":
+        """Get (or lazily create) the shared breaker."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
+    def is_open(self) -> bool:
+        """Check (without side effects) whether calls are currently being short-circuited."""
+        return self.state == self.OPEN and time.time() - self.opened_at < self.cooldown_s
+    
+    def allow_request(self) -> bool:
+        """
+        Ask to make an API call.
+        
+        Returns:
+            True if the call may go ahead (possibly as a half-open probe)
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.cooldown_s:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probes_in_flight = 0
+                print("[BREAKER] Cooldown over - probing Gemini")
+            
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            
+            return True
+    
+    def record_success(self):
+        """Record a successful call (closes a half-open circuit)."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                print("[BREAKER] Probe succeeded - circuit closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probes_in_flight = 0
+    
+    def release_probe(self):
+        """Give back a half-open probe whose call ended without an outcome (cancelled)."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+    
+    def record_failure(self):
+        """Record a failed or timed-out call (may open the circuit)."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    print(
+                        f"[BREAKER] Circuit opened after {self.consecutive_failures} failure(s) - "
+                        f"answering locally for {self.cooldown_s:.0f}s"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.time()
+                self._probes_in_flight = 0
+    
+    def get_stats(self) -> Dict:
+        """Get breaker state and counters."""
+        return {
+            'state': self.OPEN if self.is_open() else (self.HALF_OPEN if self.state != self.CLOSED else self.CLOSED),
+            'consecutive_failures': self.consecutive_failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected
+        }
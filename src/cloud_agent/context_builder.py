@@ -0,0 +1,139 @@
+"""
+Compact, bounded text context from structured CV output.
+
+Detections are grouped by class and position ("3 people ahead, 2.0-4.0 m"),
+ranked by threat (seconds to contact), cut to the top groups and then to a
+character budget, so prompt size stays roughly constant however busy the
+scene is. Shared by every consumer that turns CV data into model text.
+"""
+from typing import Dict, List
+from config.settings import settings
+from src.cloud_agent.tools import NavigationTools
+
+
+# Irregular plurals among the detector's classes
+PLURALS = {'person': 'people', 'bus': 'buses', 'knife': 'knives', 'mouse': 'mice', 'skis': 'skis'}
+
+# Position phrases in prompt text
+POSITION_TEXT = {'left': "on your left", 'center': "ahead", 'right': "on your right"}
+
+# Distance (meters) below which a group is flagged as critical
+CRITICAL_DISTANCE_M = 1.0
+
+
+def plural_of(class_name: str) -> str:
+    """Plural of a class name ("chair" -> "chairs", "person" -> "people")."""
+    plural = PLURALS.get(class_name)
+    if plural is None:
+        plural = class_name + ('es' if class_name.endswith(('s', 'ch', 'sh', 'x')) else 's')
+    return plural
+
+
+def pluralize(class_name: str, count: int) -> str:
+    """Class name with a count ("chair", "2 chairs", "3 people")."""
+    if count == 1:
+        return class_name
+    return f"{count} {plural_of(class_name)}"
+
+
+def group_objects(cv_data: Dict) -> List[Dict]:
+    """
+    Group detections by class and position, most threatening first.
+    
+    Args:
+        cv_data: Structured CV output
+    
+    Returns:
+        Groups with class, position, count, distance range, seconds to
+        contact and the fastest time-to-collision
+    """
+    groups: Dict[tuple, Dict] = {}
+    for obj in (cv_data or {}).get('objects', []):
+        key = (obj['class'], obj.get('position', 'center'))
+        group = groups.get(key)
+        if group is None:
+            group = {
+                'class': key[0],
+                'position': key[1],
+                'count': 0,
+                'min_distance_m': float('inf'),
+                'max_distance_m': -1.0,
+                'seconds_to_contact': float('inf'),
+                'ttc_s': None
+            }
+            groups[key] = group
+        
+        group['count'] += 1
+        distance = obj.get('distance_m', -1)
+        if distance > 0:
+            group['min_distance_m'] = min(group['min_distance_m'], distance)
+            group['max_distance_m'] = max(group['max_distance_m'], distance)
+        group['seconds_to_contact'] = min(group['seconds_to_contact'], NavigationTools.seconds_to_contact(obj))
+        
+        ttc = obj.get('ttc_s')
+        if ttc is not None and (group['ttc_s'] is None or ttc < group['ttc_s']):
+            group['ttc_s'] = ttc
+    
+    return sorted(groups.values(), key=lambda g: (g['seconds_to_contact'], -g['count']))
+
+
+def format_group(group: Dict) -> str:
+    """One prompt line for an object group."""
+    text = f"- {pluralize(group['class'], group['count'])} {POSITION_TEXT.get(group['position'], 'ahead')}"
+    
+    if group['max_distance_m'] < 0:
+        text += ", unknown distance"
+    elif group['max_distance_m'] - group['min_distance_m'] >= 0.1:
+        text += f", {group['min_distance_m']:.1f}-{group['max_distance_m']:.1f} m"
+    else:
+        text += f", {group['min_distance_m']:.1f} m"
+    
+    if 0 < group['min_distance_m'] < CRITICAL_DISTANCE_M:
+        text += " (CRITICAL: very close)"
+    if group['ttc_s'] is not None and group['ttc_s'] < settings.ttc_warning_s:
+        text += f" (approaching, ~{group['ttc_s']:.0f} s to contact)"
+    
+    return text
+
+
+def build_scene_context(cv_data: Dict, max_groups: int = None, max_chars: int = None) -> str:
+    """
+    Build a compact description of the detections for model prompts.
+    
+    Args:
+        cv_data: Structured CV output
+        max_groups: Keep at most this many groups (highest threat first)
+        max_chars: Character budget for the whole context
+    
+    Returns:
+        Context text (one line per kept group plus a summary of the rest)
+    """
+    max_groups = settings.context_max_groups if max_groups is None else max_groups
+    max_chars = settings.context_max_chars if max_chars is None else max_chars
+    
+    path_depth = (cv_data or {}).get('path_depth') or {}
+    lines = []
+    if path_depth.get('blocked'):
+        lines.append("- Unidentified surface close ahead in the walking path (depth sensor)")
+    
+    groups = group_objects(cv_data)
+    if not groups:
+        return lines[0] if lines else "No objects detected."
+    
+    used = sum(len(line) + 1 for line in lines)
+    kept = 0
+    for group in groups[:max_groups]:
+        line = format_group(group)
+        # Reserve room for the "more objects" summary line
+        if used + len(line) + 1 > max_chars - 40 and kept > 0:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        kept += 1
+    
+    dropped = groups[kept:]
+    if dropped:
+        remaining = sum(g['count'] for g in dropped)
+        lines.append(f"- plus {remaining} more object(s) further away or less urgent")
+    
+    return "\n".join(lines)
@@ -1,10 +1,48 @@
 """
 Gemini VLM tool for semantic scene understanding.
 """
-from typing import Dict
+import asyncio
+import re
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
 import numpy as np
 from config.settings import settings
-from src.cloud_agent.mock_responses import MockResponseGenerator
+from src.cloud_agent.mock_responses import FallbackText, MockResponseGenerator
+from src.cloud_agent.response_cache import ResponseCache, scene_signature
+from src.cloud_agent.intent_router import route_intent
+from src.cloud_agent.image_payload import ImageEncoder
+from src.cloud_agent.chat_session import ChatSession
+from src.cloud_agent.async_runtime import run_coroutine
+from src.cloud_agent.request_scheduler import RequestScheduler
+from src.cloud_agent.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.cloud_agent.scene_index import SceneIndex
+
+
+# Sentence end: terminal punctuation (plus closing quotes) followed by whitespace.
+# Requiring whitespace keeps decimals like "1.5 meters" in one sentence.
+SENTENCE_END = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+')
+
+
+def split_sentences(buffer: str, final: bool = False) -> Tuple[List[str], str]:
+    """
+    Split streamed text into complete sentences and a remainder.
+    
+    Args:
+        buffer: Accumulated text
+        final: Treat the remainder as a complete sentence (end of stream)
+    
+    Returns:
+        Tuple of (complete sentences, unfinished remainder)
+    """
+    parts = SENTENCE_END.split(buffer)
+    remainder = parts.pop() if parts else ""
+    sentences = [p.strip() for p in parts if p.strip()]
+    
+    if final and remainder.strip():
+        sentences.append(remainder.strip())
+        remainder = ""
+    
+    return sentences, remainder
 
 
 class GeminiVLMTool:
@@ -14,22 +52,18 @@ class GeminiVLMTool:
         """Initialize Gemini API client."""
         self.api_available = False
         self.model = None
+        self.response_cache = ResponseCache()
         
-        # Check if Gemini API key is available
-        if settings.has_gemini_key() and settings.use_gemini:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=settings.gemini_api_key)
-                
-                # Use Gemini 2.0 Flash Experimental for better navigation
-                self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                self.api_available = True
-                print("[GEMINI] Using Gemini 2.0 Flash Experimental - Latest model")
-            except Exception as e:
-                print(f"Warning: Could not initialize Gemini: {e}")
-                print("Using mock responses instead.")
-        else:
-            print("Gemini API not configured. Using mock responses.")
+        # Upload budget: frames are downscaled and JPEG-encoded once
+        self.image_encoder = ImageEncoder()
+        self.payload_stats = deque(maxlen=50)
+        
+        # Process-wide rate limit and request coalescing (shared by all sessions)
+        self.scheduler = RequestScheduler.get()
+        self.breaker = CircuitBreaker.get()
+        
+        # Multi-turn history: prior turns are sent as text, never re-sending images
+        self.chat = ChatSession()
         
         # System prompt for accessibility-focused descriptions
         self.system_prompt = """You are an AI assistant helping visually impaired users navigate their environment safely.
@@ -46,7 +80,39 @@ When describing objects, always include:
 - Where it is located (position and distance)
 - Any immediate hazards or navigation concerns
 
-Keep responses under 3 sentences unless asked for more detail."""
+Keep responses under 3 sentences unless asked for more detail.
+
+Each user turn lists the objects detected by computer vision followed by the user's query.
+Provide a natural, conversational response that helps the user understand their environment and navigate safely."""
+
+        # Check if Gemini API key is available
+        if settings.has_gemini_key() and settings.use_gemini:
+            try:
+                import google.generativeai as genai
+                if settings.gemini_api_endpoint:
+                    # Custom endpoint (e.g. scripts/gemini_standin_server.py) over REST
+                    genai.configure(
+                        api_key=settings.gemini_api_key or "standin",
+                        transport="rest",
+                        client_options={"api_endpoint": settings.gemini_api_endpoint}
+                    )
+                    print(f"[GEMINI] Using custom endpoint {settings.gemini_api_endpoint}")
+                else:
+                    genai.configure(api_key=settings.gemini_api_key)
+                
+                # Use Gemini 2.0 Flash Experimental for better navigation.
+                # The system prompt is set once here instead of in every request.
+                self.model = genai.GenerativeModel(
+                    'gemini-2.0-flash-exp',
+                    system_instruction=self.system_prompt
+                )
+                self.api_available = True
+                print("[GEMINI] Using Gemini 2.0 Flash Experimental - Latest model")
+            except Exception as e:
+                print(f"Warning: Could not initialize Gemini: {e}")
+                print("Using mock responses instead.")
+        else:
+            print("Gemini API not configured. Using mock responses.")
     
     def generate_description(
         self, 
@@ -70,54 +136,316 @@ Keep responses under 3 sentences unless asked for more detail."""
             return MockResponseGenerator.generate_description(structured_cv_data, user_query)
         
         try:
-            import cv2
-            from PIL import Image as PILImage
+            # Same path as the async call: cache, then the shared scheduler
+            # (rate limit, concurrency cap, coalescing of identical requests)
+            return run_coroutine(
+                self.generate_description_async(image, structured_cv_data, user_query)
+            ).result()
             
-            # Convert BGR to RGB
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            pil_image = PILImage.fromarray(image_rgb)
+        except Exception as e:
+            print(f"Error in Gemini API call: {e}")
+            print("Falling back to mock responses.")
+            return MockResponseGenerator.generate_description(structured_cv_data, user_query)
+    
+    def stream_description(
+        self, 
+        image: np.ndarray, 
+        structured_cv_data: Dict,
+        user_query: str = "Describe what you see"
+    ) -> Iterator[str]:
+        """
+        Stream a scene description sentence by sentence.
+        
+        Uses the streaming generation API and yields each sentence as soon
+        as it is complete, so speech can start before generation ends.
+        
+        Args:
+            image: Image frame (numpy array, BGR format)
+            structured_cv_data: Structured CV output from edge detector
+            user_query: User's question or request
+        
+        Yields:
+            Complete sentences
+        """
+        if not self.api_available or self.model is None:
+            yield FallbackText(MockResponseGenerator.generate_description(structured_cv_data, user_query))
+            return
+        
+        cache_key = self._cache_key(image, structured_cv_data, user_query)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            print("[GEMINI] Cache hit - skipping API call")
+            self.remember_exchange(structured_cv_data, user_query, cached)
+            yield from split_sentences(cached, final=True)[0]
+            return
+        
+        # API known to be failing: answer locally right away
+        if not self.breaker.allow_request():
+            yield FallbackText(MockResponseGenerator.generate_description(structured_cv_data, user_query))
+            return
+        
+        sentences = []
+        answered = False
+        completed = False
+        try:
+            contents, turn_text = self._build_contents(image, structured_cv_data, user_query)
             
-            # Construct grounded prompt with CV data
-            cv_context = self._format_cv_data(structured_cv_data)
+            buffer = ""
+            with self.scheduler.slot_sync():
+                # The timeout bounds each read, so a hung stream gives its slot back
+                stream = self.model.generate_content(
+                    contents,
+                    stream=True,
+                    request_options={'timeout': settings.vlm_call_timeout_s}
+                )
+                for chunk in stream:
+                    if not answered:
+                        # First chunk means the API is serving again
+                        self.breaker.record_success()
+                        answered = True
+                    buffer += chunk.text
+                    complete, buffer = split_sentences(buffer)
+                    for sentence in complete:
+                        sentences.append(sentence)
+                        yield sentence
             
-            prompt = f"""{self.system_prompt}
-
-DETECTED OBJECTS (from computer vision):
-{cv_context}
-
-USER QUERY: {user_query}
-
-Provide a natural, conversational response that helps the user understand their environment and navigate safely."""
+            complete, _ = split_sentences(buffer, final=True)
+            for sentence in complete:
+                sentences.append(sentence)
+                yield sentence
             
-            # Generate response
-            response = self.model.generate_content([prompt, pil_image])
+            self.response_cache.put(cache_key, " ".join(sentences))
+            self.chat.add_exchange(turn_text, " ".join(sentences))
+            completed = True
+        
+        except Exception as e:
+            print(f"Error in Gemini streaming call: {e}")
+            # Only fall back if nothing was spoken yet
+            if not sentences:
+                print("Falling back to mock responses.")
+                yield FallbackText(MockResponseGenerator.generate_description(structured_cv_data, user_query))
+        
+        finally:
+            # Failed, timed out, or closed by a consumer that gave up on it
+            # (this also releases a half-open probe)
+            if not completed:
+                self.breaker.record_failure()
+    
+    async def generate_description_async(
+        self, 
+        image: np.ndarray, 
+        structured_cv_data: Dict,
+        user_query: str = "Describe what you see",
+        remember: bool = True
+    ) -> str:
+        """
+        Generate a scene description without blocking the caller.
+        
+        Unlike generate_description, errors are raised rather than
+        replaced by a mock answer, so the caller can tell a real VLM
+        answer from a fallback it already gave.
+        
+        Args:
+            image: Image frame (numpy array, BGR format)
+            structured_cv_data: Structured CV output from edge detector
+            user_query: User's question or request
+            remember: Add the exchange to the chat history (off for
+                speculative requests the user never asked)
+        
+        Returns:
+            Natural language description
+        """
+        if not self.api_available or self.model is None:
+            raise RuntimeError("Gemini API not available")
+        
+        cache_key = self._cache_key(image, structured_cv_data, user_query)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            print("[GEMINI] Cache hit - skipping API call")
+            if remember:
+                self.remember_exchange(structured_cv_data, user_query, cached)
+            return cached
+        
+        # API known to be failing: fail in microseconds instead of seconds
+        if self.breaker.is_open():
+            raise CircuitOpenError("Gemini circuit open")
+        
+        loop = asyncio.get_running_loop()
+        
+        async def call() -> str:
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("Gemini circuit open")
             
-            return response.text
+            # Everything after allow_request reports an outcome, so a half-open
+            # probe is never left reserved
+            try:
+                # JPEG encoding is CPU work; keep it off the event loop
+                contents, _ = await loop.run_in_executor(
+                    None, self._build_contents, image, structured_cv_data, user_query, remember
+                )
+                
+                if settings.gemini_api_endpoint:
+                    # The async client is gRPC-only; custom endpoints speak REST
+                    request = loop.run_in_executor(None, self.model.generate_content, contents)
+                else:
+                    request = self.model.generate_content_async(contents)
+                response = await asyncio.wait_for(request, settings.vlm_call_timeout_s)
+                text = response.text
+            except asyncio.CancelledError:
+                # Not the API's fault, but the probe slot must be given back
+                self.breaker.release_probe()
+                raise
+            except Exception:
+                # Errors, throttling, timeouts and failed encodes all count toward opening the circuit
+                self.breaker.record_failure()
+                raise
             
-        except Exception as e:
-            print(f"Error in Gemini API call: {e}")
-            print("Falling back to mock responses.")
-            return MockResponseGenerator.generate_description(structured_cv_data, user_query)
+            self.breaker.record_success()
+            return text
+        
+        # Rate limit is shared across sessions, but only this tool's own identical
+        # requests may share a call: the prompt carries its image and chat history,
+        # and prefetches (remember=False) must not merge with user questions
+        text = await self.scheduler.run((id(self), remember, cache_key), call)
+        
+        self.response_cache.put(cache_key, text)
+        if remember:
+            self.remember_exchange(structured_cv_data, user_query, text)
+        return text
+    
+    def remember_exchange(self, cv_data: Dict, user_query: str, answer: str):
+        """
+        Add an answer given without an API call (cache hit, prefetch) to the chat history.
+        
+        Args:
+            cv_data: Structured CV output the answer refers to
+            user_query: User's question
+            answer: Answer text
+        """
+        self.chat.add_exchange(self._format_turn(cv_data, user_query), answer)
+    
+    def clear_history(self):
+        """Start a fresh chat (drop all prior turns)."""
+        self.chat.clear()
+    
+    def _cache_key(self, image: np.ndarray, cv_data: Dict, user_query: str):
+        """Cache key: normalized intent plus quantized scene signature."""
+        return ResponseCache.make_key(route_intent(user_query).normalized, scene_signature(cv_data, image))
+    
+    def _build_contents(
+        self, 
+        image: np.ndarray, 
+        cv_data: Dict, 
+        user_query: str, 
+        with_history: bool = True
+    ) -> Tuple[List, str]:
+        """
+        Build the multimodal request: prior turns plus the new grounded turn.
+        
+        The system prompt lives on the model, so the new turn only carries
+        the CV context, the query and this frame's images.
+        
+        Returns:
+            Tuple of (contents for generate_content, text of the new turn for history)
+        """
+        # Full frame or object crops, encoded within the upload budget
+        image_parts, image_note = self._prepare_images(image, cv_data, user_query)
+        
+        # Construct grounded turn with CV data
+        turn_text = self._format_turn(cv_data, user_query)
+        prompt = f"{turn_text}\n{image_note}" if image_note else turn_text
+        
+        if not with_history:
+            return [prompt, *image_parts], turn_text
+        return self.chat.build_contents([prompt, *image_parts]), turn_text
+    
+    def _format_turn(self, cv_data: Dict, user_query: str) -> str:
+        """Text of a user turn: CV context plus query."""
+        return f"""DETECTED OBJECTS (from computer vision):
+{self._format_cv_data(cv_data)}
+
+USER QUERY: {user_query}"""
+    
+    def _prepare_images(self, image: np.ndarray, cv_data: Dict, user_query: str) -> Tuple[List[Dict], str]:
+        """
+        Choose and encode the image payload for a query.
+        
+        Object-specific queries ("find the door", "what colour is that car")
+        send padded crops of the matching detections plus a small context
+        thumbnail; everything else sends the budgeted full frame.
+        
+        Returns:
+            Tuple of (image parts, prompt note describing the images)
+        """
+        targets = self._select_crop_targets(cv_data, user_query) if settings.vlm_crop_mode else []
+        if targets:
+            # Labels must follow the crops actually encoded (degenerate boxes are skipped)
+            parts, targets, stats = self.image_encoder.encode_crops(image, targets)
+        
+        if targets:
+            lines = [
+                f"Image {i + 1}: close-up of the {obj['class']} on your {obj['position']}"
+                + (f" at {obj['distance_m']:.1f} meters" if obj['distance_m'] > 0 else "")
+                for i, obj in enumerate(targets)
+            ]
+            if len(parts) > len(targets):
+                lines.append(f"Image {len(parts)}: low-resolution thumbnail of the full view for context")
+            note = "\nIMAGES:\n" + "\n".join(lines) + "\n"
+        else:
+            # Downscale + JPEG-encode within the upload budget (reused per snapshot);
+            # also the fallback when no crop could be cut
+            part, stats = self.image_encoder.encode(image)
+            parts, note = [part], ""
+        
+        self.payload_stats.append(stats)
+        print(
+            f"[GEMINI] Payload {stats['payload_bytes'] / 1024:.0f} KB "
+            f"({stats['mode']}, {stats['num_images']} image(s)) encoded in {stats['encode_ms']:.1f}ms"
+            f"{' [reused]' if stats['reused'] else ''}"
+        )
+        return parts, note
+    
+    def _select_crop_targets(self, cv_data: Dict, user_query: str) -> List[Dict]:
+        """Pick detections the query names (nearest first), if any."""
+        return SceneIndex.of(cv_data).objects_named(user_query, settings.vlm_crop_max_objects)
     
     def _format_cv_data(self, cv_data: Dict) -> str:
-        """Format structured CV data for prompt."""
-        if not cv_data or cv_data.get('num_objects', 0) == 0:
-            return "No objects detected."
-        
-        lines = []
-        for obj in cv_data['objects']:
-            distance_str = f"{obj['distance_m']:.1f} meters" if obj['distance_m'] > 0 else "unknown distance"
-            lines.append(
-                f"- {obj['class']} at {distance_str}, positioned to your {obj['position']}"
-            )
-        
-        # Highlight critical alerts
-        if cv_data.get('critical_alerts'):
-            lines.append("\nCRITICAL ALERTS (very close objects):")
-            for alert in cv_data['critical_alerts']:
-                lines.append(f"⚠ {alert['class']} only {alert['distance_m']:.1f}m away!")
-        
-        return "\n".join(lines)
+        """Format structured CV data for prompt (grouped, bounded, built once per frame)."""
+        return SceneIndex.of(cv_data).scene_context()
+    
+    def get_payload_stats(self) -> Dict:
+        """Get upload payload size and encode time for recent calls."""
+        if not self.payload_stats:
+            return {'calls': 0}
+        
+        recent = list(self.payload_stats)
+        return {
+            'calls': len(recent),
+            'last': recent[-1],
+            'avg_payload_bytes': int(sum(s['payload_bytes'] for s in recent) / len(recent)),
+            'avg_encode_ms': round(sum(s['encode_ms'] for s in recent) / len(recent), 2),
+            'reuse_rate': round(sum(s['reused'] for s in recent) / len(recent), 3)
+        }
+    
+    def get_chat_stats(self) -> Dict:
+        """Get chat history size counters."""
+        return self.chat.get_stats()
+    
+    def is_circuit_open(self) -> bool:
+        """Check if Gemini calls are currently short-circuited to local answers."""
+        return self.breaker.is_open()
+    
+    def get_breaker_stats(self) -> Dict:
+        """Get circuit breaker state and counters."""
+        return self.breaker.get_stats()
+    
+    def get_scheduler_stats(self) -> Dict:
+        """Get shared request scheduler counters."""
+        return self.scheduler.get_stats()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get response cache hit/miss counters."""
+        return self.response_cache.get_stats()
     
     def is_available(self) -> bool:
         """Check if Gemini API is available."""
@@ -0,0 +1,190 @@
+"""
+Image payload preparation for Gemini uploads.
+
+Frames are downscaled to a pixel budget and JPEG-encoded once, stepping
+quality (then size) down until the payload fits a byte budget. Encoded
+payloads are cached by frame content so re-asking about the same snapshot
+re-uses the bytes instead of encoding again.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+import numpy as np
+from config.settings import settings
+
+
+class ImageEncoder:
+    """Budgeted JPEG encoder with a small content-keyed cache."""
+    
+    def __init__(
+        self,
+        max_pixels: int = None,
+        max_bytes: int = None,
+        quality: int = None,
+        cache_size: int = 4
+    ):
+        """
+        Initialize encoder.
+        
+        Args:
+            max_pixels: Pixel budget (width * height) for uploaded images
+            max_bytes: Byte budget for the encoded JPEG
+            quality: Starting JPEG quality (1-100)
+            cache_size: Number of encoded frames to keep
+        """
+        self.max_pixels = max_pixels or settings.vlm_max_image_pixels
+        self.max_bytes = max_bytes or settings.vlm_max_image_bytes
+        self.quality = quality or settings.vlm_jpeg_quality
+        self.min_quality = settings.vlm_jpeg_min_quality
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def encode(self, image: np.ndarray) -> Tuple[Dict, Dict]:
+        """
+        Encode a frame for upload.
+        
+        Args:
+            image: Image frame (BGR format)
+        
+        Returns:
+            Tuple of (image part for generate_content, payload stats)
+        """
+        start_time = time.time()
+        key = self._frame_key(image)
+        
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        
+        if cached is not None:
+            part, stats = cached
+            return part, {
+                **stats,
+                'encode_ms': round((time.time() - start_time) * 1000, 2),
+                'reused': True
+            }
+        
+        data, width, height, quality = self._encode_within_budget(image, self.max_pixels, self.max_bytes)
+        part = {'mime_type': 'image/jpeg', 'data': data}
+        stats = {
+            'encode_ms': round((time.time() - start_time) * 1000, 2),
+            'payload_bytes': len(data),
+            'width': width,
+            'height': height,
+            'quality': quality,
+            'num_images': 1,
+            'mode': 'full_frame',
+            'reused': False
+        }
+        
+        with self._lock:
+            self._cache[key] = (part, stats)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        return part, stats
+    
+    def encode_crops(
+        self,
+        image: np.ndarray,
+        objects: List[Dict],
+        padding: float = None,
+        thumbnail_px: int = None
+    ) -> Tuple[List[Dict], List[Dict], Dict]:
+        """
+        Encode padded crops of selected detections (plus optional thumbnail).
+        
+        Each crop gets its own small pixel budget, so a targeted query
+        uploads a fraction of a full-frame payload. Boxes too small to crop
+        are skipped; the thumbnail is only added when at least one crop is
+        kept.
+        
+        Args:
+            image: Image frame (BGR format)
+            objects: Detections to crop (must have 'bbox')
+            padding: Extra margin around each box as a fraction of its size
+            thumbnail_px: Longest side of a context thumbnail (0 = none)
+        
+        Returns:
+            Tuple of (image parts for generate_content, detections that got
+            a crop in the same order, payload stats)
+        """
+        start_time = time.time()
+        padding = settings.vlm_crop_padding if padding is None else padding
+        thumbnail_px = settings.vlm_crop_thumbnail_px if thumbnail_px is None else thumbnail_px
+        
+        height, width = image.shape[:2]
+        crop_pixels = settings.vlm_crop_max_pixels
+        crop_bytes = self.max_bytes // 4
+        
+        parts = []
+        kept = []
+        for obj in objects:
+            x1, y1, x2, y2 = obj['bbox']
+            pad_x, pad_y = (x2 - x1) * padding, (y2 - y1) * padding
+            c1, r1 = int(max(0, x1 - pad_x)), int(max(0, y1 - pad_y))
+            c2, r2 = int(min(width, x2 + pad_x)), int(min(height, y2 + pad_y))
+            if c2 - c1 < 2 or r2 - r1 < 2:
+                continue
+            
+            crop = np.ascontiguousarray(image[r1:r2, c1:c2])
+            data, _, _, _ = self._encode_within_budget(crop, crop_pixels, crop_bytes)
+            parts.append({'mime_type': 'image/jpeg', 'data': data})
+            kept.append(obj)
+        
+        if kept and thumbnail_px > 0:
+            thumb_pixels = int(thumbnail_px * thumbnail_px * min(width, height) / max(width, height))
+            data, _, _, _ = self._encode_within_budget(image, thumb_pixels, self.max_bytes // 4)
+            parts.append({'mime_type': 'image/jpeg', 'data': data})
+        
+        stats = {
+            'encode_ms': round((time.time() - start_time) * 1000, 2),
+            'payload_bytes': sum(len(p['data']) for p in parts),
+            'num_images': len(parts),
+            'mode': 'crops',
+            'reused': False
+        }
+        return parts, kept, stats
+    
+    def _encode_within_budget(
+        self, 
+        image: np.ndarray, 
+        max_pixels: int, 
+        max_bytes: int
+    ) -> Tuple[bytes, int, int, int]:
+        """Downscale to the pixel budget, then trade quality and size for bytes."""
+        import cv2
+        
+        height, width = image.shape[:2]
+        scale = min(1.0, (max_pixels / float(width * height)) ** 0.5)
+        quality = self.quality
+        
+        for _ in range(6):
+            target = (max(1, int(width * scale)), max(1, int(height * scale)))
+            resized = image if scale >= 1.0 else cv2.resize(image, target, interpolation=cv2.INTER_AREA)
+            
+            ok, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            
+            data = buffer.tobytes()
+            if len(data) <= max_bytes:
+                break
+            
+            # Over budget: lower quality first, then shrink
+            if quality - 15 >= self.min_quality:
+                quality -= 15
+            else:
+                scale *= 0.75
+        
+        return data, resized.shape[1], resized.shape[0], quality
+    
+    @staticmethod
+    def _frame_key(image: np.ndarray) -> Tuple:
+        """Content key for a frame (shape plus a fast 128-bit digest)."""
+        digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16).digest()
+        return image.shape, digest
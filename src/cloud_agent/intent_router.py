@@ -0,0 +1,113 @@
+"""
+Query intent router.
+
+One precompiled regex covers every phrase and keyword the agent and the
+rule-based responder look for. Phrases match whole words only (plus a
+plural "s"), so "removed" is not "move"; other inflections are listed.
+A single scan of the query returns an Intent with the matched
+categories, the target slot ("find the door" -> "door"), the VLM
+decision and the normalized cache intent. Results are memoized per
+query string, so the agent, the cache key and the local responders all
+reuse one routing result.
+"""
+import re
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Optional
+from src.cloud_agent.response_cache import normalize_intent
+
+
+# Phrase groups, most specific first (regex alternation takes the first that matches)
+INTENT_PHRASES = [
+    ('route', ['how do i get to', 'how can i get to', 'take me to', 'directions to', 'route to',
+               'navigate to', 'guide me to']),
+    ('recall', ['where was', 'where were', 'where did', 'last see', 'last saw', 'did you see',
+                'have you seen']),
+    ('navigation', ['where can i go', 'where should i go', 'which way', 'which direction', 'guide me',
+                    'clear path', 'way out']),
+    ('distance', ['how far', 'how close', 'how near', 'distance to']),
+    ('locate', ['where is', "where's", 'where are']),
+    ('scene', ['what do you see', 'what can you see', "what's ahead", 'what is ahead', "what's around",
+               'what is around', 'what is in front', "what's in front", 'describe']),
+    ('safety', ['safe', 'safely', 'safety', 'clear', 'walk', 'walking', 'move', 'moving']),
+    ('describe', ['what', 'see', 'scene']),
+    ('where', ['where']),
+    ('find', ['find', 'locate', 'looking for', 'search for']),
+    ('detail', ['how many', 'tell me about', 'explain', 'identify', 'recognize', 'environment',
+                'look', 'looking', 'show', 'detail', 'detailed', 'color', 'appearance', 'read']),
+]
+
+# Categories whose presence means the question needs semantic (VLM) understanding.
+# The agent still answers locate/find/distance locally when the target is in
+# view or in object memory; only unknown targets go to the VLM.
+VLM_CATEGORIES = frozenset({'scene', 'describe', 'where', 'locate', 'find', 'distance', 'detail'})
+
+# Categories with a target slot after the phrase
+SLOT_CATEGORIES = frozenset({'route', 'recall', 'distance', 'locate', 'find'})
+
+# Categories asking where (or how far) one named object is
+OBJECT_QUERY_CATEGORIES = frozenset({'distance', 'locate', 'find'})
+
+# Primary intent when several categories match
+PRIORITY = ['route', 'recall', 'navigation', 'safety', 'scene', 'distance', 'describe', 'locate', 'where',
+            'find', 'detail']
+
+# Leading words dropped from a slot ("find the door" -> "door")
+SLOT_STOP_WORDS = {'the', 'a', 'an', 'my', 'me', 'i', 'you', 'to', 'is', 'are'}
+
+
+def _compile() -> re.Pattern:
+    """Build the single matcher with one named group per category."""
+    groups = []
+    for name, phrases in INTENT_PHRASES:
+        alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+        groups.append(f"(?P<{name}>{alternatives})")
+    # Whole words, allowing a plural ("chairs", "details")
+    return re.compile(r"(?<![a-z])(?:" + "|".join(groups) + r")(?:e?s)?(?![a-z])")
+
+
+INTENT_PATTERN = _compile()
+
+
+class Intent(NamedTuple):
+    """Routing result for one query."""
+    name: str
+    target: Optional[str]
+    use_vlm: bool
+    categories: FrozenSet[str]
+    normalized: str
+
+
+@lru_cache(maxsize=512)
+def route_intent(user_query: str) -> Intent:
+    """
+    Classify a query in one regex scan (memoized per query string).
+    
+    Args:
+        user_query: Raw spoken/typed query
+    
+    Returns:
+        Intent with primary name, target slot, VLM decision, all matched
+        categories and the normalized cache intent
+    """
+    query_lower = user_query.lower()
+    categories = set()
+    target = None
+    
+    for match in INTENT_PATTERN.finditer(query_lower):
+        category = match.lastgroup
+        categories.add(category)
+        if target is None and category in SLOT_CATEGORIES:
+            target = _extract_slot(query_lower[match.end():])
+    
+    name = next((c for c in PRIORITY if c in categories), 'summary')
+    use_vlm = 'navigation' not in categories and bool(categories & VLM_CATEGORIES)
+    return Intent(name, target, use_vlm, frozenset(categories), normalize_intent(user_query))
+
+
+def _extract_slot(text: str) -> Optional[str]:
+    """Target phrase after an intent phrase, up to the end of the clause."""
+    clause = re.split(r"[?.!,;]", text, maxsplit=1)[0]
+    words = clause.split()
+    while words and words[0] in SLOT_STOP_WORDS:
+        words.pop(0)
+    return " ".join(words) or None
@@ -1,12 +1,21 @@
 """
 Local agent implementation for navigation assistance.
 """
-from typing import Dict, List, Any
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 import numpy as np
+from config.settings import settings
 from src.cloud_agent.agent_interface import AgentInterface
+from src.cloud_agent.async_runtime import run_coroutine
 from src.cloud_agent.gemini_tool import GeminiVLMTool
+from src.cloud_agent.intent_router import OBJECT_QUERY_CATEGORIES, route_intent
 from src.cloud_agent.tools import NavigationTools
-from src.cloud_agent.mock_responses import MockResponseGenerator
+from src.cloud_agent.mock_responses import FallbackText, MockResponseGenerator
+from src.cloud_agent.prefetcher import ScenePrefetcher
+from src.cloud_agent.scene_index import SceneIndex
 
 
 class LocalNavigationAgent(AgentInterface):
@@ -15,18 +24,31 @@ class LocalNavigationAgent(AgentInterface):
     Orchestrates CV data, VLM, and navigation tools.
     """
     
-    def __init__(self):
-        """Initialize local agent and tools."""
+    def __init__(self, vlm_tool=None, prefetch: bool = None):
+        """
+        Initialize local agent and tools.
+        
+        Args:
+            vlm_tool: Model tool for semantic answers (defaults to GeminiVLMTool)
+            prefetch: Describe stable scenes speculatively (defaults to prefetch_enabled)
+        """
         print("Initializing Local Navigation Agent...")
         
         # Initialize tools
-        self.gemini_tool = GeminiVLMTool()
+        self.gemini_tool = vlm_tool or GeminiVLMTool()
         self.nav_tools = NavigationTools()
         
         # Conversation history for context
         self.conversation_history: List[Dict] = []
         
-        print(f"✓ Local Agent initialized (Gemini available: {self.gemini_tool.is_available()})")
+        # Late VLM answers (after the deadline fallback) go to this handler
+        self.follow_up_handler: Optional[Callable[[str], None]] = None
+        
+        # Speculative scene descriptions for "what do you see?" queries
+        prefetch = settings.prefetch_enabled if prefetch is None else prefetch
+        self.prefetcher = ScenePrefetcher(self.gemini_tool) if prefetch else None
+        
+        print(f"✓ Local Agent initialized ({type(self.gemini_tool).__name__} available: {self.gemini_tool.is_available()})")
     
     def process_query(
         self, 
@@ -52,16 +74,35 @@ class LocalNavigationAgent(AgentInterface):
             # Step 2: Check for immediate safety alerts
             haptic_response = self._check_safety_alerts(processed_cv)
             
-            # Step 3: Determine if VLM is needed
-            needs_vlm = self._should_use_vlm(user_query)
+            # Step 3: Determine if VLM is needed ("where was the door?" is answered from memory)
+            local_answer = self._answer_without_vlm(user_query, processed_cv)
+            needs_vlm = local_answer is None and self._should_use_vlm(user_query)
+            
+            # Open circuit (API failing): route straight to the local responder
+            used_vlm = needs_vlm and self.gemini_tool.is_available() and not self.gemini_tool.is_circuit_open()
+            follow_up_pending = False
+            prefetched = self._get_prefetched(user_query, processed_cv) if used_vlm else None
             
-            if needs_vlm and self.gemini_tool.is_available():
+            if prefetched is not None:
+                # Scene was described speculatively in the background
+                description = prefetched
+            elif used_vlm and settings.vlm_deadline_s > 0:
+                # Gemini with a deadline; rule-based answer if it is late
+                description, used_vlm, follow_up_pending = self._query_vlm_with_deadline(
+                    image_frame,
+                    processed_cv,
+                    user_query
+                )
+            elif used_vlm:
                 # Use Gemini for semantic understanding
                 description = self.gemini_tool.generate_description(
                     image_frame,
                     processed_cv,
                     user_query
                 )
+            elif local_answer is not None:
+                # Object memory or venue route (no VLM needed)
+                description = local_answer
             else:
                 # Use simple rule-based response for quick queries
                 description = MockResponseGenerator.generate_description(
@@ -70,24 +111,12 @@ class LocalNavigationAgent(AgentInterface):
                 )
             
             # Step 4: Add to conversation history
-            self.conversation_history.append({
-                'query': user_query,
-                'response': description,
-                'cv_data': processed_cv,
-                'used_vlm': needs_vlm and self.gemini_tool.is_available()
-            })
-            
-            # Keep only last 5 exchanges
-            if len(self.conversation_history) > 5:
-                self.conversation_history = self.conversation_history[-5:]
-            
-            return {
-                'text_response': description,
-                'haptic_feedback': haptic_response,
-                'safety_status': processed_cv['safety_status'],
-                'cv_summary': self._summarize_cv_data(processed_cv),
-                'used_vlm': needs_vlm and self.gemini_tool.is_available()
-            }
+            response = self._build_response(
+                user_query, description, processed_cv, haptic_response, used_vlm
+            )
+            response['follow_up_pending'] = follow_up_pending
+            response['prefetched'] = prefetched is not None
+            return response
             
         except Exception as e:
             print(f"Error in agent processing: {e}")
@@ -99,31 +128,424 @@ class LocalNavigationAgent(AgentInterface):
                 'error': str(e)
             }
     
+    def _build_response(
+        self, 
+        user_query: str, 
+        description: str, 
+        processed_cv: Dict, 
+        haptic_response: Dict, 
+        used_vlm: bool
+    ) -> Dict[str, Any]:
+        """Record the exchange in history and build the response dict."""
+        self.conversation_history.append({
+            'query': user_query,
+            'response': description,
+            'cv_data': processed_cv,
+            'used_vlm': used_vlm
+        })
+        
+        # Keep only last 5 exchanges
+        if len(self.conversation_history) > 5:
+            self.conversation_history = self.conversation_history[-5:]
+        
+        return {
+            'text_response': description,
+            'haptic_feedback': haptic_response,
+            'safety_status': processed_cv['safety_status'],
+            'cv_summary': self._summarize_cv_data(processed_cv),
+            'used_vlm': used_vlm,
+            'follow_up_pending': False
+        }
+    
+    def observe_frame(self, frame: np.ndarray, cv_data: Dict):
+        """
+        Feed one frame of the live detection stream to background helpers.
+        
+        Called from the video thread for every frame, so it only does
+        constant-time bookkeeping; any Gemini work runs in the background.
+        
+        Args:
+            frame: Current camera frame
+            cv_data: Structured CV output for the frame
+        """
+        self.nav_tools.object_memory_tool(cv_data.get('objects', []), cv_data.get('timestamp'))
+        
+        if self.prefetcher is not None:
+            self.prefetcher.observe(frame, cv_data)
+    
+    def _get_prefetched(self, user_query: str, cv_data: Dict) -> Optional[str]:
+        """Fresh prefetched description for describe-style queries, if any."""
+        if self.prefetcher is None or not ScenePrefetcher.matches_query(user_query):
+            return None
+        
+        text = self.prefetcher.get_fresh(cv_data)
+        if text is not None:
+            print("[AGENT] Answering from prefetched scene description")
+            self.gemini_tool.remember_exchange(cv_data, user_query, text)
+        return text
+    
+    def stream_query(
+        self, 
+        user_query: str, 
+        image_frame: np.ndarray,
+        cv_data: Dict
+    ) -> Dict[str, Any]:
+        """
+        Process user query, streaming the answer sentence by sentence.
+        
+        Same response fields as process_query plus 'text_stream', an
+        iterator of sentences. 'text_response' and 'used_vlm' are filled in
+        once the stream has been consumed.
+        
+        Args:
+            user_query: User's spoken/typed query
+            image_frame: Current camera frame
+            cv_data: Structured CV detection data
+        
+        Returns:
+            Agent response with a sentence stream
+        """
+        try:
+            processed_cv = self.nav_tools.cv_perception_tool(cv_data)
+            haptic_response = self._check_safety_alerts(processed_cv)
+            local_answer = self._answer_without_vlm(user_query, processed_cv)
+            use_vlm = (
+                local_answer is None
+                and self._should_use_vlm(user_query)
+                and self.gemini_tool.is_available()
+                and not self.gemini_tool.is_circuit_open()
+            )
+        except Exception:
+            # process_query reports the error
+            response = self.process_query(user_query, image_frame, cv_data)
+            response['text_stream'] = iter([response['text_response']])
+            return response
+        
+        if not use_vlm:
+            # Local answers are instant - nothing to stream
+            if local_answer is None:
+                local_answer = MockResponseGenerator.generate_description(processed_cv, user_query)
+            response = self._build_response(
+                user_query, local_answer, processed_cv, haptic_response, False
+            )
+            response.update({'follow_up_pending': False, 'prefetched': False})
+            response['text_stream'] = iter([local_answer])
+            return response
+        
+        prefetched = self._get_prefetched(user_query, processed_cv)
+        if prefetched is not None:
+            response = self._build_response(
+                user_query, prefetched, processed_cv, haptic_response, True
+            )
+            response['prefetched'] = True
+            response['text_stream'] = iter([prefetched])
+            return response
+        
+        response = {
+            'text_response': "",
+            'haptic_feedback': haptic_response,
+            'safety_status': processed_cv['safety_status'],
+            'cv_summary': self._summarize_cv_data(processed_cv),
+            'used_vlm': True,
+            'follow_up_pending': False
+        }
+        response['text_stream'] = self._stream_with_deadline(
+            image_frame, processed_cv, user_query, response
+        )
+        return response
+    
+    def _stream_with_deadline(
+        self, 
+        image_frame: np.ndarray, 
+        cv_data: Dict, 
+        user_query: str,
+        response: Dict
+    ) -> Iterator[str]:
+        """
+        Yield Gemini sentences, falling back locally if the first is late.
+        
+        The Gemini stream is pumped on a background thread. If no sentence
+        arrives within vlm_deadline_s the rule-based answer is yielded
+        instead, and whatever Gemini produces inside the follow-up window
+        is handed to the follow-up handler. A stream that stalls for
+        vlm_call_timeout_s between sentences is cut off there, and the
+        tool's stream is closed so it can release its slot and count the
+        failure.
+        """
+        started_at = time.time()
+        sentences: queue.Queue = queue.Queue()
+        abandoned = threading.Event()
+        
+        def pump():
+            stream = self.gemini_tool.stream_description(image_frame, cv_data, user_query)
+            try:
+                for sentence in stream:
+                    if abandoned.is_set():
+                        break
+                    sentences.put(sentence)
+            finally:
+                # Closed on this thread (a running generator can't be closed from another)
+                stream.close()
+                sentences.put(None)
+        
+        threading.Thread(target=pump, name="gemini-stream", daemon=True).start()
+        
+        spoken = []
+        finished = False
+        first_timeout = settings.vlm_deadline_s if settings.vlm_deadline_s > 0 else settings.vlm_call_timeout_s
+        try:
+            first = sentences.get(timeout=first_timeout)
+        except queue.Empty:
+            print(f"[AGENT] No Gemini sentence within {first_timeout:.1f}s - answering locally")
+            fallback = MockResponseGenerator.generate_description(cv_data, user_query)
+            response.update({'used_vlm': False, 'follow_up_pending': self.follow_up_handler is not None})
+            # The follow-up collector owns the rest of the stream
+            self._collect_stream_follow_up(sentences, abandoned, user_query, started_at)
+            finished = True
+            spoken.append(fallback)
+            yield fallback
+        else:
+            item = first
+            while item is not None:
+                spoken.append(item)
+                yield item
+                try:
+                    item = sentences.get(timeout=settings.vlm_call_timeout_s)
+                except queue.Empty:
+                    print(f"[AGENT] Gemini stream stalled for {settings.vlm_call_timeout_s:.1f}s - cutting it off")
+                    break
+            else:
+                finished = True
+            
+            # The tool answers a failed call with its rule-based text
+            if isinstance(first, FallbackText):
+                response['used_vlm'] = False
+        finally:
+            if not finished:
+                # Stalled, or the caller stopped reading: have the pump close the stream
+                abandoned.set()
+            text = " ".join(spoken)
+            response['text_response'] = text
+            self.conversation_history.append({
+                'query': user_query,
+                'response': text,
+                'cv_data': cv_data,
+                'used_vlm': response['used_vlm']
+            })
+            del self.conversation_history[:-5]
+    
+    def _collect_stream_follow_up(
+        self, 
+        sentences: queue.Queue, 
+        abandoned: threading.Event,
+        user_query: str, 
+        started_at: float
+    ):
+        """Gather a late Gemini stream and deliver it if it completes in the window."""
+        cutoff = started_at + settings.vlm_deadline_s + settings.vlm_followup_window_s
+        
+        def collect():
+            parts = []
+            while True:
+                try:
+                    item = sentences.get(timeout=max(0.0, cutoff - time.time()))
+                except queue.Empty:
+                    print("[AGENT] Gemini stream missed follow-up window - dropped")
+                    abandoned.set()
+                    return
+                if item is None:
+                    break
+                parts.append(item)
+            
+            # A failed stream falls back to the local answer already given - don't repeat it
+            if not parts or isinstance(parts[0], FallbackText):
+                return
+            
+            future: Future = Future()
+            future.set_result(" ".join(parts))
+            self._schedule_follow_up(future, user_query, started_at)
+        
+        threading.Thread(target=collect, name="gemini-follow-up", daemon=True).start()
+    
+    def set_follow_up_handler(self, handler: Callable[[str], None]):
+        """
+        Register a callback for VLM answers that arrive after the deadline.
+        
+        The handler runs on the background event loop thread, so it must
+        not block (e.g. TTSEngine.speak with blocking=False).
+        
+        Args:
+            handler: Function called with the follow-up text
+        """
+        self.follow_up_handler = handler
+    
+    def _query_vlm_with_deadline(
+        self, 
+        image_frame: np.ndarray, 
+        cv_data: Dict, 
+        user_query: str
+    ) -> Tuple[str, bool, bool]:
+        """
+        Ask Gemini asynchronously and wait at most vlm_deadline_s.
+        
+        If the deadline passes, the rule-based answer is returned right
+        away and the Gemini answer is delivered to the follow-up handler
+        if it still arrives within vlm_followup_window_s.
+        
+        Returns:
+            Tuple of (description, used_vlm, follow_up_pending)
+        """
+        started_at = time.time()
+        future = run_coroutine(
+            self.gemini_tool.generate_description_async(image_frame, cv_data, user_query)
+        )
+        
+        try:
+            return future.result(timeout=settings.vlm_deadline_s), True, False
+        except FutureTimeoutError:
+            print(f"[AGENT] Gemini missed {settings.vlm_deadline_s:.1f}s deadline - answering locally")
+            self._schedule_follow_up(future, user_query, started_at)
+            pending = self.follow_up_handler is not None
+        except Exception as e:
+            print(f"[AGENT] Gemini failed ({e}) - answering locally")
+            pending = False
+        
+        return MockResponseGenerator.generate_description(cv_data, user_query), False, pending
+    
+    def _schedule_follow_up(self, future: Future, user_query: str, started_at: float):
+        """Deliver a late Gemini answer if it lands inside the follow-up window."""
+        cutoff = started_at + settings.vlm_deadline_s + settings.vlm_followup_window_s
+        
+        def deliver(done: Future):
+            if done.cancelled() or done.exception() is not None:
+                return
+            if time.time() > cutoff:
+                # Too late to speak, but the answer is cached for next time
+                print("[AGENT] Gemini answer arrived after follow-up window - dropped")
+                return
+            
+            text = done.result()
+            self.conversation_history.append({
+                'query': user_query,
+                'response': text,
+                'used_vlm': True,
+                'follow_up': True
+            })
+            del self.conversation_history[:-5]
+            if self.follow_up_handler is not None:
+                try:
+                    self.follow_up_handler(text)
+                except Exception as e:
+                    print(f"[AGENT] Error in follow-up handler: {e}")
+        
+        future.add_done_callback(deliver)
+    
     def _check_safety_alerts(self, cv_data: Dict) -> Dict:
         """Check for immediate safety hazards and generate haptic feedback."""
-        critical_alerts = cv_data.get('critical_alerts', [])
+        # Close obstacles plus anything looming fast (e.g. an approaching cyclist)
+        candidates = cv_data.get('critical_alerts', []) + cv_data.get('approaching', [])
         
-        if len(critical_alerts) > 0:
-            # Get closest obstacle
-            closest = critical_alerts[0]
+        if len(candidates) > 0:
+            # Most urgent = fewest seconds to contact
+            most_urgent = min(candidates, key=self.nav_tools.seconds_to_contact)
             return self.nav_tools.haptic_feedback_tool(
-                closest['distance_m'],
-                closest['position']
+                most_urgent['distance_m'],
+                most_urgent['position'],
+                most_urgent.get('ttc_s')
             )
         
         return {'enabled': False}
     
-    def _should_use_vlm(self, query: str) -> bool:
-        """Determine if query requires VLM processing."""
-        # Keywords that suggest need for detailed semantic understanding
-        vlm_keywords = [
-            'describe', 'what', 'where', 'how many', 'tell me about',
-            'explain', 'identify', 'recognize', 'scene', 'environment',
-            'see', 'look', 'show', 'detail', 'color', 'appearance'
-        ]
+    def _answer_without_vlm(self, user_query: str, cv_data: Dict) -> Optional[str]:
+        """Answers from local state: indoor routes, the current view, then object memory."""
+        route_answer = self._answer_from_route(user_query)
+        if route_answer is not None:
+            return route_answer
+        scene_answer = self._answer_from_scene(user_query, cv_data)
+        if scene_answer is not None:
+            return scene_answer
+        return self._answer_from_memory(user_query, cv_data)
+    
+    def _answer_from_route(self, user_query: str) -> Optional[str]:
+        """
+        Answer "how do I get to the elevator?" from the offline venue map.
+        
+        The route starts at the venue's default start unless the question
+        names one ("... to the elevator from the lobby"); the answer says
+        which, since the camera can't tell where the user is.
+        
+        Returns:
+            Turn-by-turn answer, or None if not a route question (or no venue)
+        """
+        intent = route_intent(user_query)
+        if 'route' not in intent.categories or not intent.target or not settings.venue_map_path:
+            return None
         
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in vlm_keywords)
+        destination, _, start = intent.target.partition(" from ")
+        route = self.nav_tools.route_planning_tool(start, destination)
+        if route['status'] != 'ok':
+            return route.get('message')
+        
+        print(f"[AGENT] Route to {destination} planned in {route['planning_ms']:.2f}ms{' (cached)' if route['cached'] else ''}")
+        return (
+            f"From the {route['start_label']}, the {route['destination_label']} is about "
+            f"{route['estimated_distance']:.0f} meters away. " + route['text']
+        )
+    
+    def _answer_from_scene(self, user_query: str, cv_data: Dict) -> Optional[str]:
+        """
+        Answer "where is the chair?" / "how far is the car?" from the detections.
+        
+        Returns:
+            Answer text, or None if the target is not a detected object
+            with a known distance (the VLM may still recognize it)
+        """
+        intent = route_intent(user_query)
+        if intent.name not in OBJECT_QUERY_CATEGORIES or not intent.target:
+            return None
+        
+        obj = SceneIndex.of(cv_data).find(intent.target)
+        if obj is None or obj['distance_m'] <= 0:
+            return None
+        
+        where = {'left': "on your left", 'right': "on your right"}.get(obj['position'], "ahead of you")
+        return f"The {obj['class']} is {where}, about {obj['distance_m']:.1f} meters away."
+    
+    def _answer_from_memory(self, user_query: str, cv_data: Dict) -> Optional[str]:
+        """
+        Answer "where was the door?" from object memory (no VLM call).
+        
+        Past-tense questions always use memory; "where is the X?" only
+        when X is not in the current view.
+        
+        Returns:
+            Answer text, or None if memory doesn't apply
+        """
+        intent = route_intent(user_query)
+        past_tense = 'recall' in intent.categories
+        if not past_tense and not intent.categories & OBJECT_QUERY_CATEGORIES:
+            return None
+        
+        class_name = self.nav_tools.object_memory.match_class(intent.target or user_query)
+        if class_name is None:
+            return "I don't remember seeing that recently." if past_tense else None
+        
+        if not past_tense and any(obj['class'] == class_name for obj in cv_data.get('objects', [])):
+            return None
+        
+        sighting = self.nav_tools.object_memory_tool(recall_class=class_name)['last_seen']
+        if sighting is None:
+            return f"I haven't seen a {class_name} recently." if past_tense else None
+        
+        where = {'left': "on your left", 'right': "on your right"}.get(sighting['position'], "ahead of you")
+        ago = time.time() - sighting['timestamp']
+        ago_text = f"{ago:.0f} seconds ago" if ago < 90 else f"{ago / 60:.0f} minutes ago"
+        distance_text = f", about {sighting['distance_m']:.1f} meters away" if sighting['distance_m'] > 0 else ""
+        return f"I last saw a {class_name} {where}{distance_text}, {ago_text}."
+    
+    def _should_use_vlm(self, query: str) -> bool:
+        """Determine if query requires VLM processing (walking directions stay local)."""
+        return route_intent(query).use_vlm
     
     def _summarize_cv_data(self, cv_data: Dict) -> Dict:
         """Create summary of CV data for UI display."""
@@ -136,15 +558,8 @@ class LocalNavigationAgent(AgentInterface):
     
     def _group_objects_by_position(self, cv_data: Dict) -> Dict:
         """Group objects by position for easy UI display."""
-        objects = cv_data.get('objects', [])
-        grouped = {'left': [], 'center': [], 'right': []}
-        
-        for obj in objects:
-            pos = obj.get('position', 'center')
-            if pos in grouped:
-                grouped[pos].append(obj['class'])
-        
-        return grouped
+        by_position = SceneIndex.of(cv_data).classes_by_position
+        return {position: list(classes) for position, classes in by_position.items()}
     
     def get_conversation_history(self) -> List[Dict]:
         """Get conversation history."""
@@ -153,5 +568,18 @@ class LocalNavigationAgent(AgentInterface):
     def clear_history(self):
         """Clear conversation history."""
         self.conversation_history = []
+        self.gemini_tool.clear_history()
         print("Conversation history cleared")
 
+
+def create_agent() -> AgentInterface:
+    """
+    Create the agent for the configured backend.
+    
+    Returns:
+        LocalNavigationAgent (Gemini) or OfflineLLMAgent (AGENT_BACKEND=offline_llm)
+    """
+    if settings.agent_backend == 'offline_llm':
+        from src.cloud_agent.offline_agent import OfflineLLMAgent
+        return OfflineLLMAgent()
+    return LocalNavigationAgent()
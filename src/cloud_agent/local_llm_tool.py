@@ -0,0 +1,267 @@
+"""
+Offline language model tool (llama.cpp on CPU).
+
+A drop-in for GeminiVLMTool when there is no network. A small quantized
+instruct model is loaded once at startup and answers from the compact CV
+context only (no image). The prompt is kept inside a fixed context
+window, and tokens are streamed sentence by sentence, so latency depends
+only on the device.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Iterator, List
+import numpy as np
+from config.settings import settings
+from src.cloud_agent.chat_session import ChatSession, estimate_tokens
+from src.cloud_agent.gemini_tool import split_sentences
+from src.cloud_agent.mock_responses import FallbackText, MockResponseGenerator
+from src.cloud_agent.scene_index import SceneIndex
+
+
+class LocalLLMTool:
+    """Quantized local LLM (llama-cpp-python) with the GeminiVLMTool call surface."""
+    
+    def __init__(self, model_path: str = None):
+        """
+        Load the model (lazy import of llama_cpp).
+        
+        Args:
+            model_path: GGUF model file (defaults to local_llm_model_path)
+        """
+        self.model_path = model_path or settings.local_llm_model_path
+        self.model = None
+        self.available = False
+        
+        # llama.cpp contexts are not thread-safe: one generation at a time
+        self._lock = threading.Lock()
+        
+        # Short system prompt: small models follow brief instructions better,
+        # and a fixed prefix lets llama.cpp reuse its KV cache between calls
+        self.system_prompt = (
+            "You help a visually impaired person navigate. You cannot see the image; "
+            "you are given the objects detected by computer vision. Answer in at most "
+            "two short sentences, mention hazards first, and use left, right, ahead and "
+            "distances in meters. Do not invent objects that are not listed."
+        )
+        
+        # History shares the window with the system prompt, the new turn and the answer
+        turn_budget = settings.context_max_chars // 4 + 32
+        history_budget = (
+            settings.local_llm_context_tokens
+            - settings.local_llm_max_tokens
+            - estimate_tokens(self.system_prompt)
+            - turn_budget
+        )
+        self.chat = ChatSession(max_tokens=max(0, min(history_budget, settings.vlm_history_max_tokens)))
+        
+        self.calls = 0
+        self.total_tokens = 0
+        self.total_time_s = 0.0
+        self.first_token_ms: List[float] = []
+        
+        if not self.model_path:
+            print("[LLM] No LOCAL_LLM_MODEL_PATH set. Using mock responses.")
+            return
+        
+        try:
+            from llama_cpp import Llama
+            start_time = time.time()
+            self.model = Llama(
+                model_path=self.model_path,
+                n_ctx=settings.local_llm_context_tokens,
+                n_threads=settings.local_llm_threads or None,
+                verbose=False
+            )
+            self.available = True
+            print(f"[LLM] Loaded {self.model_path} in {time.time() - start_time:.1f}s")
+        except ImportError:
+            print("Warning: llama-cpp-python not installed. Using mock responses.")
+        except Exception as e:
+            print(f"Warning: Could not load local LLM: {e}")
+            print("Using mock responses instead.")
+    
+    def is_available(self) -> bool:
+        """Check if the local model is loaded."""
+        return self.available
+    
+    def is_circuit_open(self) -> bool:
+        """Local inference has no remote API to trip a breaker."""
+        return False
+    
+    def generate_description(
+        self,
+        image: np.ndarray,
+        structured_cv_data: Dict,
+        user_query: str = "Describe what you see"
+    ) -> str:
+        """
+        Generate a description from the CV context.
+        
+        Args:
+            image: Image frame (unused; the model is text-only)
+            structured_cv_data: Structured CV output from edge detector
+            user_query: User's question or request
+        
+        Returns:
+            Natural language description
+        """
+        return " ".join(self.stream_description(image, structured_cv_data, user_query))
+    
+    async def generate_description_async(
+        self,
+        image: np.ndarray,
+        structured_cv_data: Dict,
+        user_query: str = "Describe what you see",
+        remember: bool = True
+    ) -> str:
+        """
+        Generate a description on a worker thread (errors are raised).
+        
+        Args:
+            image: Image frame (unused; the model is text-only)
+            structured_cv_data: Structured CV output from edge detector
+            user_query: User's question or request
+            remember: Add the exchange to the chat history
+        
+        Returns:
+            Natural language description
+        """
+        if not self.available:
+            raise RuntimeError("Local LLM not available")
+        
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(None, self._generate_text, structured_cv_data, user_query)
+        if remember:
+            self.remember_exchange(structured_cv_data, user_query, text)
+        return text
+    
+    def stream_description(
+        self,
+        image: np.ndarray,
+        structured_cv_data: Dict,
+        user_query: str = "Describe what you see"
+    ) -> Iterator[str]:
+        """
+        Stream a description sentence by sentence as tokens are generated.
+        
+        Args:
+            image: Image frame (unused; the model is text-only)
+            structured_cv_data: Structured CV output from edge detector
+            user_query: User's question or request
+        
+        Yields:
+            Complete sentences
+        """
+        if not self.available:
+            yield FallbackText(MockResponseGenerator.generate_description(structured_cv_data, user_query))
+            return
+        
+        sentences = []
+        tokens = self._generate(structured_cv_data, user_query)
+        try:
+            buffer = ""
+            for token in tokens:
+                buffer += token
+                complete, buffer = split_sentences(buffer)
+                for sentence in complete:
+                    sentences.append(sentence)
+                    yield sentence
+            
+            complete, _ = split_sentences(buffer, final=True)
+            for sentence in complete:
+                sentences.append(sentence)
+                yield sentence
+            
+            self.remember_exchange(structured_cv_data, user_query, " ".join(sentences))
+        
+        except Exception as e:
+            print(f"Error in local LLM generation: {e}")
+            if not sentences:
+                print("Falling back to mock responses.")
+                yield FallbackText(MockResponseGenerator.generate_description(structured_cv_data, user_query))
+        finally:
+            # Consumer gave up (or finished): end generation and free the model now
+            tokens.close()
+    
+    def remember_exchange(self, cv_data: Dict, user_query: str, answer: str):
+        """
+        Add an exchange to the chat history.
+        
+        Args:
+            cv_data: Structured CV output the answer refers to
+            user_query: User's question
+            answer: Answer text
+        """
+        self.chat.add_exchange(self._format_turn(cv_data, user_query), answer)
+    
+    def clear_history(self):
+        """Start a fresh chat (drop all prior turns)."""
+        self.chat.clear()
+    
+    def _generate_text(self, cv_data: Dict, user_query: str) -> str:
+        """Full answer text (blocking)."""
+        return "".join(self._generate(cv_data, user_query)).strip()
+    
+    def _generate(self, cv_data: Dict, user_query: str) -> Iterator[str]:
+        """
+        Stream answer tokens for one turn.
+        
+        Holds the model lock while generating; callers that stop early must
+        close() the generator so the lock is released right away rather
+        than whenever it is garbage collected.
+        """
+        messages = [{'role': 'system', 'content': self.system_prompt}]
+        for turn in self.chat.build_contents([self._format_turn(cv_data, user_query)]):
+            role = 'assistant' if turn['role'] == 'model' else 'user'
+            messages.append({'role': role, 'content': "\n".join(turn['parts'])})
+        
+        self._lock.acquire()
+        stream = None
+        try:
+            started = time.time()
+            tokens = 0
+            stream = self.model.create_chat_completion(
+                messages=messages,
+                max_tokens=settings.local_llm_max_tokens,
+                temperature=settings.local_llm_temperature,
+                stream=True
+            )
+            for chunk in stream:
+                text = chunk['choices'][0]['delta'].get('content')
+                if not text:
+                    continue
+                if tokens == 0:
+                    self.first_token_ms.append((time.time() - started) * 1000)
+                    del self.first_token_ms[:-50]
+                tokens += 1
+                yield text
+            
+            self.calls += 1
+            self.total_tokens += tokens
+            self.total_time_s += time.time() - started
+        finally:
+            # Stops llama.cpp decoding further tokens nobody will read
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
+            self._lock.release()
+    
+    def _format_turn(self, cv_data: Dict, user_query: str) -> str:
+        """Text of a user turn: CV context plus query."""
+        return f"""DETECTED OBJECTS:
+{SceneIndex.of(cv_data).scene_context()}
+
+QUESTION: {user_query}"""
+
+    def get_stats(self) -> Dict:
+        """Get generation speed counters."""
+        if not self.calls:
+            return {'calls': 0, 'history': self.chat.get_stats()}
+        
+        recent = sorted(self.first_token_ms)
+        return {
+            'calls': self.calls,
+            'tokens_per_s': round(self.total_tokens / self.total_time_s, 1) if self.total_time_s else 0.0,
+            'first_token_ms_p50': round(recent[len(recent) // 2], 1) if recent else 0.0,
+            'history': self.chat.get_stats()
+        }
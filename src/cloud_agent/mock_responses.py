@@ -4,11 +4,23 @@ Provides fallback rule-based responses.
 """
 from typing import Dict, List
 import random
+from src.cloud_agent.intent_router import route_intent
+from src.cloud_agent.scene_index import SceneIndex
+from src.cloud_agent.tools import NavigationTools
+
+
+class FallbackText(str):
+    """Rule-based answer a VLM tool yields in place of a model answer."""
 
 
 class MockResponseGenerator:
     """Generate mock responses based on CV data and query patterns."""
     
+    @staticmethod
+    def is_navigation_query(user_query: str) -> bool:
+        """Check if the query asks for a walking direction."""
+        return 'navigation' in route_intent(user_query).categories
+    
     @staticmethod
     def generate_description(cv_data: Dict, user_query: str = "") -> str:
         """
@@ -25,19 +37,23 @@ class MockResponseGenerator:
         objects = cv_data.get('objects', [])
         safety_status = cv_data.get('safety_status', 'UNKNOWN')
         
-        # Check query type
-        query_lower = user_query.lower()
+        # Check query type (one routing pass, shared with the agent)
+        categories = route_intent(user_query).categories
+        
+        # Navigation queries ("which direction is clear?") before safety keywords
+        if 'navigation' in categories:
+            return NavigationTools.free_space_tool(cv_data)['text']
         
         # Safety check queries
-        if any(word in query_lower for word in ['safe', 'clear', 'walk', 'move']):
+        if 'safety' in categories:
             return MockResponseGenerator._safety_response(cv_data)
         
         # Description queries
-        if any(word in query_lower for word in ['describe', 'what', 'see', 'scene']):
+        if categories & {'scene', 'describe'}:
             return MockResponseGenerator._scene_description(cv_data)
         
         # Object location queries
-        if any(word in query_lower for word in ['where', 'find', 'locate']):
+        if categories & {'distance', 'locate', 'where', 'find', 'recall'}:
             return MockResponseGenerator._location_response(cv_data, user_query)
         
         # Default: brief summary
@@ -55,6 +71,19 @@ class MockResponseGenerator:
                 f"Caution! There is a {closest['class']} only {closest['distance_m']:.1f} meters away "
                 f"on your {closest['position']}. Please move carefully."
             )
+        elif cv_data.get('approaching'):
+            fastest = cv_data['approaching'][0]
+            ttc_s = fastest['ttc_s']
+            when = "and could reach you any moment now" if ttc_s < 1.0 else f"about {ttc_s:.1f} seconds away"
+            return (
+                f"Watch out! A {fastest['class']} on your {fastest['position']} is approaching, "
+                f"{when}."
+            )
+        elif (cv_data.get('path_depth') or {}).get('blocked'):
+            return (
+                "Careful. Something close is directly ahead that I can't identify, "
+                "possibly a wall or step. Please check with your cane."
+            )
         elif num_objects == 0:
             return "The path ahead appears clear. No obstacles detected within range."
         else:
@@ -70,42 +99,26 @@ class MockResponseGenerator:
     @staticmethod
     def _scene_description(cv_data: Dict) -> str:
         """Generate scene description."""
-        num_objects = cv_data.get('num_objects', 0)
-        objects = cv_data.get('objects', [])
+        scene = SceneIndex.of(cv_data)
+        num_objects = scene.num_objects
         
         if num_objects == 0:
             return "I don't see any objects in the current view. The area appears open."
         
-        # Group objects by position
-        left_objects = [o for o in objects if o['position'] == 'left']
-        center_objects = [o for o in objects if o['position'] == 'center']
-        right_objects = [o for o in objects if o['position'] == 'right']
-        
         parts = []
         
-        if center_objects:
-            obj = center_objects[0]
-            parts.append(
-                f"Directly ahead, there's a {obj['class']} at {obj['distance_m']:.1f} meters"
-            )
+        if scene.by_position['center']:
+            parts.append(f"Directly ahead, there's a {scene.phrase(scene.by_position['center'][0])}")
         
-        if left_objects:
-            obj = left_objects[0]
-            parts.append(
-                f"on your left, a {obj['class']} at {obj['distance_m']:.1f} meters"
-            )
+        if scene.by_position['left']:
+            parts.append(f"on your left, a {scene.phrase(scene.by_position['left'][0])}")
         
-        if right_objects:
-            obj = right_objects[0]
-            parts.append(
-                f"on your right, a {obj['class']} at {obj['distance_m']:.1f} meters"
-            )
+        if scene.by_position['right']:
+            parts.append(f"on your right, a {scene.phrase(scene.by_position['right'][0])}")
         
-        if not parts:
-            obj = objects[0]
-            parts.append(
-                f"I see a {obj['class']} at {obj['distance_m']:.1f} meters to your {obj['position']}"
-            )
+        if not parts and scene.nearest:
+            obj = scene.nearest
+            parts.append(f"I see a {scene.phrase(obj)} to your {obj['position']}")
         
         description = "I can see: " + ", ".join(parts) + "."
         
@@ -117,43 +130,34 @@ class MockResponseGenerator:
     @staticmethod
     def _location_response(cv_data: Dict, query: str) -> str:
         """Generate location-based response."""
-        objects = cv_data.get('objects', [])
+        scene = SceneIndex.of(cv_data)
         
-        if not objects:
+        if scene.nearest is None:
             return "I don't see any objects matching your query in the current view."
         
-        # Try to find object mentioned in query
-        query_words = query.lower().split()
-        for obj in objects:
-            if obj['class'].lower() in query_words or any(word in obj['class'].lower() for word in query_words):
-                return (
-                    f"I found a {obj['class']} at {obj['distance_m']:.1f} meters "
-                    f"on your {obj['position']}."
-                )
+        # Object mentioned in query ("where is the chair" -> nearest chair)
+        obj = scene.find(route_intent(query).target or query)
+        if obj is not None:
+            return f"I found a {scene.phrase(obj)} on your {obj['position']}."
         
         # Return nearest object
-        closest = objects[0]
-        return (
-            f"The nearest object is a {closest['class']} at {closest['distance_m']:.1f} meters "
-            f"on your {closest['position']}."
-        )
+        closest = scene.nearest
+        return f"The nearest object is a {scene.phrase(closest)} on your {closest['position']}."
     
     @staticmethod
     def _brief_summary(cv_data: Dict) -> str:
         """Generate brief summary."""
-        num_objects = cv_data.get('num_objects', 0)
+        scene = SceneIndex.of(cv_data)
+        num_objects = scene.num_objects
         safety_status = cv_data.get('safety_status', 'UNKNOWN')
         
         if num_objects == 0:
             return "No objects detected in the current view."
         
-        objects = cv_data.get('objects', [])
-        closest = objects[0] if objects else None
-        
-        if closest:
+        if scene.nearest:
             return (
                 f"I detect {num_objects} object(s). "
-                f"Closest is a {closest['class']} at {closest['distance_m']:.1f} meters. "
+                f"Closest is a {scene.phrase(scene.nearest)}. "
                 f"Status: {safety_status}"
             )
         
@@ -0,0 +1,359 @@
+"""
+Spatio-temporal object memory.
+
+Sightings (class, track, position, distance, time) are written into a
+fixed-size ring buffer. Dict indexes point at the newest sighting per
+class and per track, so "last seen chair" is O(1). Sightings are kept in
+time order (a late write from another session is slotted in behind newer
+ones), so time-range scans are a binary search over the ring. Track ids
+come from each session's own tracker, so track and object identities are
+namespaced by the session (source) that recorded them. Old sightings
+expire by TTL, and the store can be snapshotted to JSON so memory
+survives a restart.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+
+
+# Distance change (meters) that counts as a new sighting
+DISTANCE_BUCKET_M = 0.5
+
+# Other words users say for detector classes
+CLASS_ALIASES = {'person': ['people', 'someone', 'somebody'], 'dining table': ['table'], 'tv': ['television']}
+
+
+class ObjectMemory:
+    """Fixed-size ring store of object sightings with per-class/per-track indexes."""
+    
+    # Persistent stores, one per snapshot file (shared by all sessions)
+    _shared: Dict[str, "ObjectMemory"] = {}
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, capacity: int = None, ttl_s: float = None, snapshot_path: str = None):
+        """
+        Initialize memory.
+        
+        Args:
+            capacity: Number of sightings kept (oldest overwritten first)
+            ttl_s: Seconds a sighting stays valid
+            snapshot_path: JSON file to load from / snapshot to ("" = off)
+        """
+        self.capacity = capacity or settings.object_memory_capacity
+        self.ttl_s = ttl_s or settings.object_memory_ttl_s
+        self.min_interval_s = settings.object_memory_min_interval_s
+        self.snapshot_path = settings.object_memory_snapshot_path if snapshot_path is None else snapshot_path
+        
+        self._records: List[Optional[Dict]] = [None] * self.capacity
+        self._next_seq = 0
+        
+        # Indexes hold sequence numbers; a slot overwritten by the ring no longer matches
+        self._last_by_class: Dict[str, int] = {}
+        self._last_by_track: Dict[Tuple[str, int], int] = {}
+        self._last_by_key: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        
+        self._last_prune = 0.0
+        self._last_snapshot = time.time()
+        
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            self.load(self.snapshot_path)
+    
+    @classmethod
+    def for_session(cls) -> "ObjectMemory":
+        """
+        Get the object memory for a new session.
+        
+        With a snapshot path, all sessions share one store, so they don't
+        each load the file and race on writing it; otherwise every session
+        gets its own.
+        
+        Returns:
+            Object memory
+        """
+        path = settings.object_memory_snapshot_path
+        if not path:
+            return cls()
+        with cls._shared_lock:
+            if path not in cls._shared:
+                cls._shared[path] = cls(snapshot_path=path)
+            return cls._shared[path]
+    
+    def record(self, objects: List[Dict], timestamp: float = None, source: str = '') -> int:
+        """
+        Record the objects seen in one frame.
+        
+        An object is only written when it is new, has moved to another
+        position or distance bucket, or min_interval_s has passed, so a
+        static scene doesn't flood the ring.
+        
+        Args:
+            objects: Detections from the structured CV output
+            timestamp: Frame timestamp (defaults to now)
+            source: Recording session (track ids are only unique within it)
+        
+        Returns:
+            Number of sightings written
+        """
+        timestamp = timestamp or time.time()
+        written = 0
+        
+        with self._lock:
+            for obj in objects:
+                key = self._object_key(obj, source)
+                previous = self._get(self._last_by_key.get(key))
+                if previous is not None and not self._changed(previous, obj, timestamp):
+                    continue
+                
+                written += self._write({
+                    'class': obj['class'],
+                    'track_id': obj.get('track_id'),
+                    'source': source,
+                    'position': obj.get('position', 'center'),
+                    'bearing_deg': obj.get('bearing_deg'),
+                    'distance_m': obj.get('distance_m', -1),
+                    'timestamp': timestamp
+                }, key)
+        
+        if timestamp - self._last_prune > 1.0:
+            self._prune(timestamp)
+        
+        return written
+    
+    def last_seen(self, class_name: str) -> Optional[Dict]:
+        """
+        Most recent sighting of a class (O(1)).
+        
+        Args:
+            class_name: Detector class name (e.g. 'door', 'chair')
+        
+        Returns:
+            Sighting dict or None if not seen within the TTL
+        """
+        with self._lock:
+            return self._fresh(self._get(self._last_by_class.get(class_name)))
+    
+    def last_seen_track(self, track_id: int, source: str = '') -> Optional[Dict]:
+        """Most recent sighting of one session's tracked object (O(1))."""
+        with self._lock:
+            return self._fresh(self._get(self._last_by_track.get((source, track_id))))
+    
+    def between(self, start: float, end: float = None, class_name: str = None) -> List[Dict]:
+        """
+        Sightings in a time range, oldest first.
+        
+        Args:
+            start: Range start (epoch seconds)
+            end: Range end (defaults to now)
+            class_name: Only this class
+        
+        Returns:
+            Matching sightings
+        """
+        end = time.time() if end is None else end
+        start = max(start, time.time() - self.ttl_s)
+        
+        with self._lock:
+            seq = self._first_at_or_after(start)
+            results = []
+            while seq < self._next_seq:
+                record = self._records[seq % self.capacity]
+                if record['timestamp'] > end:
+                    break
+                if class_name is None or record['class'] == class_name:
+                    results.append(dict(record))
+                seq += 1
+        return results
+    
+    def recent(self, seconds: float, class_name: str = None) -> List[Dict]:
+        """Sightings in the last N seconds."""
+        return self.between(time.time() - seconds, class_name=class_name)
+    
+    def match_class(self, text: str) -> Optional[str]:
+        """
+        Find a remembered class named in a query ("where was the door?").
+        
+        Args:
+            text: User query
+        
+        Returns:
+            Class name (longest match wins) or None
+        """
+        text_lower = text.lower()
+        with self._lock:
+            classes = sorted(self._last_by_class, key=len, reverse=True)
+        for class_name in classes:
+            names = [class_name.lower(), *CLASS_ALIASES.get(class_name, [])]
+            if any(re.search(rf"\b{re.escape(name)}(e?s)?\b", text_lower) for name in names):
+                return class_name
+        return None
+    
+    def snapshot(self, path: str = None):
+        """
+        Write live sightings to a JSON file.
+        
+        Args:
+            path: Target file (defaults to snapshot_path)
+        """
+        path = path or self.snapshot_path
+        records = self.between(0.0)
+        tmp_path = f"{path}.tmp"
+        with self._snapshot_lock:
+            with open(tmp_path, 'w') as f:
+                json.dump({'saved_at': time.time(), 'records': records}, f)
+            os.replace(tmp_path, path)
+    
+    def load(self, path: str):
+        """
+        Load sightings from a JSON snapshot (expired ones are skipped).
+        
+        Args:
+            path: Snapshot file
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[MEMORY] Could not load snapshot {path}: {e}")
+            return
+        
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            for record in sorted(data.get('records', []), key=lambda r: r['timestamp']):
+                if record['timestamp'] >= cutoff:
+                    record.pop('seq', None)
+                    # Snapshots from before sessions were namespaced
+                    record.setdefault('source', 'restored')
+                    self._write(record, self._object_key(record, record['source']))
+        print(f"[MEMORY] Loaded {len(self._last_by_key)} remembered objects from {path}")
+    
+    def clear(self):
+        """Forget everything."""
+        with self._lock:
+            self._records = [None] * self.capacity
+            self._next_seq = 0
+            self._last_by_class.clear()
+            self._last_by_track.clear()
+            self._last_by_key.clear()
+    
+    def _write(self, record: Dict, key: str) -> bool:
+        """
+        Insert a sighting in time order and update the indexes (lock held).
+        
+        Sessions share the store and their frames interleave, so a sighting
+        can be older than the newest one; the few newer sightings are
+        shifted up one slot to keep the ring sorted for the binary search.
+        
+        Returns:
+            False if the sighting is older than everything in a full ring
+        """
+        oldest = max(0, self._next_seq - self.capacity)
+        seq = self._next_seq
+        while seq > oldest and self._records[(seq - 1) % self.capacity]['timestamp'] > record['timestamp']:
+            seq -= 1
+        if seq == oldest and self._next_seq >= self.capacity:
+            return False
+        
+        for moved_seq in range(self._next_seq - 1, seq - 1, -1):
+            moved = self._records[moved_seq % self.capacity]
+            moved['seq'] = moved_seq + 1
+            self._records[(moved_seq + 1) % self.capacity] = moved
+            for index, index_key in self._index_entries(moved):
+                if index.get(index_key) == moved_seq:
+                    index[index_key] = moved_seq + 1
+        
+        record['seq'] = seq
+        self._records[seq % self.capacity] = record
+        self._next_seq += 1
+        
+        # Indexes point at the newest sighting, which a late write may not be
+        for index, index_key in self._index_entries(record, key):
+            current = self._get(index.get(index_key))
+            if current is None or current['timestamp'] <= record['timestamp']:
+                index[index_key] = seq
+        return True
+    
+    def _index_entries(self, record: Dict, key: str = None) -> List[Tuple[Dict, object]]:
+        """The (index, key) pairs a sighting is filed under."""
+        entries = [
+            (self._last_by_class, record['class']),
+            (self._last_by_key, key or self._object_key(record, record.get('source', '')))
+        ]
+        if record.get('track_id') is not None:
+            entries.append((self._last_by_track, (record.get('source', ''), record['track_id'])))
+        return entries
+    
+    def _get(self, seq: Optional[int]) -> Optional[Dict]:
+        """Sighting by sequence number, unless the ring has overwritten it."""
+        if seq is None:
+            return None
+        record = self._records[seq % self.capacity]
+        return record if record is not None and record['seq'] == seq else None
+    
+    def _fresh(self, record: Optional[Dict]) -> Optional[Dict]:
+        """Copy of a sighting if it is within the TTL."""
+        if record is None or time.time() - record['timestamp'] > self.ttl_s:
+            return None
+        return dict(record)
+    
+    def _first_at_or_after(self, timestamp: float) -> int:
+        """Binary search the ring (time-ordered) for the first sighting at/after a time."""
+        low, high = max(0, self._next_seq - self.capacity), self._next_seq
+        while low < high:
+            mid = (low + high) // 2
+            if self._records[mid % self.capacity]['timestamp'] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+    
+    def _changed(self, previous: Dict, obj: Dict, timestamp: float) -> bool:
+        """Whether a detection is worth a new sighting."""
+        if timestamp - previous['timestamp'] >= self.min_interval_s:
+            return True
+        if previous['position'] != obj.get('position', 'center'):
+            return True
+        return int(previous['distance_m'] // DISTANCE_BUCKET_M) != int(obj.get('distance_m', -1) // DISTANCE_BUCKET_M)
+    
+    def _prune(self, now: float):
+        """Drop expired index entries; snapshot periodically if enabled."""
+        self._last_prune = now
+        cutoff = now - self.ttl_s
+        with self._lock:
+            for index in (self._last_by_class, self._last_by_track, self._last_by_key):
+                stale = [k for k, seq in index.items() if (self._get(seq) or {'timestamp': 0.0})['timestamp'] < cutoff]
+                for k in stale:
+                    del index[k]
+        
+        if self.snapshot_path and now - self._last_snapshot > settings.object_memory_snapshot_interval_s:
+            self._last_snapshot = now
+            # File I/O off the video thread
+            threading.Thread(target=self._snapshot_quietly, daemon=True).start()
+    
+    def _snapshot_quietly(self):
+        """Background snapshot that only logs failures."""
+        try:
+            self.snapshot()
+        except OSError as e:
+            print(f"[MEMORY] Snapshot failed: {e}")
+    
+    @staticmethod
+    def _object_key(obj: Dict, source: str) -> str:
+        """Stable identity for an object across one session's frames."""
+        if obj.get('track_id') is not None:
+            return f"{source}/track:{obj['track_id']}"
+        return f"{source}/{obj['class']}:{obj.get('position', 'center')}"
+    
+    def get_stats(self) -> Dict:
+        """Get memory size counters."""
+        return {
+            'sightings': min(self._next_seq, self.capacity),
+            'total_written': self._next_seq,
+            'classes': len(self._last_by_class),
+            'tracks': len(self._last_by_track)
+        }
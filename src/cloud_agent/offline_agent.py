@@ -0,0 +1,18 @@
+"""
+Fully offline navigation agent.
+
+Same orchestration as LocalNavigationAgent (safety alerts, object memory,
+routes, deadline and streaming), but semantic answers come from a small
+quantized LLM on the CPU instead of Gemini, so it needs no network.
+"""
+from src.cloud_agent.local_agent import LocalNavigationAgent
+from src.cloud_agent.local_llm_tool import LocalLLMTool
+
+
+class OfflineLLMAgent(LocalNavigationAgent):
+    """Navigation agent backed by a local llama.cpp model."""
+    
+    def __init__(self):
+        """Load the local model and initialize tools."""
+        # No prefetching: speculative descriptions would compete with the detector for CPU
+        super().__init__(vlm_tool=LocalLLMTool(), prefetch=False)
@@ -0,0 +1,150 @@
+"""
+Speculative background scene descriptions.
+
+Watches the detection stream and, when the scene changes materially and
+then holds still for a moment, asks Gemini for a description in the
+background (within a rate budget). "What do you see?" style queries can
+then be answered instantly from the prefetched text while it is fresh.
+"""
+import time
+from collections import deque
+from typing import Dict, Optional
+import numpy as np
+from config.settings import settings
+from src.cloud_agent.async_runtime import run_coroutine
+from src.cloud_agent.intent_router import route_intent
+from src.cloud_agent.response_cache import scene_signature
+
+
+# Query used for speculative descriptions
+PREFETCH_QUERY = "Describe what you see"
+
+
+class ScenePrefetcher:
+    """Precompute scene descriptions when the scene settles after a change."""
+    
+    def __init__(self, gemini_tool):
+        """
+        Initialize prefetcher.
+        
+        Args:
+            gemini_tool: GeminiVLMTool used for background descriptions
+        """
+        self.gemini_tool = gemini_tool
+        
+        # Scene currently settling (objects-only signature, cheap per frame)
+        self._candidate_signature = None
+        self._candidate_since = 0.0
+        
+        self._last_requested_signature = None
+        self._in_flight = None
+        self._request_times = deque()
+        
+        # Latest completed prefetch: {'signature', 'text', 'timestamp'}
+        self.latest: Optional[Dict] = None
+        
+        self.prefetches_started = 0
+        self.prefetch_hits = 0
+    
+    @staticmethod
+    def matches_query(user_query: str) -> bool:
+        """Check if a query can be answered by a prefetched description."""
+        return 'scene' in route_intent(user_query).categories
+    
+    def observe(self, frame: np.ndarray, cv_data: Dict):
+        """
+        Feed one frame of the detection stream (called from the video thread).
+        
+        Only compares a small signature tuple per frame; the Gemini call
+        runs on the shared background event loop.
+        
+        Args:
+            frame: Current camera frame
+            cv_data: Structured CV output for the frame
+        """
+        if not self.gemini_tool.is_available() or self.gemini_tool.is_circuit_open():
+            return
+        
+        now = time.time()
+        signature = self._signature(cv_data)
+        
+        if signature != self._candidate_signature:
+            # Scene changed: start waiting for it to settle
+            self._candidate_signature = signature
+            self._candidate_since = now
+            return
+        
+        if now - self._candidate_since < settings.prefetch_stable_s:
+            return
+        if signature == self._last_requested_signature:
+            return
+        if self._in_flight is not None and not self._in_flight.done():
+            return
+        if not self._within_budget(now):
+            return
+        
+        self._start_prefetch(frame, cv_data, signature, now)
+    
+    def get_fresh(self, cv_data: Dict, max_age_s: float = None) -> Optional[str]:
+        """
+        Get the prefetched description if it still matches the scene.
+        
+        Args:
+            cv_data: Current structured CV output
+            max_age_s: Maximum age of the prefetched text
+        
+        Returns:
+            Description text or None
+        """
+        max_age_s = settings.prefetch_max_age_s if max_age_s is None else max_age_s
+        latest = self.latest
+        if latest is None or time.time() - latest['timestamp'] > max_age_s:
+            return None
+        if latest['signature'] != self._signature(cv_data):
+            return None
+        
+        self.prefetch_hits += 1
+        return latest['text']
+    
+    def _start_prefetch(self, frame: np.ndarray, cv_data: Dict, signature, now: float):
+        """Kick off a background description for a settled scene."""
+        self._last_requested_signature = signature
+        self._request_times.append(now)
+        self.prefetches_started += 1
+        print(f"[PREFETCH] Scene settled ({len(signature)} objects) - prefetching description")
+        
+        future = run_coroutine(
+            self.gemini_tool.generate_description_async(frame, cv_data, PREFETCH_QUERY, remember=False)
+        )
+        
+        def store(done):
+            if done.cancelled() or done.exception() is not None:
+                return
+            self.latest = {'signature': signature, 'text': done.result(), 'timestamp': time.time()}
+        
+        future.add_done_callback(store)
+        self._in_flight = future
+    
+    def _within_budget(self, now: float) -> bool:
+        """Rate budget: minimum spacing plus a per-minute cap."""
+        while self._request_times and now - self._request_times[0] > 60.0:
+            self._request_times.popleft()
+        
+        if self._request_times and now - self._request_times[-1] < settings.prefetch_min_interval_s:
+            return False
+        return len(self._request_times) < settings.prefetch_max_per_minute
+    
+    @staticmethod
+    def _signature(cv_data: Dict):
+        """Objects-only scene signature (no image hash, so it is cheap per frame)."""
+        objects, _ = scene_signature(cv_data)
+        return objects
+    
+    def get_stats(self) -> Dict:
+        """Get prefetch counters."""
+        return {
+            'prefetches_started': self.prefetches_started,
+            'prefetch_hits': self.prefetch_hits,
+            'has_fresh': self.latest is not None
+                and time.time() - self.latest['timestamp'] <= settings.prefetch_max_age_s
+        }
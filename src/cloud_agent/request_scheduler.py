@@ -0,0 +1,166 @@
+"""
+Process-wide scheduler for Gemini requests.
+
+Every Streamlit session has its own agent and GeminiVLMTool, but they all
+share this scheduler (on the shared AsyncRuntime loop), which applies:
+- a token-bucket rate limit (requests per minute with a small burst)
+- a cap on concurrent in-flight API calls
+- coalescing: identical in-flight requests (same key) wait on one API
+  call and all receive its result; callers scope the key to their own
+  session, since a call carries that session's image and chat history
+"""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+from config.settings import settings
+from src.cloud_agent.async_runtime import AsyncRuntime, run_coroutine
+
+
+class RequestScheduler:
+    """Rate limiting, concurrency cap and coalescing for VLM calls."""
+    
+    _instance: Optional["RequestScheduler"] = None
+    _instance_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        rate_per_minute: float = None,
+        burst: int = None,
+        max_concurrent: int = None
+    ):
+        """
+        Initialize scheduler.
+        
+        Args:
+            rate_per_minute: Sustained request rate (0 = unlimited)
+            burst: Bucket size (requests allowed back to back)
+            max_concurrent: Max API calls in flight at once
+        """
+        self.rate_per_minute = settings.vlm_rate_limit_rpm if rate_per_minute is None else rate_per_minute
+        self.burst = burst or settings.vlm_rate_burst
+        self.max_concurrent = max_concurrent or settings.vlm_max_concurrent
+        
+        # Only touched from the runtime loop thread
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        
+        self.submitted = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.total_wait_s = 0.0
+    
+    @classmethod
+    def get(cls) -> "RequestScheduler":
+        """Get (or lazily create) the shared scheduler."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[str]]) -> str:
+        """
+        Run an API call under the rate limit, or join an identical one in flight.
+        
+        Must be awaited on the shared runtime loop.
+        
+        Args:
+            key: Coalescing key (e.g. session, intent and scene signature)
+            factory: Creates the coroutine making the API call
+        
+        Returns:
+            Result of the (possibly shared) call
+        """
+        self.submitted += 1
+        
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            # Shield so one waiter's cancellation doesn't cancel the others
+            return await asyncio.shield(shared)
+        
+        shared = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = shared
+        try:
+            async with self._slot():
+                result = await factory()
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as e:
+            shared.set_exception(e)
+        else:
+            shared.set_result(result)
+        finally:
+            del self._in_flight[key]
+        
+        return shared.result()
+    
+    @contextmanager
+    def slot_sync(self):
+        """
+        Hold a rate-limited slot from a worker thread (streaming calls).
+        
+        Streams can't be shared between waiters, so they skip coalescing
+        but still count against the rate limit and concurrency cap.
+        """
+        run_coroutine(self._acquire_for_stream()).result()
+        try:
+            yield
+        finally:
+            AsyncRuntime.get().loop.call_soon_threadsafe(self._semaphore.release)
+    
+    async def _acquire_for_stream(self):
+        """Count and acquire a streaming slot (on the loop, like all other state)."""
+        self.submitted += 1
+        await self._acquire()
+    
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold a rate-limited slot on the runtime loop."""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+    
+    async def _acquire(self):
+        """Wait for a concurrency slot, then for a rate-limit token."""
+        started = time.monotonic()
+        await self._semaphore.acquire()
+        
+        try:
+            if self.rate_per_minute > 0:
+                while True:
+                    now = time.monotonic()
+                    self._tokens = min(
+                        float(self.burst),
+                        self._tokens + (now - self._last_refill) * self.rate_per_minute / 60.0
+                    )
+                    self._last_refill = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        break
+                    self.rate_limited += 1
+                    await asyncio.sleep((1.0 - self._tokens) * 60.0 / self.rate_per_minute)
+        except BaseException:
+            # Cancelled while waiting for a token: don't leak the permit
+            self._semaphore.release()
+            raise
+        
+        self.total_wait_s += time.monotonic() - started
+    
+    def get_stats(self) -> Dict:
+        """Get scheduler counters."""
+        admitted = self.submitted - self.coalesced
+        return {
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight),
+            'rate_limited_waits': self.rate_limited,
+            'avg_wait_ms': round(self.total_wait_s / admitted * 1000, 1) if admitted else 0.0
+        }
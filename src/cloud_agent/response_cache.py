@@ -0,0 +1,171 @@
+"""
+Scene-signature response cache for VLM answers.
+
+Answers are keyed by a normalized query intent plus a quantized scene
+signature (sorted class/position/distance-bucket tuples and a small
+perceptual image hash), so asking the same thing in front of the same
+scene skips the API call. Entries expire by TTL and are evicted LRU.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import numpy as np
+from config.settings import settings
+
+
+# Words that don't change what the user is asking for
+FILLER_WORDS = {
+    'a', 'an', 'the', 'please', 'can', 'could', 'you', 'me', 'tell', 'hey',
+    'now', 'just', 'do', 'is', 'are', 'there', 'any', 'i'
+}
+
+
+def normalize_intent(user_query: str) -> str:
+    """
+    Normalize a query into a cache-friendly intent string.
+    
+    Args:
+        user_query: Raw spoken/typed query
+    
+    Returns:
+        Lowercased, punctuation-free query without filler words
+    """
+    words = re.sub(r"[^a-z0-9\s]", " ", user_query.lower()).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+def image_hash(image: np.ndarray, hash_size: int = None) -> int:
+    """
+    Compute a difference hash (dHash) of an image.
+    
+    A small hash_size makes the hash robust to sensor noise and slight
+    camera motion; 0 disables image hashing.
+    
+    Args:
+        image: Image frame (BGR format)
+        hash_size: Hash grid size (hash has hash_size**2 bits)
+    
+    Returns:
+        Hash as an integer (0 if disabled)
+    """
+    hash_size = settings.vlm_cache_image_hash_size if hash_size is None else hash_size
+    if image is None or hash_size <= 0:
+        return 0
+    
+    import cv2
+    
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).tobytes().hex() or "0", 16)
+
+
+def scene_signature(cv_data: Dict, image: np.ndarray = None) -> Tuple:
+    """
+    Build a quantized, order-independent signature of a scene.
+    
+    Args:
+        cv_data: Structured CV output
+        image: Optional frame for the perceptual hash
+    
+    Returns:
+        Hashable signature tuple
+    """
+    bucket_m = settings.vlm_cache_distance_bucket_m
+    objects = tuple(sorted(
+        (
+            obj['class'],
+            obj.get('position', 'center'),
+            int(obj['distance_m'] // bucket_m) if obj.get('distance_m', -1) > 0 else -1
+        )
+        for obj in (cv_data or {}).get('objects', [])
+    ))
+    return objects, image_hash(image)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters."""
+    
+    def __init__(self, max_size: int = None, ttl_s: float = None):
+        """
+        Initialize cache.
+        
+        Args:
+            max_size: Maximum number of entries (LRU eviction beyond this)
+            ttl_s: Seconds an entry stays valid
+        """
+        self.max_size = max_size or settings.vlm_cache_size
+        self.ttl_s = ttl_s or settings.vlm_cache_ttl_s
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(intent: Hashable, signature: Tuple) -> Tuple:
+        """Combine intent and scene signature into a cache key."""
+        return intent, signature
+    
+    def get(self, key: Hashable) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Cached response or None on miss/expiry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, stored_at = entry
+            if time.time() - stored_at > self.ttl_s:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: str):
+        """
+        Store a response.
+        
+        Args:
+            key: Cache key from make_key
+            value: Response text
+        """
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict:
+        """Get cache counters for tuning the signature quantization."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'expirations': self.expirations,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,283 @@
+"""
+Offline indoor route planner.
+
+Plans walking routes over a venue graph loaded from JSON (see
+config/venues/demo_office.json). A* search is guided by ALT landmark
+heuristics, using shortest distances to and from a few far-apart landmark
+nodes that are precomputed once per venue. Routes are cached LRU, so
+repeated questions in the same venue are answered from the cache. Output
+is turn-by-turn steps derived from node coordinates. One planner is
+shared by all sessions, so the cache is guarded by a lock.
+
+Venue format:
+    {
+      "name": "Demo Office",
+      "default_start": "entrance",
+      "nodes": {"entrance": {"x": 0, "y": 0, "label": "main entrance", "aliases": ["front door"]}},
+      "edges": [{"from": "entrance", "to": "lobby", "distance_m": 8.0,
+                 "bidirectional": true, "instruction": "go through the double doors"}]
+    }
+Coordinates are meters (x east, y north); distance_m defaults to the
+straight-line distance between the nodes.
+"""
+import heapq
+import json
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+
+
+class RoutePlanner:
+    """A* (ALT heuristic) route planner over a venue graph with a route cache."""
+    
+    def __init__(self, venue_path: str, num_landmarks: int = None, cache_size: int = None):
+        """
+        Load a venue and precompute landmark distances.
+        
+        Args:
+            venue_path: Venue JSON file
+            num_landmarks: Landmarks for the ALT heuristic
+            cache_size: Routes kept in the LRU cache
+        """
+        with open(venue_path) as f:
+            venue = json.load(f)
+        
+        self.name = venue.get('name', 'venue')
+        self.nodes: Dict[str, Dict] = venue['nodes']
+        self.default_start = venue.get('default_start')
+        self.cache_size = cache_size or settings.route_cache_size
+        
+        # Adjacency: node -> [(neighbor, distance_m, instruction)]
+        self.adjacency: Dict[str, List[Tuple[str, float, Optional[str]]]] = {n: [] for n in self.nodes}
+        self.reverse: Dict[str, List[Tuple[str, float]]] = {n: [] for n in self.nodes}
+        for edge in venue['edges']:
+            a, b = edge['from'], edge['to']
+            distance = edge.get('distance_m') or self._straight_line(a, b)
+            self._add_edge(a, b, distance, edge.get('instruction'))
+            if edge.get('bidirectional', True):
+                self._add_edge(b, a, distance, edge.get('reverse_instruction', edge.get('instruction')))
+        
+        # Spoken names -> node id
+        self._names: Dict[str, str] = {}
+        for node_id, node in self.nodes.items():
+            for name in [node_id, node.get('label', ''), *node.get('aliases', [])]:
+                if name:
+                    self._names[self._normalize(name)] = node_id
+        
+        # ALT: exact distances from/to a few far-apart landmarks
+        start_time = time.time()
+        self.landmarks = self._select_landmarks(num_landmarks or settings.route_num_landmarks)
+        self._from_landmark = [self._dijkstra(l, self.adjacency) for l in self.landmarks]
+        self._to_landmark = [self._dijkstra(l, self.reverse) for l in self.landmarks]
+        
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        print(
+            f"[ROUTE] Loaded venue '{self.name}' ({len(self.nodes)} nodes, "
+            f"{len(self.landmarks)} landmarks) in {(time.time() - start_time) * 1000:.1f}ms"
+        )
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Find the node a spoken place name refers to.
+        
+        Args:
+            name: Place name ("the elevator", "front door")
+        
+        Returns:
+            Node id or None
+        """
+        normalized = self._normalize(name)
+        if normalized in self._names:
+            return self._names[normalized]
+        
+        # Longest known name contained in the phrase
+        for known in sorted(self._names, key=len, reverse=True):
+            if re.search(rf"\b{re.escape(known)}\b", normalized):
+                return self._names[known]
+        return None
+    
+    def plan(self, start: str, goal: str) -> Optional[Dict]:
+        """
+        Plan a route between two nodes (cached).
+        
+        Args:
+            start: Start node id
+            goal: Goal node id
+        
+        Returns:
+            Route dict (path, distance_m, steps) or None if unreachable
+        """
+        key = (start, goal)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return {**cached, 'cached': True}
+            self.cache_misses += 1
+        
+        # Search outside the lock; the graph and landmark tables are read-only
+        path = self._astar(start, goal)
+        route = None
+        if path is not None:
+            distance, steps = self._describe(path)
+            route = {'path': path, 'distance_m': round(distance, 1), 'steps': steps, 'cached': False}
+        
+        with self._cache_lock:
+            self._cache[key] = route
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return route
+    
+    def _astar(self, start: str, goal: str) -> Optional[List[str]]:
+        """A* search with the ALT lower bound."""
+        open_heap = [(self._heuristic(start, goal), 0.0, start)]
+        best = {start: 0.0}
+        came_from: Dict[str, str] = {}
+        
+        while open_heap:
+            _, cost, node = heapq.heappop(open_heap)
+            if node == goal:
+                path = [node]
+                while node in came_from:
+                    node = came_from[node]
+                    path.append(node)
+                return path[::-1]
+            if cost > best.get(node, math.inf):
+                continue
+            
+            for neighbor, distance, _ in self.adjacency[node]:
+                new_cost = cost + distance
+                if new_cost < best.get(neighbor, math.inf):
+                    best[neighbor] = new_cost
+                    came_from[neighbor] = node
+                    heapq.heappush(open_heap, (new_cost + self._heuristic(neighbor, goal), new_cost, neighbor))
+        
+        return None
+    
+    def _heuristic(self, node: str, goal: str) -> float:
+        """ALT lower bound on the distance from node to goal (triangle inequality)."""
+        bound = 0.0
+        for from_l, to_l in zip(self._from_landmark, self._to_landmark):
+            # d(L,goal) - d(L,node) and d(node,L) - d(goal,L) both bound d(node,goal)
+            if goal in from_l and node in from_l:
+                bound = max(bound, from_l[goal] - from_l[node])
+            if node in to_l and goal in to_l:
+                bound = max(bound, to_l[node] - to_l[goal])
+        return bound
+    
+    def _describe(self, path: List[str]) -> Tuple[float, List[str]]:
+        """Turn a node path into total distance and spoken turn-by-turn steps."""
+        steps = []
+        total = 0.0
+        previous_heading = None
+        
+        for a, b in zip(path, path[1:]):
+            distance, instruction = next((d, i) for n, d, i in self.adjacency[a] if n == b)
+            total += distance
+            heading = self._heading(a, b)
+            target = self.label(b)
+            
+            if instruction:
+                step = f"{instruction[0].upper()}{instruction[1:]} to the {target}"
+            elif previous_heading is None or heading is None:
+                step = f"Walk {distance:.0f} meters to the {target}"
+            else:
+                step = f"{self._turn_phrase(heading - previous_heading)} and walk {distance:.0f} meters to the {target}"
+            
+            steps.append(step + ".")
+            previous_heading = heading if heading is not None else previous_heading
+        
+        steps.append(f"You have arrived at the {self.label(path[-1])}.")
+        return total, steps
+    
+    @staticmethod
+    def _turn_phrase(delta_deg: float) -> str:
+        """Spoken turn for a change of heading (counter-clockwise positive = left)."""
+        delta = (delta_deg + 180.0) % 360.0 - 180.0
+        if abs(delta) < 30:
+            return "Continue straight"
+        if abs(delta) > 135:
+            return "Turn around"
+        side = "left" if delta > 0 else "right"
+        return f"Turn slightly {side}" if abs(delta) < 60 else f"Turn {side}"
+    
+    def _heading(self, a: str, b: str) -> Optional[float]:
+        """Compass-free heading of the segment a->b in degrees (None without coordinates)."""
+        na, nb = self.nodes[a], self.nodes[b]
+        if 'x' not in na or 'x' not in nb:
+            return None
+        return math.degrees(math.atan2(nb['y'] - na['y'], nb['x'] - na['x']))
+    
+    def _straight_line(self, a: str, b: str) -> float:
+        """Straight-line distance between two nodes (1 m without coordinates)."""
+        na, nb = self.nodes[a], self.nodes[b]
+        if 'x' not in na or 'x' not in nb:
+            return 1.0
+        return math.hypot(nb['x'] - na['x'], nb['y'] - na['y'])
+    
+    def _add_edge(self, a: str, b: str, distance: float, instruction: Optional[str]):
+        """Add one directed edge."""
+        self.adjacency[a].append((b, distance, instruction))
+        self.reverse[b].append((a, distance))
+    
+    def _select_landmarks(self, count: int) -> List[str]:
+        """Pick far-apart landmarks (farthest-point selection)."""
+        if not self.nodes or count <= 0:
+            return []
+        
+        landmarks = [next(iter(self.nodes))]
+        min_distance = self._dijkstra(landmarks[0], self.adjacency)
+        while len(landmarks) < min(count, len(self.nodes)):
+            candidates = [n for n in self.nodes if n not in landmarks]
+            farthest = max(candidates, key=lambda n: min_distance.get(n, 0.0))
+            landmarks.append(farthest)
+            for node, distance in self._dijkstra(farthest, self.adjacency).items():
+                min_distance[node] = min(min_distance.get(node, math.inf), distance)
+        return landmarks
+    
+    @staticmethod
+    def _dijkstra(source: str, graph: Dict[str, List[Tuple]]) -> Dict[str, float]:
+        """Single-source shortest distances."""
+        distances = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > distances[node]:
+                continue
+            for edge in graph[node]:
+                neighbor, distance = edge[0], edge[1]
+                new_cost = cost + distance
+                if new_cost < distances.get(neighbor, math.inf):
+                    distances[neighbor] = new_cost
+                    heapq.heappush(heap, (new_cost, neighbor))
+        return distances
+    
+    def label(self, node_id: str) -> str:
+        """Spoken name of a node."""
+        return self.nodes[node_id].get('label', node_id.replace('_', ' '))
+    
+    @staticmethod
+    def _normalize(name: str) -> str:
+        """Lowercase, punctuation-free name without leading articles."""
+        words = re.sub(r"[^a-z0-9\s]", " ", name.lower()).split()
+        return " ".join(w for w in words if w not in ('the', 'a', 'an', 'my'))
+    
+    def get_stats(self) -> Dict:
+        """Get route cache counters."""
+        return {
+            'venue': self.name,
+            'nodes': len(self.nodes),
+            'cached_routes': len(self._cache),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses
+        }
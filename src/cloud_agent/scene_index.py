@@ -0,0 +1,159 @@
+"""
+Per-frame index over structured CV output.
+
+Built once per structured output and kept in a small side cache (the
+output dict itself stays plain, JSON-serializable data), so every text
+responder reads the same lookups instead of re-filtering the object list
+per query. The index holds:
+- position buckets
+- the nearest object per class
+- a lookup from spoken names to classes ("chairs", "table", "phone")
+- cached strings such as the prompt context
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from src.cloud_agent.context_builder import build_scene_context, plural_of
+from src.cloud_agent.object_memory import CLASS_ALIASES
+
+
+POSITIONS = ('left', 'center', 'right')
+
+
+class SceneIndex:
+    """Position buckets, per-class nearest object and name lookup for one frame."""
+    
+    # Recent outputs -> (output, fingerprint, index); the output is held so its id isn't reused
+    CACHE_SIZE = 8
+    _cache: "OrderedDict[int, Tuple[Dict, tuple, SceneIndex]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    
+    def __init__(self, cv_data: Dict):
+        """
+        Index one structured output.
+        
+        Args:
+            cv_data: Structured CV output
+        """
+        cv_data = cv_data or {}
+        # Nearest first (unknown distance last); the detector already sorts, so this is cheap
+        self.objects: List[Dict] = sorted(cv_data.get('objects', []), key=self._distance_key)
+        self.num_objects = cv_data.get('num_objects', len(self.objects))
+        self.nearest = self.objects[0] if self.objects else None
+        
+        self.by_position: Dict[str, List[Dict]] = {p: [] for p in POSITIONS}
+        self.nearest_by_class: Dict[str, Dict] = {}
+        for obj in self.objects:
+            self.by_position.setdefault(obj.get('position', 'center'), []).append(obj)
+            self.nearest_by_class.setdefault(obj['class'], obj)
+        
+        self.classes_by_position = {p: [o['class'] for o in self.by_position[p]] for p in POSITIONS}
+        self._names = self._build_names(self.nearest_by_class)
+        self._cv_data = cv_data
+        self._context: Optional[str] = None
+    
+    @classmethod
+    def of(cls, cv_data: Dict) -> "SceneIndex":
+        """
+        Get the index for a structured output, building it on first use.
+        
+        The index is rebuilt if a key of the output was added or replaced
+        since it was built (e.g. safety_status set by a later step).
+        
+        Args:
+            cv_data: Structured CV output
+        
+        Returns:
+            SceneIndex for this output
+        """
+        if cv_data is None:
+            return cls({})
+        
+        fingerprint = cls._fingerprint(cv_data)
+        with cls._cache_lock:
+            entry = cls._cache.get(id(cv_data))
+            if entry is not None and entry[0] is cv_data and entry[1] == fingerprint:
+                cls._cache.move_to_end(id(cv_data))
+                return entry[2]
+        
+        index = cls(cv_data)
+        with cls._cache_lock:
+            cls._cache[id(cv_data)] = (cv_data, fingerprint, index)
+            cls._cache.move_to_end(id(cv_data))
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return index
+    
+    @staticmethod
+    def _fingerprint(cv_data: Dict) -> tuple:
+        """Identity of each value plus the object count (cheap staleness check)."""
+        return (
+            tuple((key, id(value)) for key, value in cv_data.items()),
+            len(cv_data.get('objects', []))
+        )
+    
+    def classes_named(self, text: str) -> List[str]:
+        """
+        Classes in view that a query names, nearest first.
+        
+        Args:
+            text: User query ("where are the chairs?")
+        
+        Returns:
+            Class names
+        """
+        words = re.findall(r"[a-z]+", text.lower())
+        found = set()
+        for i, word in enumerate(words):
+            found.update(self._names.get(word, ()))
+            if i + 1 < len(words):
+                found.update(self._names.get(f"{word} {words[i + 1]}", ()))
+        return sorted(found, key=lambda c: self._distance_key(self.nearest_by_class[c]))
+    
+    def find(self, text: str) -> Optional[Dict]:
+        """Nearest object of a class the query names, or None."""
+        classes = self.classes_named(text)
+        return self.nearest_by_class[classes[0]] if classes else None
+    
+    def objects_named(self, text: str, limit: int) -> List[Dict]:
+        """All objects of the classes a query names, nearest first (up to limit)."""
+        classes = set(self.classes_named(text))
+        if not classes:
+            return []
+        return [obj for obj in self.objects if obj['class'] in classes][:limit]
+    
+    def scene_context(self) -> str:
+        """Prompt context for this frame (built once, default budget)."""
+        if self._context is None:
+            self._context = build_scene_context(self._cv_data)
+        return self._context
+    
+    @staticmethod
+    def phrase(obj: Dict) -> str:
+        """Short spoken form of one detection ("chair at 1.5 meters")."""
+        return f"{obj['class']} at {obj['distance_m']:.1f} meters"
+    
+    @staticmethod
+    def _build_names(classes: Dict[str, Dict]) -> Dict[str, List[str]]:
+        """Spoken names (singular, plural, alias, head noun) -> class names."""
+        names: Dict[str, List[str]] = {}
+        for class_name in classes:
+            lower = class_name.lower()
+            for name in (lower, plural_of(lower), *CLASS_ALIASES.get(class_name, [])):
+                names.setdefault(name, []).append(class_name)
+        
+        # "phone" for "cell phone", unless a class is called that itself
+        for class_name in classes:
+            words = class_name.lower().split()
+            if len(words) > 1:
+                for name in (words[-1], plural_of(words[-1])):
+                    if name not in names:
+                        names[name] = [class_name]
+        return names
+    
+    @staticmethod
+    def _distance_key(obj: Dict) -> float:
+        """Sort key: distance, unknown (<= 0) last."""
+        distance = obj.get('distance_m', -1)
+        return distance if distance > 0 else float('inf')
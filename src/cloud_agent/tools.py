@@ -1,13 +1,37 @@
 """
-AWS Bedrock Agent tools for navigation assistance.
+Navigation tools called by the agents: CV perception checks, haptic and
+free-space feedback, object memory and offline indoor routes.
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
+import threading
+import time
+import uuid
+from config.settings import settings
+from src.cv_engine.occupancy_grid import OccupancyGrid
+from src.cloud_agent.object_memory import ObjectMemory
+from src.cloud_agent.route_planner import RoutePlanner
 
 
 class NavigationTools:
     """Collection of tools for the navigation agent."""
     
+    # Shared grid geometry (precomputed once, reused for every query)
+    _occupancy_grid = None
+    
+    # Shared venue graph and route cache (loaded once per process)
+    _route_planner = None
+    _route_planner_failed = False
+    _route_planner_lock = threading.Lock()
+    
+    def __init__(self):
+        """Initialize per-session tool state."""
+        # What the camera has seen recently (survives leaving the frame);
+        # shared across sessions when it is persisted to disk
+        self.object_memory = ObjectMemory.for_session()
+        # Namespaces this session's track ids in the shared memory
+        self.memory_source = uuid.uuid4().hex[:8]
+    
     @staticmethod
     def cv_perception_tool(cv_data: Dict) -> Dict:
         """
@@ -47,30 +71,39 @@ class NavigationTools:
             return "CAUTION - Objects present, path negotiable"
     
     @staticmethod
-    def haptic_feedback_tool(distance: float, direction: str) -> Dict:
+    def haptic_feedback_tool(
+        distance: float, 
+        direction: str, 
+        ttc_s: Optional[float] = None
+    ) -> Dict:
         """
         Generate haptic feedback pattern based on proximity.
         
         Args:
             distance: Distance to obstacle in meters
             direction: Direction of obstacle (left, center, right)
+            ttc_s: Time-to-collision in seconds if the object is approaching
         
         Returns:
             Haptic feedback configuration
         """
-        if distance < 0:
+        if distance < 0 and ttc_s is None:
             return {'enabled': False}
         
-        # Intensity increases as distance decreases
-        if distance < 0.5:
+        # Intensity increases as distance (or time to contact) decreases
+        if ttc_s is not None and ttc_s < settings.ttc_critical_s:
+            pattern = "rapid_pulse"
+            intensity = 1.0
+            frequency_hz = 30
+        elif 0 <= distance < 0.5:
             pattern = "rapid_pulse"
             intensity = 1.0
             frequency_hz = 30
-        elif distance < 1.0:
+        elif 0 <= distance < 1.0:
             pattern = "fast_pulse"
             intensity = 0.8
             frequency_hz = 20
-        elif distance < 1.5:
+        elif 0 <= distance < 1.5 or (ttc_s is not None and ttc_s < settings.ttc_warning_s):
             pattern = "medium_pulse"
             intensity = 0.5
             frequency_hz = 10
@@ -83,9 +116,70 @@ class NavigationTools:
             'intensity': intensity,
             'frequency_hz': frequency_hz,
             'direction': direction,
-            'duration_ms': 500
+            'duration_ms': 500,
+            'ttc_s': ttc_s
         }
     
+    @staticmethod
+    def seconds_to_contact(obj: Dict) -> float:
+        """
+        Estimate seconds until the user reaches an object.
+        
+        Uses looming time-to-collision when the object is approaching,
+        otherwise the time to walk up to it.
+        
+        Args:
+            obj: Detection dictionary
+        
+        Returns:
+            Seconds to contact (inf when distance is unknown)
+        """
+        distance = obj.get('distance_m', -1)
+        walk_time = distance / settings.walking_speed_mps if distance > 0 else float('inf')
+        ttc = obj.get('ttc_s')
+        return min(walk_time, ttc) if ttc is not None else walk_time
+    
+    @staticmethod
+    def free_space_tool(cv_data: Dict) -> Dict:
+        """
+        Find the clearest walking direction from a bird's-eye occupancy grid.
+        
+        Args:
+            cv_data: Structured CV output (objects with distance and bearing)
+        
+        Returns:
+            Heading clearances, best heading and a spoken guidance sentence
+        """
+        if NavigationTools._occupancy_grid is None:
+            NavigationTools._occupancy_grid = OccupancyGrid()
+        
+        assessment = NavigationTools._occupancy_grid.assess(cv_data)
+        best_heading = assessment['best_heading_deg']
+        best_clearance = assessment['best_clearance_m']
+        
+        if best_clearance < 1.0:
+            text = "I don't see a clear path ahead. Consider turning around or stepping back."
+        elif assessment['straight_clearance_m'] >= best_clearance:
+            text = f"Straight ahead is clear for about {best_clearance:.0f} meters."
+        else:
+            direction = NavigationTools._describe_heading(best_heading)
+            text = (
+                f"The clearest path is {direction}, open for about {best_clearance:.0f} meters. "
+                f"Straight ahead is blocked after {assessment['straight_clearance_m']:.1f} meters."
+            )
+        
+        return {**assessment, 'text': text}
+    
+    @staticmethod
+    def _describe_heading(heading_deg: float) -> str:
+        """Turn a heading in degrees into spoken direction."""
+        side = "right" if heading_deg > 0 else "left"
+        if abs(heading_deg) < 8:
+            return "straight ahead"
+        elif abs(heading_deg) < 22:
+            return f"slightly to your {side}"
+        return f"to your {side}"
+    
     @staticmethod
     def localization_tool() -> Dict:
         """
@@ -110,42 +204,96 @@ class NavigationTools:
     @staticmethod
     def route_planning_tool(start: str, destination: str) -> Dict:
         """
-        Plan route from start to destination.
-        (Placeholder for future Google Maps integration)
+        Plan an indoor route from start to destination.
+        
+        Uses the offline venue graph (settings.venue_map_path); repeated
+        routes are served from the planner's cache.
         
         Args:
-            start: Starting location
-            destination: Destination location
+            start: Starting location (place name or node id; empty = venue default)
+            destination: Destination location (place name or node id)
         
         Returns:
-            Route information
+            Route information with turn-by-turn steps
         """
-        return {
-            'status': 'not_implemented',
-            'message': 'Route planning requires Google Maps API integration',
+        planner = NavigationTools._get_route_planner()
+        result = {
             'start': start,
             'destination': destination,
             'estimated_distance': None,
             'estimated_duration': None
         }
+        
+        if planner is None:
+            return {**result, 'status': 'no_venue', 'message': 'No venue map configured (VENUE_MAP_PATH)'}
+        
+        start_time = time.time()
+        start_node = planner.resolve(start) if start else planner.default_start
+        goal_node = planner.resolve(destination)
+        if start_node is None or goal_node is None:
+            unknown = destination if goal_node is None else start
+            return {**result, 'status': 'unknown_place', 'message': f"I don't know where '{unknown}' is in {planner.name}."}
+        
+        route = planner.plan(start_node, goal_node)
+        if route is None:
+            return {
+                **result,
+                'status': 'no_route',
+                'message': f"I can't find a way to the {planner.label(goal_node)} from the {planner.label(start_node)}."
+            }
+        
+        return {
+            **result,
+            'status': 'ok',
+            'venue': planner.name,
+            'start_label': planner.label(start_node),
+            'destination_label': planner.label(goal_node),
+            'path': route['path'],
+            'steps': route['steps'],
+            'estimated_distance': route['distance_m'],
+            'estimated_duration': round(route['distance_m'] / settings.walking_speed_mps),
+            'cached': route['cached'],
+            'planning_ms': round((time.time() - start_time) * 1000, 3),
+            'text': " ".join(route['steps'])
+        }
     
     @staticmethod
-    def object_memory_tool(objects: List[Dict]) -> Dict:
+    def _get_route_planner():
+        """Load the venue graph once (None if no venue is configured)."""
+        if NavigationTools._route_planner is None and settings.venue_map_path and not NavigationTools._route_planner_failed:
+            with NavigationTools._route_planner_lock:
+                if NavigationTools._route_planner is None and not NavigationTools._route_planner_failed:
+                    try:
+                        NavigationTools._route_planner = RoutePlanner(settings.venue_map_path)
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"[ROUTE] Could not load venue map {settings.venue_map_path}: {e}")
+                        NavigationTools._route_planner_failed = True
+        return NavigationTools._route_planner
+    
+    def object_memory_tool(
+        self, 
+        objects: List[Dict] = None, 
+        timestamp: float = None, 
+        recall_class: str = None
+    ) -> Dict:
         """
         Store and retrieve object memory for context.
-        (Simple in-memory storage for MVP)
         
         Args:
-            objects: List of detected objects
+            objects: Detected objects to record (one frame)
+            timestamp: Frame timestamp
+            recall_class: Class to look up ("where was the door?")
         
         Returns:
-            Memory statistics
+            Memory statistics, plus the last sighting of recall_class
         """
-        # This would connect to a database in production
-        return {
-            'stored_objects': len(objects),
-            'storage_type': 'in_memory',
-            'note': 'Production version would use DynamoDB or similar'
+        written = self.object_memory.record(objects, timestamp, self.memory_source) if objects else 0
+        
+        result = {
+            'stored_objects': written,
+            'storage_type': 'in_memory_ring',
+            **self.object_memory.get_stats()
         }
-
-
+        if recall_class is not None:
+            result['last_seen'] = self.object_memory.last_seen(recall_class)
+        return result
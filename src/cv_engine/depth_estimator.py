@@ -0,0 +1,302 @@
+"""
+Low-rate monocular depth estimation running off the video thread.
+
+The depth network (MiDaS small) is far too slow for the per-frame path, so
+it runs on a background worker at 1-2 Hz on a downscaled frame. The video
+pipeline only hands over its latest frame and reads back the cached depth
+map together with its timestamp.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import numpy as np
+from config.settings import settings
+
+
+def normalize_nearness(inverse_depth: np.ndarray) -> np.ndarray:
+    """
+    Scale a relative inverse-depth map to 0 (far) .. 1 (near).
+    
+    Uses the 5th/95th percentiles so a few outlier pixels don't squash
+    the range.
+    
+    Args:
+        inverse_depth: Raw MiDaS prediction
+    
+    Returns:
+        float32 nearness map
+    """
+    low, high = np.percentile(inverse_depth, [5, 95])
+    if high - low < 1e-6:
+        return np.zeros_like(inverse_depth, dtype=np.float32)
+    
+    return np.clip((inverse_depth - low) / (high - low), 0.0, 1.0).astype(np.float32)
+
+
+class DepthEstimator:
+    """
+    Asynchronous MiDaS depth estimator with a cached depth map.
+    
+    MiDaS predicts relative inverse depth, so the cached map is normalized
+    per inference to a 0-1 "nearness" scale (1.0 = nearest surface in view).
+    Values are comparable within a map, not across scenes.
+    """
+    
+    def __init__(
+        self,
+        model_type: str = None,
+        rate_hz: float = None,
+        input_width: int = None
+    ):
+        """
+        Initialize depth estimator.
+        
+        Args:
+            model_type: torch.hub MiDaS model name (e.g. 'MiDaS_small')
+            rate_hz: Maximum inferences per second
+            input_width: Width frames are downscaled to before inference
+        """
+        self.model_type = model_type or settings.depth_model_type
+        self.rate_hz = rate_hz or settings.depth_rate_hz
+        self.input_width = input_width or settings.depth_input_width
+        self.max_age_s = settings.depth_max_age_s
+        
+        self.model = None
+        self.transform = None
+        self.available = False
+        
+        # Latest submitted frame (written by video thread, read by worker)
+        self._pending_frame: Optional[np.ndarray] = None
+        self._frame_event = threading.Event()
+        self._lock = threading.Lock()
+        
+        # Cached result (replaced atomically as a single dict)
+        self._latest: Optional[Dict] = None
+        
+        # Performance tracking
+        self.inference_count = 0
+        self.last_inference_ms = 0.0
+        
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the background depth worker (model loads on the worker)."""
+        if self._running:
+            return
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="depth-worker")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background depth worker and wait for it to exit."""
+        self._running = False
+        self._frame_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+    
+    def submit_frame(self, frame: np.ndarray):
+        """
+        Offer the latest frame to the depth worker.
+        
+        Constant time: only the reference is kept, older unprocessed
+        frames are simply replaced.
+        
+        Args:
+            frame: Image frame (BGR format)
+        """
+        with self._lock:
+            self._pending_frame = frame
+        self._frame_event.set()
+    
+    def get_depth_map(self, max_age_s: float = None) -> Optional[Dict]:
+        """
+        Get the cached depth map.
+        
+        Args:
+            max_age_s: Return None if the map is older than this
+        
+        Returns:
+            Dict with 'map' (nearness, low resolution), 'timestamp',
+            'age_s' and 'frame_shape', or None if no fresh map exists
+        """
+        latest = self._latest
+        if latest is None:
+            return None
+        
+        age_s = time.time() - latest['timestamp']
+        if max_age_s is not None and age_s > max_age_s:
+            return None
+        
+        return {**latest, 'age_s': age_s}
+    
+    def sample_box(
+        self,
+        bbox: Tuple[float, float, float, float],
+        depth: Dict = None
+    ) -> Optional[float]:
+        """
+        Sample nearness inside a bounding box.
+        
+        Uses a high percentile (depth_box_percentile) over the whole box:
+        background pixels around the object are farther and fall below it,
+        while the near parts of the object, including its base at the
+        user's feet (kerbs, steps), are still counted.
+        
+        Args:
+            bbox: Bounding box (x1, y1, x2, y2) in full-frame pixels
+            depth: Depth snapshot from get_depth_map (fetched if None)
+        
+        Returns:
+            Nearness in [0, 1] or None if no depth map is available
+        """
+        depth = depth or self.get_depth_map(self.max_age_s)
+        if depth is None:
+            return None
+        
+        depth_map = depth['map']
+        frame_h, frame_w = depth['frame_shape']
+        map_h, map_w = depth_map.shape
+        sx, sy = map_w / frame_w, map_h / frame_h
+        
+        x1, y1, x2, y2 = bbox
+        c1 = int(np.clip(min(x1, x2) * sx, 0, map_w - 1))
+        c2 = int(np.clip(max(x1, x2) * sx, c1 + 1, map_w))
+        r1 = int(np.clip(min(y1, y2) * sy, 0, map_h - 1))
+        r2 = int(np.clip(max(y1, y2) * sy, r1 + 1, map_h))
+        
+        return float(np.percentile(depth_map[r1:r2, c1:c2], settings.depth_box_percentile))
+    
+    def sample_corridor(
+        self,
+        width_fraction: float = 0.33,
+        depth: Dict = None
+    ) -> Optional[Dict]:
+        """
+        Sample the walking corridor straight ahead.
+        
+        The corridor is the center strip of the lower two thirds of the
+        frame, which is where walls, kerbs and low branches show up before
+        the user reaches them. The bottom rows are left out: they show the
+        floor at the user's feet, which is always the nearest surface in a
+        per-map normalized view and would mark every frame as blocked.
+        
+        Args:
+            width_fraction: Corridor width as a fraction of frame width
+            depth: Depth snapshot from get_depth_map (fetched if None)
+        
+        Returns:
+            Dict with 'nearness', 'blocked' and 'age_s', or None
+        """
+        depth = depth or self.get_depth_map(self.max_age_s)
+        if depth is None:
+            return None
+        
+        depth_map = depth['map']
+        map_h, map_w = depth_map.shape
+        half = max(1, int(map_w * width_fraction / 2))
+        top = map_h // 3
+        bottom = max(top + 1, int(map_h * (1.0 - settings.depth_floor_exclude_fraction)))
+        corridor = depth_map[top:bottom, map_w // 2 - half:map_w // 2 + half]
+        
+        # High percentile: a narrow obstacle should still register
+        nearness = float(np.percentile(corridor, 90))
+        
+        return {
+            'nearness': round(nearness, 2),
+            'blocked': nearness >= settings.depth_obstacle_threshold,
+            'age_s': round(depth['age_s'], 2)
+        }
+    
+    def _load_model(self) -> bool:
+        """Load MiDaS through torch.hub (runs on the worker thread)."""
+        try:
+            import torch
+            
+            print(f"[DEPTH] Loading {self.model_type} via torch.hub...")
+            self.model = torch.hub.load("intel-isl/MiDaS", self.model_type)
+            self.model.eval()
+            
+            transforms = torch.hub.load("intel-isl/MiDaS", "transforms")
+            if self.model_type == "MiDaS_small":
+                self.transform = transforms.small_transform
+            else:
+                self.transform = transforms.dpt_transform
+            
+            self.available = True
+            print(f"[DEPTH] ✓ Depth model ready ({self.rate_hz:.1f} Hz, {self.input_width}px)")
+            return True
+        except Exception as e:
+            print(f"[DEPTH] Warning: Could not load depth model: {e}")
+            print("[DEPTH] Depth cues will be disabled.")
+            return False
+    
+    def _worker(self):
+        """Background loop: run inference on the newest frame at most rate_hz."""
+        if not self._load_model():
+            self._running = False
+            return
+        
+        min_period = 1.0 / max(self.rate_hz, 0.1)
+        
+        while self._running:
+            self._frame_event.wait(timeout=1.0)
+            self._frame_event.clear()
+            
+            with self._lock:
+                frame = self._pending_frame
+                self._pending_frame = None
+            
+            if frame is None:
+                continue
+            
+            start_time = time.time()
+            try:
+                depth_map = self._infer(frame)
+                self._latest = {
+                    'map': depth_map,
+                    'timestamp': time.time(),
+                    'frame_shape': frame.shape[:2]
+                }
+                self.inference_count += 1
+            except Exception as e:
+                print(f"[DEPTH] Error in depth inference: {e}")
+            
+            self.last_inference_ms = (time.time() - start_time) * 1000
+            
+            # Rate limit: sleep out the rest of the period
+            remaining = min_period - (time.time() - start_time)
+            if remaining > 0:
+                time.sleep(remaining)
+    
+    def _infer(self, frame: np.ndarray) -> np.ndarray:
+        """Run MiDaS on a downscaled frame and return a normalized nearness map."""
+        import cv2
+        import torch
+        
+        height, width = frame.shape[:2]
+        scale = self.input_width / width
+        small = cv2.resize(
+            frame,
+            (self.input_width, max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+        small_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        
+        with torch.no_grad():
+            prediction = self.model(self.transform(small_rgb))
+            prediction = torch.nn.functional.interpolate(
+                prediction.unsqueeze(1),
+                size=small_rgb.shape[:2],
+                mode="bicubic",
+                align_corners=False
+            ).squeeze()
+        
+        return normalize_nearness(prediction.cpu().numpy())
+    
+    def is_available(self) -> bool:
+        """Check if the depth model is loaded."""
+        return self.available
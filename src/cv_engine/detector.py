@@ -5,8 +5,11 @@ import cv2
 import numpy as np
 from typing import List, Dict, Tuple
 import time
+import weakref
 from config.settings import settings
 from src.cv_engine.distance_estimator import DistanceEstimator
+from src.cv_engine.depth_estimator import DepthEstimator
+from src.cv_engine.tracker import ObjectTracker
 
 
 class ObjectDetector:
@@ -35,6 +38,16 @@ class ObjectDetector:
         self.confidence_threshold = settings.confidence_threshold
         self.iou_threshold = settings.iou_threshold
         self.distance_estimator = None
+        self.tracker = ObjectTracker()
+        
+        # Optional background depth model (never runs on the detect path)
+        self.depth_estimator = None
+        self.last_depth = None
+        if settings.use_depth_model:
+            self.depth_estimator = DepthEstimator()
+            self.depth_estimator.start()
+            # Stop the worker when the detector goes away (e.g. its session ends)
+            self._finalizer = weakref.finalize(self, self.depth_estimator.stop)
         
         # Performance tracking
         self.frame_count = 0
@@ -57,6 +70,11 @@ class ObjectDetector:
             height, width = frame.shape[:2]
             self.distance_estimator = DistanceEstimator(image_height=height)
         
+        # Hand the frame to the depth worker and grab its cached map once
+        if self.depth_estimator is not None:
+            self.depth_estimator.submit_frame(frame)
+            self.last_depth = self.depth_estimator.get_depth_map(settings.depth_max_age_s)
+        
         # Check if model is loaded
         if not self.model_loaded:
             # Return empty detections if model not loaded
@@ -102,6 +120,8 @@ class ObjectDetector:
                 position = self.distance_estimator.calculate_relative_position(
                     bbox, frame.shape[1]
                 )
+                bearing = self.distance_estimator.calculate_bearing(bbox, frame.shape[1])
+                width = self.distance_estimator.estimate_width(bbox, distance)
                 safety_level = self.distance_estimator.get_safety_level(distance)
                 
                 # Store detection
@@ -111,9 +131,15 @@ class ObjectDetector:
                     'bbox': bbox,
                     'distance_m': distance,
                     'position': position,
+                    'bearing_deg': bearing,
+                    'width_m': width,
                     'safety_level': safety_level,
                     'class_id': class_id
                 }
+                if self.last_depth is not None:
+                    detection['depth_nearness'] = round(
+                        self.depth_estimator.sample_box(bbox, self.last_depth), 2
+                    )
                 detections.append(detection)
                 
                 # Draw bounding box
@@ -130,6 +156,9 @@ class ObjectDetector:
                 label = f"{class_name} {distance:.1f}m ({position})"
                 self._draw_label(annotated_frame, label, (int(x1), int(y1) - 10), color)
         
+        # Track boxes across frames for time-to-collision (looming)
+        self.tracker.update(detections, start_time)
+        
         # Calculate latency
         inference_time = (time.time() - start_time) * 1000  # Convert to ms
         self.frame_count += 1
@@ -216,23 +245,42 @@ class ObjectDetector:
             if d['distance_m'] > 0 and d['distance_m'] < 1.5
         ]
         
+        # Objects closing in fast enough to matter before they are close
+        approaching = sorted(
+            (d for d in sorted_detections
+             if d.get('ttc_s') is not None and d['ttc_s'] < settings.ttc_warning_s),
+            key=lambda x: x['ttc_s']
+        )
+        
         # Determine overall safety status
         if len(critical_alerts) > 0:
             if any(d['distance_m'] < 1.0 for d in critical_alerts):
                 safety_status = "DANGER - Immediate obstacles detected"
             else:
                 safety_status = "WARNING - Close obstacles detected"
+        elif len(approaching) > 0:
+            safety_status = "WARNING - Object approaching quickly"
         elif len(detections) == 0:
             safety_status = "CLEAR - No obstacles detected"
         else:
             safety_status = "CAUTION - Objects present, path negotiable"
         
-        return {
+        structured = {
             'timestamp': time.time(),
             'num_objects': len(detections),
             'objects': sorted_detections,
             'critical_alerts': critical_alerts,
+            'approaching': approaching,
             'safety_status': safety_status
         }
-
-
+        
+        # Depth corridor catches obstacles YOLO has no class for (walls, kerbs)
+        if self.last_depth is not None:
+            structured['path_depth'] = self.depth_estimator.sample_corridor(depth=self.last_depth)
+        
+        return structured
+    
+    def close(self):
+        """Stop the background depth worker."""
+        if self.depth_estimator is not None:
+            self._finalizer()
@@ -175,6 +175,48 @@ class DistanceEstimator:
         else:
             return "center"
     
+    def calculate_bearing(
+        self, 
+        bbox: Tuple[float, float, float, float], 
+        image_width: int
+    ) -> float:
+        """
+        Calculate horizontal bearing of object from the camera axis.
+        
+        Args:
+            bbox: Bounding box (x1, y1, x2, y2)
+            image_width: Image width in pixels
+        
+        Returns:
+            Bearing in degrees (negative = left, positive = right)
+        """
+        x1, _, x2, _ = bbox
+        offset_px = (x1 + x2) / 2 - image_width / 2
+        
+        # Assumes square pixels, so the vertical focal length applies
+        return round(float(np.degrees(np.arctan2(offset_px, self.focal_length))), 1)
+    
+    def estimate_width(
+        self, 
+        bbox: Tuple[float, float, float, float], 
+        distance: float
+    ) -> float:
+        """
+        Estimate real-world object width from its pixel width and distance.
+        
+        Args:
+            bbox: Bounding box (x1, y1, x2, y2)
+            distance: Estimated distance in meters
+        
+        Returns:
+            Estimated width in meters (-1.0 if distance unknown)
+        """
+        if distance <= 0:
+            return -1.0
+        
+        x1, _, x2, _ = bbox
+        return round(abs(x2 - x1) * distance / self.focal_length, 2)
+    
     def get_safety_level(self, distance: float) -> str:
         """
         Get safety level based on distance.
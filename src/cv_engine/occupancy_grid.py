@@ -0,0 +1,138 @@
+"""
+Bird's-eye free-space occupancy grid built from detections.
+
+Projects each detection (bearing, distance, width) onto a small top-down
+grid in front of the user and scores a fan of walking headings by how far
+the user could walk along each one before reaching an occupied cell.
+Everything is vectorized with numpy and the heading geometry is
+precomputed, so a full assessment costs well under a millisecond.
+"""
+from typing import Dict, List
+import numpy as np
+from config.settings import settings
+
+
+# Fallback bearings for detections without 'bearing_deg' (degrees, + = right)
+POSITION_BEARINGS = {'left': -20.0, 'center': 0.0, 'right': 20.0}
+
+
+class OccupancyGrid:
+    """Top-down occupancy grid with precomputed heading corridors."""
+    
+    # Assumed depth of an obstacle along the viewing ray (meters)
+    OBSTACLE_DEPTH_M = 0.4
+    
+    def __init__(
+        self,
+        cell_m: float = None,
+        range_m: float = None,
+        num_headings: int = None,
+        fov_deg: float = None,
+        walker_width_m: float = None
+    ):
+        """
+        Initialize grid geometry.
+        
+        Args:
+            cell_m: Cell size in meters
+            range_m: Forward and lateral extent in meters
+            num_headings: Number of candidate walking headings
+            fov_deg: Total angular span covered by the headings
+            walker_width_m: Width of the corridor the user needs
+        """
+        self.cell_m = cell_m or settings.grid_cell_m
+        self.range_m = range_m or settings.grid_range_m
+        self.num_headings = num_headings or settings.grid_num_headings
+        self.fov_deg = fov_deg or settings.grid_fov_deg
+        self.walker_width_m = walker_width_m or settings.walker_width_m
+        
+        # Cell centers: x lateral (+ = right), y forward
+        xs = np.arange(-self.range_m + self.cell_m / 2, self.range_m, self.cell_m)
+        ys = np.arange(self.cell_m / 2, self.range_m, self.cell_m)
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        self.shape = grid_x.shape
+        self.cell_x = grid_x.ravel()
+        self.cell_y = grid_y.ravel()
+        
+        # Heading corridors: along-track distance and in-corridor mask per heading
+        self.headings_deg = np.linspace(-self.fov_deg / 2, self.fov_deg / 2, self.num_headings)
+        rad = np.radians(self.headings_deg)[:, None]
+        along = self.cell_x * np.sin(rad) + self.cell_y * np.cos(rad)
+        cross = self.cell_x * np.cos(rad) - self.cell_y * np.sin(rad)
+        self.heading_along = along
+        self.heading_mask = (np.abs(cross) <= self.walker_width_m / 2) & (along > 0)
+    
+    def build(self, objects: List[Dict]) -> np.ndarray:
+        """
+        Rasterize detections into a flat boolean occupancy array.
+        
+        Args:
+            objects: Detection dictionaries with distance_m and bearing_deg
+        
+        Returns:
+            Boolean array over grid cells (reshape with self.shape)
+        """
+        known = [o for o in objects if 0 < o.get('distance_m', -1) <= self.range_m * 1.5]
+        if not known:
+            return np.zeros(self.cell_x.shape, dtype=bool)
+        
+        distance = np.array([o['distance_m'] for o in known])
+        bearing = np.radians([
+            o.get('bearing_deg', POSITION_BEARINGS.get(o.get('position'), 0.0))
+            for o in known
+        ])
+        half_width = np.maximum([o.get('width_m', 0.5) / 2 for o in known], self.cell_m)
+        
+        obj_x = (distance * np.sin(bearing))[:, None]
+        obj_y = (distance * np.cos(bearing))[:, None]
+        
+        occupied = (
+            (np.abs(self.cell_x - obj_x) <= half_width[:, None]) &
+            (np.abs(self.cell_y - obj_y) <= self.OBSTACLE_DEPTH_M / 2)
+        )
+        return occupied.any(axis=0)
+    
+    def score_headings(self, occupancy: np.ndarray) -> np.ndarray:
+        """
+        Compute free walking distance along each heading.
+        
+        Args:
+            occupancy: Flat boolean occupancy from build()
+        
+        Returns:
+            Clearance in meters per heading (range_m when unobstructed)
+        """
+        blocked = self.heading_mask & occupancy
+        along = np.where(blocked, self.heading_along, np.inf)
+        return np.minimum(along.min(axis=1), self.range_m)
+    
+    def assess(self, cv_data: Dict) -> Dict:
+        """
+        Build the grid for one frame and rank walking headings.
+        
+        Args:
+            cv_data: Structured CV output
+        
+        Returns:
+            Dict with per-heading clearance and the best heading
+        """
+        occupancy = self.build(cv_data.get('objects', []))
+        clearance = self.score_headings(occupancy)
+        
+        # Depth corridor flags unclassified obstacles straight ahead
+        if (cv_data.get('path_depth') or {}).get('blocked'):
+            straight = np.abs(self.headings_deg) <= 10
+            clearance = np.where(straight, np.minimum(clearance, 1.0), clearance)
+        
+        # Prefer the clearest heading, then the one closest to straight ahead
+        order = np.lexsort((np.abs(self.headings_deg), -np.round(clearance, 1)))
+        best = int(order[0])
+        
+        return {
+            'headings_deg': [round(float(h), 1) for h in self.headings_deg],
+            'clearance_m': [round(float(c), 1) for c in clearance],
+            'best_heading_deg': round(float(self.headings_deg[best]), 1),
+            'best_clearance_m': round(float(clearance[best]), 1),
+            'straight_clearance_m': round(float(clearance[np.argmin(np.abs(self.headings_deg))]), 1),
+            'occupied_cells': int(occupancy.sum())
+        }
@@ -0,0 +1,151 @@
+"""
+Lightweight IoU tracker with looming-based time-to-collision.
+
+Boxes are associated greedily by IoU within each class. Each track keeps
+O(1) state: its last box, scale and a smoothed log-scale growth rate.
+For an object approaching at constant speed, d(ln scale)/dt = 1 / TTC, so
+time-to-collision falls out of the box expansion rate directly with no
+motion model.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from config.settings import settings
+
+
+class ObjectTracker:
+    """Greedy IoU tracker that annotates detections with track_id and ttc_s."""
+    
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_missed: int = 5,
+        smoothing: float = 0.4
+    ):
+        """
+        Initialize tracker.
+        
+        Args:
+            iou_threshold: Minimum IoU to continue a track
+            max_missed: Frames a track survives without a match
+            smoothing: EMA weight for the newest growth-rate sample
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.smoothing = smoothing
+        
+        self.tracks: Dict[int, Dict] = {}
+        self.next_id = 1
+    
+    def update(self, detections: List[Dict], timestamp: float) -> List[Dict]:
+        """
+        Associate detections with tracks and estimate time-to-collision.
+        
+        Adds 'track_id' and 'ttc_s' (None when not approaching) to each
+        detection in place.
+        
+        Args:
+            detections: Detection dictionaries with 'bbox' and 'class'
+            timestamp: Frame time in seconds
+        
+        Returns:
+            The same detections list
+        """
+        track_ids = list(self.tracks.keys())
+        matches = self._associate(detections, track_ids)
+        
+        for det_index, detection in enumerate(detections):
+            track_id = matches.get(det_index)
+            scale = self._box_scale(detection['bbox'])
+            
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+                self.tracks[track_id] = {
+                    'class': detection['class'],
+                    'bbox': detection['bbox'],
+                    'scale': scale,
+                    'time': timestamp,
+                    'growth_rate': 0.0,
+                    'updates': 0,
+                    'missed': 0
+                }
+                detection['track_id'] = track_id
+                detection['ttc_s'] = None
+                continue
+            
+            track = self.tracks[track_id]
+            dt = timestamp - track['time']
+            if dt > 0 and track['scale'] > 0 and scale > 0:
+                rate = np.log(scale / track['scale']) / dt
+                track['growth_rate'] += self.smoothing * (rate - track['growth_rate'])
+                track['updates'] += 1
+            
+            track.update({'bbox': detection['bbox'], 'scale': scale, 'time': timestamp, 'missed': 0})
+            
+            detection['track_id'] = track_id
+            detection['ttc_s'] = self._time_to_collision(track)
+        
+        # Age out unmatched tracks
+        matched = set(matches.values())
+        for track_id in track_ids:
+            if track_id not in matched:
+                self.tracks[track_id]['missed'] += 1
+                if self.tracks[track_id]['missed'] > self.max_missed:
+                    del self.tracks[track_id]
+        
+        return detections
+    
+    def _associate(self, detections: List[Dict], track_ids: List[int]) -> Dict[int, int]:
+        """Greedy IoU matching within each class (detection index -> track id)."""
+        if not detections or not track_ids:
+            return {}
+        
+        det_boxes = np.array([d['bbox'] for d in detections], dtype=np.float32)
+        track_boxes = np.array([self.tracks[t]['bbox'] for t in track_ids], dtype=np.float32)
+        iou = self._iou_matrix(det_boxes, track_boxes)
+        
+        # Never match across classes
+        det_classes = np.array([d['class'] for d in detections])
+        track_classes = np.array([self.tracks[t]['class'] for t in track_ids])
+        iou[det_classes[:, None] != track_classes[None, :]] = 0.0
+        
+        matches = {}
+        used_tracks = set()
+        for flat_index in np.argsort(-iou, axis=None):
+            det_index, track_index = np.unravel_index(flat_index, iou.shape)
+            if iou[det_index, track_index] < self.iou_threshold:
+                break
+            if det_index in matches or track_index in used_tracks:
+                continue
+            matches[int(det_index)] = track_ids[track_index]
+            used_tracks.add(track_index)
+        
+        return matches
+    
+    def _time_to_collision(self, track: Dict) -> Optional[float]:
+        """Convert smoothed growth rate into seconds to contact (None if not looming)."""
+        if track['updates'] < 2 or track['growth_rate'] < settings.ttc_min_growth_rate:
+            return None
+        
+        return round(float(min(1.0 / track['growth_rate'], 99.0)), 2)
+    
+    @staticmethod
+    def _box_scale(bbox) -> float:
+        """Geometric mean of box width and height (robust to aspect changes)."""
+        x1, y1, x2, y2 = bbox
+        return float(np.sqrt(max(x2 - x1, 0.0) * max(y2 - y1, 0.0)))
+    
+    @staticmethod
+    def _iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """Pairwise IoU between two sets of (x1, y1, x2, y2) boxes."""
+        x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+        y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+        x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+        y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+        
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+        area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+        union = area_a[:, None] + area_b[None, :] - intersection
+        
+        return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
@@ -14,7 +14,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.cv_engine.detector import ObjectDetector
-from src.cloud_agent.local_agent import LocalNavigationAgent
+from src.cloud_agent.local_agent import create_agent
+from src.cloud_agent.alert_engine import SafetyAlertEngine
 from src.audio.tts_output import TTSEngine
 from src.audio.speech_input import SpeechRecognizer
 from config.settings import settings
@@ -103,17 +104,35 @@ def initialize_components():
     """Initialize all system components."""
     if 'initialized' not in st.session_state:
         with st.spinner("Initializing system components..."):
-            # Initialize detector
-            st.session_state.detector = ObjectDetector()
+            # Initialize detector (the video processor may have created it already)
+            if 'detector' not in st.session_state:
+                st.session_state.detector = ObjectDetector()
             
-            # Initialize Gemini-powered agent
-            st.session_state.agent = LocalNavigationAgent()
+            # Initialize agent (Gemini, or a local LLM when AGENT_BACKEND=offline_llm)
+            st.session_state.agent = create_agent()
             
             # Initialize TTS
             st.session_state.tts = TTSEngine()
             
-            # Initialize speech recognizer
-            st.session_state.speech_recognizer = SpeechRecognizer()
+            # Gemini answers that miss the deadline are spoken as follow-ups
+            if st.session_state.tts.is_available():
+                tts = st.session_state.tts
+                st.session_state.agent.set_follow_up_handler(
+                    lambda text: tts.speak(f"Update: {text}", blocking=False)
+                )
+            
+            # Initialize speech recognizer (ignores what it hears while our own prompts play)
+            st.session_state.speech_recognizer = SpeechRecognizer(
+                is_speaking=st.session_state.tts.is_speaking if st.session_state.tts.is_available() else None
+            )
+            
+            # Proactive safety alerts, fed by every video frame
+            st.session_state.alert_engine = SafetyAlertEngine()
+            if settings.proactive_alerts and st.session_state.tts.is_available():
+                tts = st.session_state.tts
+                st.session_state.alert_engine.subscribe(
+                    lambda event: tts.speak(event['message'], priority=TTSEngine.PRIORITY_ALERT)
+                )
             
             # State variables
             st.session_state.last_detection = None
@@ -191,14 +210,44 @@ def render_sidebar():
         # Check actual availability
         speech_available = st.session_state.speech_recognizer.is_available() if hasattr(st.session_state, 'speech_recognizer') else False
         tts_available = st.session_state.tts.is_available() if hasattr(st.session_state, 'tts') else False
+        offline_llm = settings.agent_backend == 'offline_llm'
+        if offline_llm:
+            llm_available = hasattr(st.session_state, 'agent') and st.session_state.agent.gemini_tool.is_available()
+            ai_engine = "Offline LLM ✓" if llm_available else "Basic Mode"
+        else:
+            ai_engine = "Gemini 2.0 Flash ✓" if feature_status['use_gemini'] else "Basic Mode"
         
         st.info(f"""
         **CV Engine:** YOLOv8n  
-        **AI Engine:** {"Gemini 2.0 Flash ✓" if feature_status['use_gemini'] else "Basic Mode"}  
+        **AI Engine:** {ai_engine}  
         **TTS:** {"Enabled ✓" if tts_available else "Disabled ✗"}  
         **Speech:** {"Enabled ✓" if speech_available else "Disabled ✗"}
         """)
         
+        # Gemini response cache counters (for tuning scene quantization)
+        if hasattr(st.session_state, 'agent') and not offline_llm and st.session_state.agent.gemini_tool.is_available():
+            cache_stats = st.session_state.agent.gemini_tool.get_cache_stats()
+            st.caption(
+                f"Gemini cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%})"
+            )
+            scheduler_stats = st.session_state.agent.gemini_tool.get_scheduler_stats()
+            st.caption(
+                f"Gemini requests (all sessions): {scheduler_stats['submitted']} "
+                f"({scheduler_stats['coalesced']} coalesced, {scheduler_stats['in_flight']} in flight)"
+            )
+            if st.session_state.agent.gemini_tool.is_circuit_open():
+                st.caption("⚠️ Gemini unreachable - answering locally for now")
+        
+        # Speech queue health (time from queueing to speaking)
+        if tts_available:
+            tts_stats = st.session_state.tts.get_stats()
+            st.caption(
+                f"Speech queue: {tts_stats['queue_depth']} waiting, "
+                f"{tts_stats['latency_ms_p50']:.0f}ms to start (p50), "
+                f"{tts_stats['dropped_stale']} stale dropped"
+            )
+        
         # Show warning if speech is disabled
         if not speech_available:
             st.warning("⚠️ Voice commands unavailable")
@@ -239,6 +288,8 @@ if WEBRTC_AVAILABLE:
                 from src.cv_engine.detector import ObjectDetector
                 self.detector = ObjectDetector()
                 st.session_state.detector = self.detector
+            self.alert_engine = st.session_state.get('alert_engine')
+            self.agent = st.session_state.get('agent')
             self.frame_count = 0
         
         def recv(self, frame):  # Type hint removed for compatibility
@@ -252,12 +303,9 @@ if WEBRTC_AVAILABLE:
             
             # ALWAYS store latest frame, even if no objects detected
             # User might ask "what do you see?" and we need the frame!
-            structured_data = self.detector.get_structured_output(detections) if detections else {
-                'objects': [],
-                'total_objects': 0,
-                'safety_status': 'clear',
-                'nearest_distance': None
-            }
+            # (Structured output is built even for empty frames so the depth
+            # corridor can still report walls and kerbs with no detections)
+            structured_data = self.detector.get_structured_output(detections)
             
             st.session_state.last_detection = {
                 'frame': img,
@@ -265,11 +313,19 @@ if WEBRTC_AVAILABLE:
                 'timestamp': time.time()
             }
             
+            # Proactive alerts: bounded per-frame work, never touches the VLM
+            if self.alert_engine is not None:
+                self.alert_engine.update(structured_data)
+            
+            # Background helpers (scene prefetch) - constant-time per frame
+            if self.agent is not None:
+                self.agent.observe_frame(img, structured_data)
+            
             self.frame_count += 1
             
             # Debug logging every 30 frames (once per second at ~30fps)
             if self.frame_count % 30 == 0:
-                obj_count = structured_data.get('total_objects', 0)
+                obj_count = structured_data.get('num_objects', 0)
                 print(f"[VIDEO] Frame {self.frame_count} processed | Objects: {obj_count} | Detection saved: YES")
             
             # Convert back to av.VideoFrame
@@ -315,9 +371,9 @@ def render_video_feed(demo_mode):
                 st.session_state[stream_status_key] = True
                 if hasattr(st.session_state, 'tts') and st.session_state.tts.is_available():
                     if webrtc_ctx.state.playing:
-                        st.session_state.tts.speak("Live stream active. Real-time detection running.", blocking=False)
+                        st.session_state.tts.speak("Live stream active. Real-time detection running.", priority=TTSEngine.PRIORITY_STATUS)
                     else:
-                        st.session_state.tts.speak("Stream inactive. Click START to begin.", blocking=False)
+                        st.session_state.tts.speak("Stream inactive. Click START to begin.", priority=TTSEngine.PRIORITY_STATUS)
             
             if webrtc_ctx.state.playing:
                 st.success("🟢 Stream active - Real-time detection running")
@@ -445,6 +501,17 @@ def render_detection_status():
                 unsafe_allow_html=True
             )
         
+        # Most recent proactive alert (haptic pattern shown until it goes stale)
+        alert_engine = st.session_state.get('alert_engine')
+        last_alert = alert_engine.last_event if alert_engine else None
+        if last_alert and time.time() - last_alert['timestamp'] < 5.0:
+            haptic = last_alert['haptic']
+            haptic_str = (
+                f" • Haptic: {haptic['pattern'].replace('_', ' ')}"
+                if haptic.get('enabled') else ""
+            )
+            st.error(f"🚨 {last_alert['message']}{haptic_str}")
+        
         # Object list
         st.subheader("Detected Objects")
         if data['num_objects'] > 0:
@@ -533,10 +600,16 @@ def render_query_interface():
             
             # Speak prompt
             if st.session_state.tts.is_available():
-                st.session_state.tts.speak("Listening", blocking=False)
+                st.session_state.tts.speak("Listening", priority=TTSEngine.PRIORITY_STATUS)
             
             try:
-                recognized_text = st.session_state.speech_recognizer.listen_once(timeout=5)
+                # Streaming backends show what they hear while the user speaks
+                partial_placeholder = st.empty()
+                recognized_text = st.session_state.speech_recognizer.listen_once(
+                    timeout=5,
+                    on_partial=lambda partial: partial_placeholder.caption(f"🎤 {partial}...")
+                )
+                partial_placeholder.empty()
                 if recognized_text:
                     # Show what was heard in LARGE, prominent text
                     st.markdown("---")
@@ -546,7 +619,7 @@ def render_query_interface():
                     
                     # Speak what was heard
                     if st.session_state.tts.is_available():
-                        st.session_state.tts.speak(f"You said: {recognized_text}", blocking=False)
+                        st.session_state.tts.speak(f"You said: {recognized_text}", priority=TTSEngine.PRIORITY_STATUS)
                     
                     query_to_process = recognized_text
                 else:
@@ -580,35 +653,62 @@ def render_query_interface():
             st.caption("💡 Check the terminal window for [VIDEO] messages to confirm frames are being processed")
             
             if st.session_state.tts.is_available():
-                st.session_state.tts.speak("Waiting for video feed. Make sure the stream is running.", blocking=False)
+                st.session_state.tts.speak("Waiting for video feed. Make sure the stream is running.", priority=TTSEngine.PRIORITY_STATUS)
         else:
             # Speak "thinking"
             if st.session_state.tts.is_available():
-                st.session_state.tts.speak("Thinking", blocking=False)
+                st.session_state.tts.speak("Thinking", priority=TTSEngine.PRIORITY_STATUS)
                 
-            with st.spinner("🤔 AI is thinking..."):
-                # Get agent response
-                response = st.session_state.agent.process_query(
+            if settings.vlm_streaming:
+                # Stream: speak and show each sentence as soon as it is generated
+                response = st.session_state.agent.stream_query(
                     query_to_process,
                     st.session_state.last_detection['frame'],
                     st.session_state.last_detection['data']
                 )
-            
-            # Display response in LARGE, prominent text
-            st.markdown("---")
-            st.markdown("### 🤖 AI Response:")
-            st.markdown(f"## **{response['text_response']}**")
-            st.markdown("---")
+                
+                st.markdown("---")
+                st.markdown("### 🤖 AI Response:")
+                response_placeholder = st.empty()
+                streamed_text = ""
+                text_stream = response['text_stream']
+                if st.session_state.tts.is_available():
+                    text_stream = st.session_state.tts.speak_stream(text_stream)
+                for sentence in text_stream:
+                    streamed_text = f"{streamed_text} {sentence}".strip()
+                    response_placeholder.markdown(f"## **{streamed_text}**")
+                st.markdown("---")
+            else:
+                with st.spinner("🤔 AI is thinking..."):
+                    # Get agent response
+                    response = st.session_state.agent.process_query(
+                        query_to_process,
+                        st.session_state.last_detection['frame'],
+                        st.session_state.last_detection['data']
+                    )
+                
+                # Display response in LARGE, prominent text
+                st.markdown("---")
+                st.markdown("### 🤖 AI Response:")
+                st.markdown(f"## **{response['text_response']}**")
+                st.markdown("---")
             
             # Show which system was used
-            if response.get('used_vlm'):
-                st.caption("🌟 Using Gemini AI")
+            model_name = "the offline AI model" if settings.agent_backend == 'offline_llm' else "Gemini AI"
+            if response.get('prefetched'):
+                st.caption(f"⚡ Using {model_name} (prefetched)")
+            elif response.get('used_vlm'):
+                st.caption(f"🌟 Using {model_name}")
+            elif response.get('follow_up_pending'):
+                st.caption(f"⏱️ Quick answer - the answer from {model_name} will be spoken if it arrives shortly")
             else:
                 st.caption("🔧 Using basic mode")
             
             # Speak response (MOST IMPORTANT - blind users need to hear this!)
+            # (streamed responses were already queued sentence by sentence)
             if st.session_state.tts.is_available():
-                st.session_state.tts.speak(response['text_response'], blocking=False)
+                if not settings.vlm_streaming:
+                    st.session_state.tts.speak(response['text_response'], blocking=False)
                 st.success("🔊 Speaking response...")
             else:
                 st.warning("⚠️ Text-to-speech not available")
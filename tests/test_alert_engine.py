@@ -0,0 +1,48 @@
+"""
+Tests for the proactive safety alert engine.
+"""
+from src.cloud_agent.alert_engine import SafetyAlertEngine
+
+
+def _obj(class_name: str, distance_m: float, position: str = 'center', track_id: int = None) -> dict:
+    return {'class': class_name, 'position': position, 'distance_m': distance_m, 'track_id': track_id}
+
+
+def test_grouped_alert_uses_proper_plurals():
+    engine = SafetyAlertEngine()
+    events = engine.update({'objects': [_obj('person', 1.2, track_id=1), _obj('person', 1.3, track_id=2)]})
+    
+    assert events[0]['count'] == 2
+    assert "2 people" in events[0]['message']
+    
+    events = SafetyAlertEngine().update({'objects': [_obj('bus', 1.2, track_id=1), _obj('bus', 1.4, track_id=2)]})
+    assert "2 buses" in events[0]['message']
+
+
+def test_level_steps_down_only_past_the_hysteresis_margin():
+    engine = SafetyAlertEngine()
+    engine.update({'objects': [_obj('chair', 1.2, track_id=7)]})
+    assert engine.object_states['track:7']['level'] == 'warning'
+    
+    # Just outside the 1.5 m warning band, inside the margin: stays a warning
+    engine.update({'objects': [_obj('chair', 1.6, track_id=7)]})
+    assert engine.object_states['track:7']['level'] == 'warning'
+    
+    # Clearly outside: steps down
+    engine.update({'objects': [_obj('chair', 2.2, track_id=7)]})
+    assert engine.object_states['track:7']['level'] == 'caution'
+
+
+def test_warning_is_not_repeated_within_the_cooldown():
+    engine = SafetyAlertEngine()
+    assert len(engine.update({'objects': [_obj('chair', 1.2, track_id=3)]})) == 1
+    assert engine.update({'objects': [_obj('chair', 1.2, track_id=3)]}) == []
+
+
+def test_blocked_depth_corridor_alerts_once():
+    engine = SafetyAlertEngine()
+    cv_data = {'objects': [], 'path_depth': {'blocked': True, 'nearness': 0.9, 'age_s': 0.1}}
+    
+    events = engine.update(cv_data)
+    assert [e['key'] for e in events] == ['path_depth']
+    assert engine.update(cv_data) == []
@@ -0,0 +1,108 @@
+"""
+Tests for the Gemini circuit breaker and its use on the async call path.
+"""
+import asyncio
+import time
+import numpy as np
+import pytest
+from src.cloud_agent.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.cloud_agent.gemini_tool import GeminiVLMTool
+from src.cloud_agent.request_scheduler import RequestScheduler
+
+
+CV_DATA = {'timestamp': 0.0, 'num_objects': 0, 'objects': [], 'critical_alerts': [], 'safety_status': 'CLEAR'}
+FRAME = np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Async model whose calls optionally hang until cancelled."""
+    
+    def __init__(self):
+        self.hang = False
+    
+    async def generate_content_async(self, contents):
+        if self.hang:
+            await asyncio.sleep(60)
+        return FakeResponse("A clear hallway.")
+
+
+def _tool(breaker: CircuitBreaker) -> GeminiVLMTool:
+    tool = GeminiVLMTool()
+    tool.api_available = True
+    tool.model = FakeModel()
+    tool.breaker = breaker
+    tool.scheduler = RequestScheduler(rate_per_minute=0, burst=1, max_concurrent=2)
+    return tool
+
+
+def test_breaker_opens_and_recovers_through_a_probe():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_s=0.05, half_open_probes=1)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_encode_during_probe_does_not_wedge_the_breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_s=0.0, half_open_probes=1)
+    breaker.record_failure()
+    tool = _tool(breaker)
+    
+    def broken_build(*args, **kwargs):
+        raise ValueError("encode failed")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(tool, '_build_contents', broken_build)
+        with pytest.raises(ValueError):
+            asyncio.run(tool.generate_description_async(FRAME, CV_DATA, "what is ahead"))
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    # Next call is admitted as a probe and closes the circuit
+    answer = asyncio.run(tool.generate_description_async(FRAME, CV_DATA, "what is ahead"))
+    assert answer == "A clear hallway."
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_gives_its_slot_back():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_s=0.0, half_open_probes=1)
+    breaker.record_failure()
+    tool = _tool(breaker)
+    tool.model.hang = True
+    
+    async def cancel_probe():
+        task = asyncio.ensure_future(tool.generate_description_async(FRAME, CV_DATA, "what is ahead"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(cancel_probe())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    
+    tool.model.hang = False
+    answer = asyncio.run(tool.generate_description_async(FRAME, CV_DATA, "what is ahead"))
+    assert answer == "A clear hallway."
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_rejects_without_calling():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_s=60.0, half_open_probes=1)
+    breaker.record_failure()
+    
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(_tool(breaker).generate_description_async(FRAME, CV_DATA, "what is ahead"))
@@ -0,0 +1,55 @@
+"""
+Tests for the depth corridor check.
+"""
+import time
+import numpy as np
+from src.cv_engine.depth_estimator import DepthEstimator, normalize_nearness
+
+
+def _floor_map(horizon: float, height: int = 96, width: int = 128) -> np.ndarray:
+    """Raw inverse depth of an empty flat floor (linear in row below the horizon)."""
+    rows = np.arange(height, dtype=np.float32)[:, None]
+    inverse_depth = np.maximum(rows - horizon * height, 0.0) + 1.0
+    return np.repeat(inverse_depth, width, axis=1)
+
+
+def _snapshot(inverse_depth: np.ndarray) -> dict:
+    """Depth snapshot in the shape get_depth_map returns."""
+    return {
+        'map': normalize_nearness(inverse_depth),
+        'timestamp': time.time(),
+        'age_s': 0.0,
+        'frame_shape': inverse_depth.shape
+    }
+
+
+def test_empty_floor_is_not_blocked():
+    estimator = DepthEstimator()
+    
+    # Camera level (horizon mid-frame) and tilted down (horizon above the frame)
+    for horizon in (0.5, 0.35, -0.5):
+        corridor = estimator.sample_corridor(depth=_snapshot(_floor_map(horizon)))
+        assert corridor is not None
+        assert not corridor['blocked'], (horizon, corridor)
+
+
+def test_obstacle_in_corridor_is_blocked():
+    estimator = DepthEstimator()
+    inverse_depth = _floor_map(0.5)
+    height, width = inverse_depth.shape
+    
+    # Box standing in the path, as near as the floor at the user's feet
+    inverse_depth[height // 3:int(height * 0.8), width // 2 - 10:width // 2 + 10] = inverse_depth.max()
+    
+    corridor = estimator.sample_corridor(depth=_snapshot(inverse_depth))
+    assert corridor['blocked']
+
+
+def test_box_sample_counts_the_base_of_a_low_obstacle():
+    estimator = DepthEstimator()
+    inverse_depth = _floor_map(0.5)
+    # Kerb: only the bottom rows of the box are near
+    inverse_depth[68:80, 40:80] = inverse_depth.max()
+    
+    nearness = estimator.sample_box((40, 40, 80, 80), depth=_snapshot(inverse_depth))
+    assert nearness > 0.9
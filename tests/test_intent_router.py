@@ -0,0 +1,69 @@
+"""
+Tests for query intent routing and the agent's local answers.
+"""
+import pytest
+from src.cloud_agent.intent_router import route_intent
+from src.cloud_agent.local_agent import LocalNavigationAgent
+
+
+CHAIR = {'class': 'chair', 'position': 'left', 'distance_m': 1.5, 'track_id': 1}
+CAR = {'class': 'car', 'position': 'center', 'distance_m': 6.2, 'track_id': 2}
+CV_DATA = {'timestamp': 0.0, 'num_objects': 2, 'objects': [CHAIR, CAR], 'critical_alerts': [],
+           'safety_status': 'CLEAR'}
+
+
+class NoVLM:
+    """VLM tool stand-in that is never available."""
+    
+    def is_available(self):
+        return False
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.fixture
+def agent():
+    agent = LocalNavigationAgent(vlm_tool=NoVLM())
+    agent.prefetcher = None
+    return agent
+
+
+@pytest.mark.parametrize("query, name, target, use_vlm", [
+    ("read the sign", 'detail', None, True),
+    ("can you read that label", 'detail', None, True),
+    ("how far is the car", 'distance', 'car', True),
+    ("find my keys", 'find', 'keys', True),
+    ("where is the chair?", 'locate', 'chair', True),
+    ("is it safe to walk", 'safety', None, False),
+    ("which way is clear", 'navigation', None, False),
+    ("how do I get to the elevator", 'route', 'elevator', False),
+    ("where was the door", 'recall', 'door', False),
+])
+def test_routing(query, name, target, use_vlm):
+    intent = route_intent(query)
+    assert (intent.name, intent.target, intent.use_vlm) == (name, target, use_vlm)
+
+
+@pytest.mark.parametrize("query", ["is there a movie poster", "I removed it", "unsafely parked"])
+def test_safety_keywords_match_whole_words(query):
+    assert 'safety' not in route_intent(query).categories
+
+
+def test_inflected_safety_words_still_match():
+    assert route_intent("am I walking safely").name == 'safety'
+
+
+def test_object_in_view_is_answered_locally(agent):
+    assert agent._answer_without_vlm("how far is the car", CV_DATA) == (
+        "The car is ahead of you, about 6.2 meters away."
+    )
+    assert agent._answer_without_vlm("where is the chair", CV_DATA) == (
+        "The chair is on your left, about 1.5 meters away."
+    )
+
+
+def test_unknown_target_is_left_to_the_vlm(agent):
+    # Not detected and never seen: only the VLM can look for it
+    assert agent._answer_without_vlm("find my keys", CV_DATA) is None
+    assert agent._should_use_vlm("find my keys")
@@ -0,0 +1,86 @@
+"""
+Tests for the agent's streamed answers (deadline, stall cutoff, fallback flag).
+"""
+import threading
+import time
+import numpy as np
+import pytest
+from config.settings import settings
+from src.cloud_agent.local_agent import LocalNavigationAgent
+from src.cloud_agent.mock_responses import FallbackText
+
+
+CV_DATA = {'timestamp': 0.0, 'num_objects': 0, 'objects': [], 'critical_alerts': [], 'safety_status': 'CLEAR'}
+FRAME = np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+class FakeStreamTool:
+    """Stand-in VLM tool whose stream is scripted per test."""
+    
+    def __init__(self, script):
+        self.script = script
+        self.closed = threading.Event()
+    
+    def is_available(self):
+        return True
+    
+    def is_circuit_open(self):
+        return False
+    
+    def stream_description(self, image, cv_data, user_query):
+        try:
+            yield from self.script()
+        finally:
+            self.closed.set()
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.fixture
+def short_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, 'vlm_deadline_s', 1.0)
+    monkeypatch.setattr(settings, 'vlm_call_timeout_s', 0.2)
+
+
+def _agent(tool):
+    agent = LocalNavigationAgent(vlm_tool=tool)
+    agent.prefetcher = None
+    return agent
+
+
+def test_stalled_stream_is_cut_off_and_closed(short_timeouts):
+    def script():
+        yield "The door is ahead."
+        time.sleep(0.6)
+        yield "Never spoken."
+    
+    tool = FakeStreamTool(script)
+    response = _agent(tool).stream_query("describe the scene in detail", FRAME, CV_DATA)
+    
+    started = time.time()
+    assert list(response['text_stream']) == ["The door is ahead."]
+    assert time.time() - started < 0.5
+    assert response['used_vlm'] is True
+    
+    # The pump closes the tool's stream once the stalled read returns
+    assert tool.closed.wait(2.0)
+
+
+def test_fallback_text_is_not_reported_as_a_vlm_answer(short_timeouts):
+    def script():
+        yield FallbackText("The area appears open.")
+    
+    response = _agent(FakeStreamTool(script)).stream_query("describe the scene in detail", FRAME, CV_DATA)
+    
+    assert list(response['text_stream']) == ["The area appears open."]
+    assert response['used_vlm'] is False
+
+
+def test_local_answer_skips_the_vlm(short_timeouts):
+    tool = FakeStreamTool(lambda: iter(["unused"]))
+    response = _agent(tool).stream_query("is the path clear", FRAME, CV_DATA)
+    
+    assert response['used_vlm'] is False
+    assert list(response['text_stream']) == [response['text_response']]
+    assert not tool.closed.is_set()
@@ -0,0 +1,65 @@
+"""
+Tests for the offline LLM tool and agent.
+"""
+import numpy as np
+from config.settings import settings
+from src.cloud_agent import local_agent
+from src.cloud_agent.local_llm_tool import LocalLLMTool
+from src.cloud_agent.offline_agent import OfflineLLMAgent
+
+
+CV_DATA = {'timestamp': 0.0, 'num_objects': 0, 'objects': [], 'critical_alerts': [], 'safety_status': 'CLEAR'}
+FRAME = np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+class FakeLlama:
+    """llama.cpp stand-in streaming a fixed answer token by token."""
+    
+    def __init__(self):
+        self.closed = False
+    
+    def create_chat_completion(self, messages, max_tokens, temperature, stream):
+        def chunks():
+            try:
+                for token in ["The door ", "is ahead. ", "A chair ", "is on ", "your left."]:
+                    yield {'choices': [{'delta': {'content': token}}]}
+            finally:
+                self.closed = True
+        return chunks()
+
+
+def _tool() -> LocalLLMTool:
+    tool = LocalLLMTool(model_path="")
+    tool.model = FakeLlama()
+    tool.available = True
+    return tool
+
+
+def test_full_answer_is_streamed_by_sentence():
+    tool = _tool()
+    assert list(tool.stream_description(FRAME, CV_DATA, "what is ahead")) == [
+        "The door is ahead.", "A chair is on your left."
+    ]
+    assert tool.get_stats()['calls'] == 1
+
+
+def test_abandoned_stream_releases_the_model_at_once():
+    tool = _tool()
+    stream = tool.stream_description(FRAME, CV_DATA, "what is ahead")
+    assert next(stream) == "The door is ahead."
+    
+    stream.close()
+    assert tool.model.closed
+    assert tool._lock.acquire(blocking=False)
+    tool._lock.release()
+
+
+def test_offline_agent_never_builds_a_prefetcher(monkeypatch):
+    monkeypatch.setattr(settings, 'prefetch_enabled', True)
+    monkeypatch.setattr(settings, 'local_llm_model_path', "")
+    
+    def no_prefetcher(*args, **kwargs):
+        raise AssertionError("prefetcher built")
+    
+    monkeypatch.setattr(local_agent, 'ScenePrefetcher', no_prefetcher)
+    assert OfflineLLMAgent().prefetcher is None
@@ -0,0 +1,86 @@
+"""
+Tests for the persistent microphone stream's utterance bounds.
+"""
+import sys
+import time
+import types
+import numpy as np
+import pytest
+from config.settings import settings
+from src.audio.mic_stream import MicStream
+
+
+class FakeInputStream:
+    """Input stream that follows a script: 'quiet', 'loud', 'stall' or 'error' per read."""
+    
+    def __init__(self, script, frame_samples):
+        self.script = script
+        self.frame_samples = frame_samples
+    
+    def read(self, num_frames, exception_on_overflow=True):
+        step = next(self.script)
+        if step == 'error':
+            raise OSError("Input overflowed")
+        if step == 'stall':
+            time.sleep(0.5)
+        time.sleep(0.002)
+        amplitude = 5000 if step in ('loud', 'stall') else 10
+        return (np.ones(num_frames, dtype=np.int16) * amplitude).tobytes()
+    
+    def stop_stream(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+def _install_fake_pyaudio(monkeypatch, script):
+    class FakePyAudio:
+        def open(self, frames_per_buffer, **kwargs):
+            return FakeInputStream(script, frames_per_buffer)
+        
+        def terminate(self):
+            pass
+    
+    monkeypatch.setitem(sys.modules, 'pyaudio', types.SimpleNamespace(PyAudio=FakePyAudio, paInt16=8))
+    monkeypatch.setitem(sys.modules, 'webrtcvad', None)
+
+
+def _script(*parts):
+    for step, count in parts:
+        for _ in range(count):
+            yield step
+    while True:
+        yield parts[-1][0]
+
+
+def test_utterance_ends_after_silence(monkeypatch):
+    _install_fake_pyaudio(monkeypatch, _script(('quiet', 5), ('loud', 10), ('quiet', 1)))
+    mic = MicStream()
+    try:
+        frames = list(mic.listen(timeout=2.0))
+    finally:
+        mic.close()
+    assert len(frames) >= 10
+
+
+def test_stalled_device_is_cut_off_by_the_clock(monkeypatch):
+    monkeypatch.setattr(settings, 'mic_max_utterance_s', 0.3)
+    _install_fake_pyaudio(monkeypatch, _script(('quiet', 5), ('loud', 5), ('stall', 1)))
+    mic = MicStream()
+    try:
+        started = time.time()
+        list(mic.listen(timeout=2.0))
+        assert time.time() - started < 1.0
+    finally:
+        mic.close()
+
+
+def test_read_errors_during_an_utterance_raise(monkeypatch):
+    _install_fake_pyaudio(monkeypatch, _script(('quiet', 5), ('loud', 5), ('error', 1)))
+    mic = MicStream()
+    try:
+        with pytest.raises(OSError):
+            list(mic.listen(timeout=2.0))
+    finally:
+        mic.close()
@@ -0,0 +1,83 @@
+"""
+Tests for the spatio-temporal object memory.
+"""
+import time
+from src.cloud_agent.object_memory import ObjectMemory
+
+
+def _obj(class_name: str, track_id: int = None, position: str = 'center', distance_m: float = 2.0) -> dict:
+    return {'class': class_name, 'track_id': track_id, 'position': position, 'distance_m': distance_m}
+
+
+def test_same_track_id_in_two_sessions_is_two_objects():
+    memory = ObjectMemory(capacity=16, snapshot_path="")
+    now = time.time()
+    
+    assert memory.record([_obj('chair', track_id=1)], now, source='a') == 1
+    # Another session's tracker reuses id 1 for a different object right away
+    assert memory.record([_obj('door', track_id=1)], now + 0.1, source='b') == 1
+    
+    assert memory.last_seen_track(1, source='a')['class'] == 'chair'
+    assert memory.last_seen_track(1, source='b')['class'] == 'door'
+    
+    # Unchanged object in the same session is still deduplicated
+    assert memory.record([_obj('chair', track_id=1)], now + 0.2, source='a') == 0
+
+
+def test_interleaved_sessions_keep_time_range_scans_ordered():
+    memory = ObjectMemory(capacity=16, snapshot_path="")
+    now = time.time()
+    
+    memory.record([_obj('chair', track_id=1)], now - 5.0, source='a')
+    memory.record([_obj('door', track_id=1)], now - 1.0, source='b')
+    # Session a's frame arrives late, stamped before session b's
+    memory.record([_obj('table', track_id=2)], now - 3.0, source='a')
+    
+    sightings = memory.between(now - 10.0)
+    assert [s['class'] for s in sightings] == ['chair', 'table', 'door']
+    assert [s['class'] for s in memory.between(now - 4.0)] == ['table', 'door']
+    assert [s['class'] for s in memory.between(now - 10.0, now - 2.0)] == ['chair', 'table']
+    
+    # Indexes still point at the right (moved) sightings
+    assert memory.last_seen_track(1, source='b')['class'] == 'door'
+    assert memory.last_seen('door')['timestamp'] == now - 1.0
+
+
+def test_late_write_does_not_replace_newer_class_sighting():
+    memory = ObjectMemory(capacity=16, snapshot_path="")
+    now = time.time()
+    
+    memory.record([_obj('chair', track_id=1, position='left')], now - 1.0, source='a')
+    memory.record([_obj('chair', track_id=4, position='right')], now - 2.0, source='b')
+    
+    assert memory.last_seen('chair')['position'] == 'left'
+
+
+def test_ring_overwrites_oldest_and_stays_sorted():
+    memory = ObjectMemory(capacity=4, snapshot_path="")
+    now = time.time()
+    
+    for i in range(6):
+        memory.record([_obj('chair', track_id=i)], now - 10.0 + i, source='a')
+    # Older than everything left in the full ring: dropped
+    assert memory.record([_obj('door', track_id=1)], now - 20.0, source='b') == 0
+    # In the middle: slotted in, oldest falls out
+    memory.record([_obj('door', track_id=2)], now - 5.5, source='b')
+    
+    timestamps = [s['timestamp'] for s in memory.between(0.0)]
+    assert timestamps == sorted(timestamps)
+    assert len(timestamps) == 4
+    assert memory.last_seen('door')['track_id'] == 2
+
+
+def test_snapshot_round_trip_keeps_sessions_apart(tmp_path):
+    path = str(tmp_path / "memory.json")
+    memory = ObjectMemory(capacity=16, snapshot_path="")
+    now = time.time()
+    memory.record([_obj('chair', track_id=1)], now - 2.0, source='a')
+    memory.snapshot(path)
+    
+    restored = ObjectMemory(capacity=16, snapshot_path=path)
+    assert restored.last_seen('chair') is not None
+    # A new session's track 1 is not compared against the restored one
+    assert restored.record([_obj('chair', track_id=1)], now - 1.9, source='c') == 1
@@ -0,0 +1,35 @@
+"""
+Tests for speech recognizer backend selection.
+"""
+import sys
+import types
+from config.settings import settings
+from src.audio.recognizer_backends import VoskBackend
+
+
+def _fake_vosk(monkeypatch):
+    loaded = []
+    
+    class Model:
+        def __init__(self, model_path=None, lang=None):
+            loaded.append((model_path, lang))
+    
+    monkeypatch.setitem(sys.modules, 'vosk', types.SimpleNamespace(Model=Model, SetLogLevel=lambda level: None))
+    return loaded
+
+
+def test_vosk_without_a_local_model_is_unavailable(monkeypatch):
+    loaded = _fake_vosk(monkeypatch)
+    monkeypatch.setattr(settings, 'vosk_model_path', "")
+    
+    assert not VoskBackend().available
+    assert not VoskBackend(model_path="/nonexistent/vosk-model").available
+    # Never falls back to downloading a model by language
+    assert loaded == []
+
+
+def test_vosk_loads_a_local_model(monkeypatch, tmp_path):
+    loaded = _fake_vosk(monkeypatch)
+    
+    assert VoskBackend(model_path=str(tmp_path)).available
+    assert loaded == [(str(tmp_path), None)]
@@ -0,0 +1,92 @@
+"""
+Tests for the Gemini request scheduler (coalescing, concurrency cap, rate limit).
+"""
+import asyncio
+import pytest
+from src.cloud_agent.request_scheduler import RequestScheduler
+
+
+def test_identical_requests_share_one_call():
+    scheduler = RequestScheduler(rate_per_minute=0, burst=1, max_concurrent=4)
+    calls = []
+    
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+    
+    async def main():
+        return await asyncio.gather(*(scheduler.run('same', factory) for _ in range(3)))
+    
+    assert asyncio.run(main()) == ["answer"] * 3
+    assert len(calls) == 1
+    assert scheduler.get_stats()['coalesced'] == 2
+    assert scheduler.get_stats()['in_flight'] == 0
+
+
+def test_errors_reach_every_waiter():
+    scheduler = RequestScheduler(rate_per_minute=0, burst=1, max_concurrent=4)
+    
+    async def factory():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    async def main():
+        return await asyncio.gather(
+            scheduler.run('same', factory), scheduler.run('same', factory), return_exceptions=True
+        )
+    
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_concurrency_cap():
+    scheduler = RequestScheduler(rate_per_minute=0, burst=1, max_concurrent=2)
+    running = []
+    peak = []
+    
+    async def factory():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.02)
+        running.pop()
+        return "ok"
+    
+    async def main():
+        await asyncio.gather(*(scheduler.run(i, factory) for i in range(6)))
+    
+    asyncio.run(main())
+    assert max(peak) == 2
+
+
+def test_cancelled_token_wait_releases_the_slot():
+    # One slot and one token per minute: the second call waits for a token
+    scheduler = RequestScheduler(rate_per_minute=1, burst=1, max_concurrent=1)
+    
+    async def factory():
+        return "ok"
+    
+    async def main():
+        assert await scheduler.run('first', factory) == "ok"
+        
+        waiting = asyncio.ensure_future(scheduler.run('second', factory))
+        await asyncio.sleep(0.05)
+        assert scheduler.rate_limited >= 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        
+        # The permit came back: with the rate limit lifted the next call runs
+        scheduler.rate_per_minute = 0
+        return await asyncio.wait_for(scheduler.run('third', factory), 1.0)
+    
+    assert asyncio.run(main()) == "ok"
+
+
+def test_streaming_slot_is_counted_on_the_runtime_loop():
+    scheduler = RequestScheduler(rate_per_minute=0, burst=1, max_concurrent=1)
+    for _ in range(3):
+        with scheduler.slot_sync():
+            pass
+    
+    assert scheduler.get_stats()['submitted'] == 3
@@ -0,0 +1,46 @@
+"""
+Tests for the scene-signature response cache.
+"""
+import time
+import numpy as np
+from src.cloud_agent.response_cache import ResponseCache, normalize_intent, scene_signature
+
+
+def _cv(*objects) -> dict:
+    return {'objects': [{'class': c, 'position': p, 'distance_m': d} for c, p, d in objects]}
+
+
+def test_rephrased_queries_share_an_intent():
+    assert normalize_intent("Can you tell me what is ahead?") == normalize_intent("what ahead")
+
+
+def test_signature_ignores_order_and_small_distance_changes():
+    first = scene_signature(_cv(('chair', 'left', 1.2), ('door', 'center', 3.1)))
+    second = scene_signature(_cv(('door', 'center', 3.3), ('chair', 'left', 1.4)))
+    moved = scene_signature(_cv(('chair', 'right', 1.2), ('door', 'center', 3.1)))
+    
+    assert first == second
+    assert first != moved
+
+
+def test_signature_includes_the_image_hash():
+    dark = np.zeros((48, 64, 3), dtype=np.uint8)
+    gradient = np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (48, 1))[:, :, None].repeat(3, axis=2)
+    
+    assert scene_signature(_cv(), dark) != scene_signature(_cv(), gradient)
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_size=2, ttl_s=0.05)
+    cache.put('a', "A")
+    cache.put('b', "B")
+    assert cache.get('a') == "A"
+    
+    # 'b' is least recently used
+    cache.put('c', "C")
+    assert cache.get('b') is None
+    assert cache.get_stats()['evictions'] == 1
+    
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.get_stats()['expirations'] == 1
@@ -0,0 +1,73 @@
+"""
+Tests for the offline indoor route planner and the agent's route answers.
+"""
+import threading
+import pytest
+from config.settings import settings
+from src.cloud_agent.local_agent import LocalNavigationAgent
+from src.cloud_agent.route_planner import RoutePlanner
+from src.cloud_agent.tools import NavigationTools
+
+
+VENUE = "config/venues/demo_office.json"
+
+
+@pytest.fixture
+def planner():
+    return RoutePlanner(VENUE, cache_size=4)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(settings, 'venue_map_path', VENUE)
+    monkeypatch.setattr(NavigationTools, '_route_planner', None)
+    monkeypatch.setattr(NavigationTools, '_route_planner_failed', False)
+    agent = LocalNavigationAgent()
+    agent.prefetcher = None
+    return agent
+
+
+def test_shortest_route_and_cache(planner):
+    route = planner.plan('entrance', 'elevator')
+    assert route['path'] == ['entrance', 'lobby', 'corridor_a', 'elevator']
+    assert route['distance_m'] == pytest.approx(26.0)
+    assert not route['cached']
+    
+    assert planner.plan('entrance', 'elevator')['cached']
+    assert planner.get_stats()['cache_hits'] == 1
+
+
+def test_resolve_spoken_names(planner):
+    assert planner.resolve("the lift") == 'elevator'
+    assert planner.resolve("front door") == 'entrance'
+    assert planner.resolve("the moon") is None
+
+
+def test_concurrent_sessions_share_the_cache_safely(planner):
+    goals = ['elevator', 'stairs', 'cafeteria', 'restroom', 'meeting_room', 'office_101', 'emergency_exit']
+    errors = []
+    
+    def worker():
+        try:
+            for _ in range(50):
+                for goal in goals:
+                    assert planner.plan('entrance', goal)['path'][-1] == goal
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert planner.get_stats()['cached_routes'] <= 4
+
+
+def test_route_answer_names_the_start(agent):
+    answer = agent._answer_from_route("how do I get to the elevator?")
+    assert answer.startswith("From the main entrance, the elevator is about 26 meters away.")
+    
+    answer = agent._answer_from_route("how do I get to the cafeteria from the lobby?")
+    assert answer.startswith("From the lobby, the cafeteria is about 10 meters away.")
@@ -0,0 +1,56 @@
+"""
+Tests for the IoU tracker and its looming-based time-to-collision.
+"""
+import pytest
+from src.cv_engine.tracker import ObjectTracker
+
+
+def _box(center_x: float, center_y: float, size: float) -> list:
+    half = size / 2
+    return [center_x - half, center_y - half, center_x + half, center_y + half]
+
+
+def test_approaching_object_gets_a_time_to_collision():
+    tracker = ObjectTracker()
+    distance_m, speed_mps, dt = 6.0, 1.5, 0.1
+    
+    for frame in range(12):
+        # Apparent size is inversely proportional to distance
+        detection = {'class': 'person', 'bbox': _box(320, 240, 400.0 / distance_m)}
+        tracker.update([detection], frame * dt)
+        distance_m -= speed_mps * dt
+    
+    assert detection['track_id'] == 1
+    true_ttc = (distance_m + speed_mps * dt) / speed_mps
+    assert detection['ttc_s'] == pytest.approx(true_ttc, rel=0.3)
+
+
+def test_static_and_receding_objects_have_no_ttc():
+    tracker = ObjectTracker()
+    for frame in range(6):
+        static = {'class': 'chair', 'bbox': _box(100, 240, 80)}
+        receding = {'class': 'person', 'bbox': _box(500, 240, 120 - frame * 5)}
+        tracker.update([static, receding], frame * 0.1)
+    
+    assert static['ttc_s'] is None
+    assert receding['ttc_s'] is None
+    assert (static['track_id'], receding['track_id']) == (1, 2)
+
+
+def test_tracks_never_match_across_classes():
+    tracker = ObjectTracker()
+    first = {'class': 'chair', 'bbox': _box(320, 240, 100)}
+    tracker.update([first], 0.0)
+    second = {'class': 'dog', 'bbox': _box(320, 240, 100)}
+    tracker.update([second], 0.1)
+    
+    assert second['track_id'] != first['track_id']
+
+
+def test_unmatched_tracks_expire():
+    tracker = ObjectTracker(max_missed=2)
+    tracker.update([{'class': 'chair', 'bbox': _box(320, 240, 100)}], 0.0)
+    for frame in range(1, 4):
+        tracker.update([], frame * 0.1)
+    
+    assert tracker.tracks == {}
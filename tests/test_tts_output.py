@@ -0,0 +1,151 @@
+"""
+Tests for the speech queue (priorities, preemption, idle-time preloading).
+"""
+import sys
+import threading
+import time
+import types
+import pytest
+from config.settings import settings
+from src.audio.tts_output import TTSEngine
+
+
+WORD_S = 0.02
+
+
+class FakeEngine:
+    """pyttsx3 stand-in that 'speaks' word by word and fires started-word callbacks."""
+    
+    def __init__(self):
+        self.callbacks = []
+        self.queued = []
+        self.spoken_words = []
+        self.saved = []
+        self.stop_threads = []
+        self._stopped = False
+    
+    def setProperty(self, name, value):
+        pass
+    
+    def getProperty(self, name):
+        return [] if name == 'voices' else 'voice'
+    
+    def connect(self, topic, callback):
+        assert topic == 'started-word'
+        self.callbacks.append(callback)
+    
+    def say(self, text):
+        self.queued.append((text, None))
+    
+    def save_to_file(self, text, path):
+        self.queued.append((text, path))
+    
+    def runAndWait(self):
+        self._stopped = False
+        queued, self.queued = self.queued, []
+        for text, path in queued:
+            for location, word in enumerate(text.split()):
+                for callback in self.callbacks:
+                    callback('utterance', location, len(word))
+                if self._stopped:
+                    return
+                if path is None:
+                    self.spoken_words.append(word)
+                time.sleep(WORD_S)
+            if path is not None:
+                with open(path, 'wb') as f:
+                    f.write(b"RIFF")
+                self.saved.append(text)
+    
+    def stop(self):
+        self.stop_threads.append(threading.current_thread().name)
+        self._stopped = True
+
+
+class FakePlayer:
+    def __init__(self):
+        self.played = []
+    
+    def play(self, data, fmt='wav'):
+        self.played.append(data)
+    
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    fake = FakeEngine()
+    monkeypatch.setitem(sys.modules, 'pyttsx3', types.SimpleNamespace(init=lambda: fake))
+    monkeypatch.setattr(settings, 'tts_cache_dir', "")
+    monkeypatch.setattr(settings, 'tts_preload_idle_s', 0.05)
+    return fake
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_alert_preempts_an_answer_from_the_worker_thread(engine):
+    tts = TTSEngine(use_online=False)
+    answer = "one two three four five six seven eight nine ten eleven twelve"
+    tts.speak(answer)
+    _wait_for(lambda: engine.spoken_words)
+    
+    tts.speak("Stop, step ahead", blocking=True, priority=TTSEngine.PRIORITY_ALERT)
+    
+    # Stopped from the engine's own callback, never from the caller's thread
+    assert engine.stop_threads == ["tts-worker"]
+    assert engine.spoken_words[-3:] == ["Stop,", "step", "ahead"]
+    assert len(engine.spoken_words) < len(answer.split()) + 3
+    assert tts.preempted == 1
+
+
+def test_more_urgent_items_are_spoken_first_without_preempting_peers(engine):
+    tts = TTSEngine(use_online=False)
+    tts.speak("first answer here")
+    _wait_for(lambda: engine.spoken_words)
+    
+    status = tts._enqueue("Thinking", TTSEngine.PRIORITY_STATUS)
+    tts.speak("second answer", blocking=True)
+    status['done'].wait(2.0)
+    
+    assert engine.spoken_words == ["first", "answer", "here", "second", "answer", "Thinking"]
+    assert engine.stop_threads == []
+
+
+def test_prompts_are_preloaded_only_in_idle_gaps(engine):
+    tts = TTSEngine(use_online=False)
+    tts.player = FakePlayer()
+    tts._phrases = {"Listening now"}
+    tts._preload_todo = ["Listening now"]
+    
+    # The first item is spoken straight away, nothing synthesized ahead of it
+    tts.speak("hello there", blocking=True)
+    assert engine.saved == []
+    
+    _wait_for(lambda: engine.saved == ["Listening now"])
+    
+    tts.speak("Listening now", blocking=True)
+    assert len(tts.player.played) == 1
+
+
+def test_queued_item_cuts_off_a_preload(engine):
+    tts = TTSEngine(use_online=False)
+    tts.player = FakePlayer()
+    phrase = " ".join(["word"] * 40)
+    tts._phrases = {phrase}
+    tts._preload_todo = [phrase]
+    tts._ensure_worker()
+    # Idle gap passes and the (long) prompt starts synthesizing
+    time.sleep(0.15)
+    
+    tts.speak("Car approaching", blocking=True, priority=TTSEngine.PRIORITY_ALERT)
+    
+    assert engine.stop_threads == ["tts-worker"]
+    assert engine.spoken_words == ["Car", "approaching"]
+    # Retried in a later gap, and the truncated file was not cached
+    assert tts._preload_todo == [phrase]